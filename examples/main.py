@@ -30,7 +30,14 @@ def main(args=None):
     robot = Robot(name=args.name, logger=logger)
     robot.register_default_handlers()
     robot.load_adapter(args.adapter)
-    robot.run(args.adapter)
+    #: Drop room history delivered again on reconnect.
+    robot.setup_dedup()
+    if args.record is not None:
+        robot.setup_recorder(args.record)
+    try:
+        robot.run(args.adapter)
+    finally:
+        robot.shutdown()
 
 
 def parse_options():
@@ -39,6 +46,7 @@ def parse_options():
     parser = argparse.ArgumentParser(description=description, add_help=False)
     parser.add_argument('-a', '--adapter', default='shell')
     parser.add_argument('-u', '--name', default='robo')
+    parser.add_argument('-r', '--record', default=None)
     parser.add_argument('-vv', '--verbose', default=logging.INFO, nargs='?',
                         const=logging.DEBUG)
 
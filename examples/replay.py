@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    replay
+    ~~~~~~
+
+    Replay traffic recorded by `python examples/main.py -r traffic.log`.
+
+    $ python examples/replay.py traffic.log -s 10
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse  # noqa E402
+import json  # noqa E402
+import logging  # noqa E402
+from robo.robot import Robot  # noqa E402
+from robo.replay import Replayer  # noqa E402
+
+
+def main(args=None):
+    """Main.
+
+    :param args: :class:`argparse` Args
+    """
+    logging.basicConfig(level=args.verbose, format=Robot.debug_log_format)
+    logger = logging.getLogger('robo')
+
+    robot = Robot(name=args.name, logger=logger, bus='direct')
+    robot.register_default_handlers()
+    replayer = Replayer(robot, args.path, speed=args.speed,
+                        settle=args.settle)
+    try:
+        report = replayer.run()
+    finally:
+        robot.shutdown()
+
+    print(json.dumps(report, indent=2, sort_keys=True))
+
+
+def parse_options():
+    """Parse options. """
+    description = 'Replay recorded traffic'
+    parser = argparse.ArgumentParser(description=description, add_help=False)
+    parser.add_argument('path')
+    parser.add_argument('-u', '--name', default='robo')
+    parser.add_argument('-s', '--speed', type=float, default=None)
+    parser.add_argument('--settle', type=float, default=0.0)
+    parser.add_argument('-vv', '--verbose', default=logging.WARNING,
+                        nargs='?', const=logging.DEBUG)
+
+    args = parser.parse_args()
+
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_options()
+    main(args)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    supervisor
+    ~~~~~~~~~~
+
+    Endpoint of room sharded robo.
+
+    Run robots in worker processes, each worker joins and dispatches only
+    rooms owned by its shard.
+
+    $ python examples/supervisor.py -a slack -w 4
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse  # noqa E402
+import logging  # noqa E402
+from robo.robot import Robot  # noqa E402
+from robo.supervisor import Supervisor  # noqa E402
+
+
+def worker(shard, reporter, args):
+    """Run robot of the shard.
+
+    :param shard: :class:`robo.shard.Shard`
+    :param reporter: :class:`robo.supervisor.StatsReporter`
+    :param args: :class:`argparse` Args
+    """
+    logging.basicConfig(level=args.verbose, format=Robot.debug_log_format)
+    logger = logging.getLogger('robo')
+
+    robot = Robot(name=args.name, logger=logger)
+    robot.setup_shard(shard.index, shard.count)
+    robot.register_default_handlers()
+    robot.load_adapter(args.adapter)
+    #: Drop room history delivered again on reconnect.
+    robot.setup_dedup()
+    reporter.start(robot)
+    try:
+        robot.run(args.adapter)
+    finally:
+        reporter.report(robot)
+        robot.shutdown()
+
+
+def main(args=None):
+    """Main.
+
+    :param args: :class:`argparse` Args
+    """
+    logging.basicConfig(level=args.verbose, format=Robot.debug_log_format)
+    logger = logging.getLogger('robo')
+
+    supervisor = Supervisor(worker, args.workers, args=(args,),
+                            report_interval=args.report_interval,
+                            logger=logger)
+    try:
+        supervisor.run()
+    except KeyboardInterrupt:
+        logger.info('Stopping workers.')
+
+
+def parse_options():
+    """Parse options. """
+    description = 'Dead simple bot framework'
+    parser = argparse.ArgumentParser(description=description, add_help=False)
+    parser.add_argument('-a', '--adapter', default='slack')
+    parser.add_argument('-u', '--name', default='robo')
+    parser.add_argument('-w', '--workers', type=int, default=2)
+    parser.add_argument('-r', '--report-interval', type=float, default=60.0)
+    parser.add_argument('-vv', '--verbose', default=logging.INFO, nargs='?',
+                        const=logging.DEBUG)
+
+    args = parser.parse_args()
+
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_options()
+    main(args)
@@ -13,23 +13,39 @@
     :license: BSD, see LICENSE for more details.
 """
 import sys
+import time
+import inspect
+import importlib
 
 PY2 = sys.version_info[0] == 2
 
 
 if PY2:
     text_type = unicode  # noqa F821
+    string_types = (str, unicode)  # noqa F821
 
     iterkeys = lambda d: d.iterkeys()  # noqa E731
     itervalues = lambda d: d.itervalues()  # noqa E731
     iteritems = lambda d: d.iteritems()  # noqa E731
+
+    reload_module = reload  # noqa F821
 else:
     text_type = str
+    string_types = (str,)
 
     iterkeys = lambda d: iter(d.keys())  # noqa E731
     itervalues = lambda d: iter(d.values())  # noqa E731
     iteritems = lambda d: iter(d.items())  # noqa E731
 
+    reload_module = importlib.reload
+
+#: Python2 does not have monotonic clock.
+monotonic = getattr(time, 'monotonic', time.time)
+
+#: Python2 does not have coroutine function.
+iscoroutinefunction = getattr(inspect, 'iscoroutinefunction',
+                              lambda f: False)
+
 
 def to_unicode(
     x, charset=sys.getdefaultencoding(),
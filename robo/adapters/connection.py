@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.adapters.connection
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Connection supervisor of XMPP client.
+
+    Supervisor connects client, joins rooms concurrently when session is
+    started, and reconnects with jittered exponential backoff when
+    connection is lost. Rooms which failed to join are joined again in
+    background with the same backoff until connection is lost. Time to session start, to join rooms and to first
+    message are logged for each connection.
+
+    Client should have these methods, like `sleekxmpp.ClientXMPP`.
+
+    - `connect(reattempt=False)` returns True if connected
+    - `process(block=True)` returns when disconnected
+    - `disconnect()`
+    - `send_presence()`
+    - `get_roster()`
+    - `join(room)` returns True when room is joined, False if not confirmed
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from robo._compat import monotonic
+
+
+def backoff(attempt, base=1.0, cap=60.0, jitter=0.5, random=random.random):
+    """Seconds to wait before next attempt.
+
+    Delay is doubled on each attempt up to `cap`, and `jitter` ratio of it
+    is randomized, so clients do not reconnect at once.
+
+    :param attempt: Number of failed attempts
+    :param base: Seconds of first delay
+    :param cap: Max seconds of delay
+    :param jitter: Ratio of randomized delay, 0.0 - 1.0
+    :param random: Callable returns 0.0 - 1.0
+    """
+    delay = min(cap, base * (2 ** attempt))
+
+    return delay * (1.0 - jitter) + delay * jitter * random()
+
+
+class ConnectionSupervisor(object):
+    def __init__(self, client, rooms, fetch_roster=False, join_workers=8,
+                 base=1.0, cap=60.0, jitter=0.5, clock=monotonic,
+                 sleep=None, logger=None):
+        """Construct a connection supervisor.
+
+        :param client: XMPP client
+        :param rooms: Rooms to join
+        :param fetch_roster: Fetch roster on session start
+        :param join_workers: Number of threads to join rooms
+        :param base: Seconds of first reconnect delay
+        :param cap: Max seconds of reconnect delay
+        :param jitter: Ratio of randomized reconnect delay
+        :param clock: Callable returns current seconds
+        :param sleep: Callable sleeps given seconds, default is interrupted
+                      by `stop()`
+        :param logger: :class:`logging` Logger
+        """
+        self.client = client
+        self.rooms = [r.strip() for r in rooms if r.strip()]
+        self.fetch_roster = fetch_roster
+        self.join_workers = join_workers
+        self.base = base
+        self.cap = cap
+        self.jitter = jitter
+        self.clock = clock
+        self.logger = logger or logging.getLogger('robo')
+        #: Rooms joined in current session.
+        self.joined = set()
+        #: Number of connections, retrying joins stop when it is changed.
+        self.session = 0
+        #: Thread which joins failed rooms again, see `retry_joins()`.
+        self.retry_thread = None
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.sleep = sleep or self.stopping.wait
+        #: Number of failed attempts since last session start.
+        self.attempts = 0
+        self.connected_at = None
+        self.first_message = False
+        #: Metrics of current connection, in seconds since connected.
+        self.metrics = {}
+        self.stats = {
+            'connects': 0,
+            'failures': 0,
+            'joins': 0,
+            'join_failures': 0,
+            'join_retries': 0,
+        }
+
+    def delay(self):
+        """Seconds to wait before next connect. """
+        return backoff(self.attempts, self.base, self.cap, self.jitter)
+
+    def record(self, name):
+        """Record and log seconds since connected.
+
+        :param name: Metric name
+        """
+        elapsed = self.clock() - self.connected_at
+        self.metrics[name] = elapsed
+        self.logger.info('{0} is {1:.3f} seconds.'.format(name, elapsed))
+
+    def session_start(self, event=None):
+        """Send presence and join rooms which are not joined.
+
+        Return list of rooms which failed to join.
+
+        :param event: Session start event
+        """
+        self.attempts = 0
+        self.record('time_to_session')
+        self.client.send_presence()
+        if self.fetch_roster:
+            try:
+                self.client.get_roster()
+            except Exception as e:
+                self.logger.error('Failed to get roster: {0}'.format(e))
+
+        failed = self.join_rooms()
+        self.record('time_to_join')
+        if failed:
+            self.retry_thread = threading.Thread(target=self.retry_joins,
+                                                 args=(self.session,),
+                                                 name='robo-join')
+            self.retry_thread.daemon = True
+            self.retry_thread.start()
+
+        return failed
+
+    def join(self, room):
+        """Join room, return True if joined.
+
+        Join which is not confirmed by client is failure.
+
+        :param room: Room
+        """
+        try:
+            joined = self.client.join(room)
+        except Exception as e:
+            joined = False
+            message = 'Failed to join `{0}`: {1}'
+            self.logger.error(message.format(room, e))
+        else:
+            if not joined:
+                message = 'Join to `{0}` was not confirmed.'
+                self.logger.error(message.format(room))
+        if not joined:
+            with self.lock:
+                self.stats['join_failures'] += 1
+            return False
+        with self.lock:
+            self.joined.add(room)
+            self.stats['joins'] += 1
+
+        return True
+
+    def join_rooms(self):
+        """Join rooms which are not joined concurrently.
+
+        Return list of rooms which failed to join.
+        """
+        with self.lock:
+            rooms = [r for r in self.rooms if r not in self.joined]
+        if not rooms:
+            return []
+
+        workers = max(1, min(self.join_workers, len(rooms)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(self.join, rooms))
+        failed = [r for r, joined in zip(rooms, results) if not joined]
+        message = 'Joined {0} of {1} rooms.'
+        self.logger.info(message.format(len(rooms) - len(failed), len(rooms)))
+
+        return failed
+
+    def retry_joins(self, session):
+        """Join failed rooms again with jittered backoff.
+
+        Retrying stops when all rooms are joined, connection of `session`
+        is lost or supervisor is stopped.
+
+        :param session: Number of connection which rooms failed to join
+        """
+        attempt = 0
+        while True:
+            delay = backoff(attempt, self.base, self.cap, self.jitter)
+            message = 'Retry to join rooms in {0:.1f} seconds.'
+            self.logger.info(message.format(delay))
+            self.sleep(delay)
+            if self.stopping.is_set() or session != self.session:
+                return
+            self.stats['join_retries'] += 1
+            if not self.join_rooms():
+                return
+            attempt += 1
+
+    def on_message(self, message=None):
+        """Record time to first message of connection.
+
+        :param message: Received message
+        """
+        if self.first_message:
+            return
+        self.first_message = True
+        self.record('time_to_first_message')
+
+    def connect(self):
+        """Connect client, return True if connected. """
+        self.connected_at = self.clock()
+        self.first_message = False
+        self.metrics = {}
+        with self.lock:
+            #: Joined rooms are left when connection is lost.
+            self.joined.clear()
+            self.session += 1
+        try:
+            connected = self.client.connect(reattempt=False)
+        except Exception as e:
+            self.logger.error('Failed to connect: {0}'.format(e))
+            connected = False
+        if connected:
+            self.stats['connects'] += 1
+        else:
+            self.stats['failures'] += 1
+            self.attempts += 1
+
+        return connected
+
+    def run(self):
+        """Connect and process until stopped, reconnect when disconnected. """
+        while not self.stopping.is_set():
+            if self.connect():
+                self.logger.info('Start xmpp client.')
+                self.client.process(block=True)
+                self.logger.info('Disconnected.')
+                if self.stopping.is_set():
+                    break
+                #: Connected but session was not started, like auth error.
+                if 'time_to_session' not in self.metrics:
+                    self.attempts += 1
+            delay = self.delay()
+            message = 'Reconnect in {0:.1f} seconds, {1} attempts failed.'
+            self.logger.info(message.format(delay, self.attempts))
+            self.sleep(delay)
+
+    def stop(self):
+        """Stop reconnecting and disconnect client. """
+        self.stopping.set()
+        self.client.disconnect()
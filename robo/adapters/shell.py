@@ -5,13 +5,29 @@
 
     Shell.
 
+    If stdin is not a terminal, shell reads newline delimited messages from
+    stdin as a stream and writes replies to buffered stdout.
+
+    $ cat messages.txt | python examples/main.py -a shell
+
+    A line which starts with `{` is a JSON message which has `body` and
+    optional `room` and `user`, its replies are written as JSON lines too.
+
+    {"body": "robo ping", "room": "@general", "user": "alice"}
+
+    `ROBO_SHELL_MODE` forces `interactive` or `pipe` mode, and
+    `ROBO_SHELL_INPUT` reads messages from the file instead of stdin.
+
 
     :copyright: (c) 2016 Shinya Ohyanagi, All rights reserved.
     :license: BSD, see LICENSE for more details.
 """
+import os
 import sys
 import code
+import json
 import logging
+import threading
 
 
 class Console(code.InteractiveConsole):
@@ -23,11 +39,50 @@ class Console(code.InteractiveConsole):
         self.signal.send(line, source='shell')
 
 
+def parse_line(line):
+    """Parse a line of pipe mode into message and kwargs.
+
+    Return None if line is empty.
+
+    :param line: Line
+    """
+    line = line.rstrip('\r\n')
+    if not line.strip():
+        return None
+
+    if not line.startswith('{'):
+        return line, {}
+
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return line, {}
+    if not isinstance(data, dict) or 'body' not in data:
+        return line, {}
+
+    kwargs = {'original': data}
+    for key in ('room', 'user'):
+        if data.get(key) is not None:
+            kwargs[key] = data[key]
+
+    return data['body'], kwargs
+
+
 class Shell(object):
     def __init__(self, signal):
+        self.signal = signal
         self.console = Console()
         self.console.signal = signal
 
+        mode = os.environ.get('ROBO_SHELL_MODE')
+        if mode is None:
+            mode = 'interactive' if sys.stdin.isatty() else 'pipe'
+        self.mode = mode
+        self.input_path = os.environ.get('ROBO_SHELL_INPUT')
+        self.output = sys.stdout
+        #: Replies may be sent from executor threads.
+        self.output_lock = threading.Lock()
+
         handler = logging.StreamHandler()
         handler.setFormatter(logging.Formatter(fmt='%(message)s'))
         logger = logging.getLogger('robo.adapters.shell')
@@ -36,8 +91,50 @@ class Shell(object):
         self.logger = logger
 
     def say(self, message, **kwargs):
-        self.logger.info(message)
+        if self.mode != 'pipe':
+            self.logger.info(message)
+            return
+
+        original = kwargs.get('original')
+        if isinstance(original, dict):
+            reply = {'body': message}
+            for key in ('room', 'user'):
+                if key in kwargs:
+                    reply[key] = kwargs[key]
+            message = json.dumps(reply, sort_keys=True)
+
+        #: Not flushed per line, output is flushed when buffer is full.
+        with self.output_lock:
+            self.output.write(message + '\n')
+
+    def pipe(self, stream):
+        """Send each line of stream to robot.
+
+        Return number of sent messages.
+
+        :param stream: File like object
+        """
+        send = self.signal.send
+        count = 0
+        for line in stream:
+            parsed = parse_line(line)
+            if parsed is None:
+                continue
+            message, kwargs = parsed
+            send(message, source='shell', **kwargs)
+            count += 1
+
+        with self.output_lock:
+            self.output.flush()
+
+        return count
 
     def run(self):
+        if self.mode == 'pipe':
+            if self.input_path is None:
+                return self.pipe(sys.stdin)
+            with open(self.input_path) as f:
+                return self.pipe(f)
+
         sys.ps1 = '> '
         self.console.interact('^D to exit.')
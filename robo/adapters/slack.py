@@ -12,7 +12,10 @@
 import os
 import logging
 from sleekxmpp import ClientXMPP
-from sleekxmpp.exceptions import IqTimeout
+from sleekxmpp.xmlstream import ET
+from sleekxmpp.xmlstream.handler import Waiter
+from sleekxmpp.xmlstream.matcher import MatchXMLMask
+from robo.adapters.connection import ConnectionSupervisor
 
 logger = logging.getLogger('robo')
 
@@ -29,6 +32,12 @@ class SlackXmpp(ClientXMPP):
         ClientXMPP.__init__(self, jid, password)
         self.signal = None
         self.rooms = rooms
+        #: :class:`robo.shard.Shard`, join only rooms owned by the shard.
+        self.shard = None
+        #: :class:`robo.adapters.connection.ConnectionSupervisor`.
+        self.supervisor = None
+        #: Supervisor reconnects with backoff.
+        self.auto_reconnect = False
         self.nick = username
         self.add_event_handler('session_start', self.session_start)
         self.add_event_handler('groupchat_message', self.muc_message)
@@ -36,31 +45,67 @@ class SlackXmpp(ClientXMPP):
     def session_start(self, event):
         """Start session.
 
+        Presence is sent and rooms are joined by supervisor, rooms which
+        failed to join are joined again by supervisor in background.
+
         :param event:
         """
-        self.send_presence()
-        logger.info('Finish to send presence')
-        try:
-            self.get_roster()
-        except IqTimeout as e:
-            logger.error(e)
-        logger.info('Finish to get_roster()')
-        rooms = self.rooms
-        for room in rooms:
-            self.plugin['xep_0045'].joinMUC(room.lstrip().rstrip(), self.nick,
-                                            wait=False)
+        self.supervisor.session_start(event)
         logger.debug('Start session.')
 
+    def join(self, room):
+        """Join room and wait for robot's presence from the room.
+
+        Return False if presence was not received in time or it was error.
+        Presence is waited by own waiter, because `joinMUC(wait=True)`
+        drops it.
+
+        :param room: Room
+        """
+        mask = ET.Element('{{{0}}}presence'.format(self.default_ns),
+                          {'from': '{0}/{1}'.format(room, self.nick)})
+        waiter = Waiter('JoinWait_{0}'.format(self.new_id()),
+                        MatchXMLMask(mask))
+        self.register_handler(waiter)
+        self.plugin['xep_0045'].joinMUC(room, self.nick)
+        presence = waiter.wait()
+
+        return presence is not False and presence['type'] != 'error'
+
+    def joining_rooms(self):
+        """List rooms to join. """
+        if self.shard is None:
+            return self.rooms
+
+        rooms = self.shard.filter(self.rooms)
+        logger.info('{0} joins {1} of {2} rooms.'.format(
+            self.shard, len(rooms), len(self.rooms)))
+
+        return rooms
+
     def muc_message(self, message):
         """Receive multi user chat message.
 
         :param msg:
         """
+        self.supervisor.on_message(message)
         if message['mucnick'] != self.nick and self.nick in message['body']:
-            self.signal.send(message['body'], original=message, source='slack')
+            kwargs = {}
+            #: Used to drop history which is delivered again on reconnect.
+            if message['id']:
+                kwargs['message_id'] = message['id']
+            stamp = message['delay']['stamp']
+            if stamp is not None:
+                kwargs['timestamp'] = stamp.isoformat()
+            self.signal.send(message['body'], original=message, source='slack',
+                             room=message['from'].bare,
+                             user=message['mucnick'], **kwargs)
 
 
 class Slack(object):
+    #: Injected by :meth:`robo.robot.Robot.setup_shard`.
+    shard = None
+
     def __init__(self, signal):
         """Construct a Slack adapter.
 
@@ -86,6 +131,8 @@ class Slack(object):
         self.xmpp.register_plugin('xep_0045')
         #: Add XMPP ping.
         self.xmpp.register_plugin('xep_0199')
+        #: Add delayed delivery, stamp of room history.
+        self.xmpp.register_plugin('xep_0203')
         self.xmpp.signal = signal
         logger.info('Finish to prepare connecting.')
 
@@ -100,9 +147,13 @@ class Slack(object):
                                mbody=message, mtype='groupchat')
 
     def run(self):
-        """ Run xmpp client. """
-        if self.xmpp.connect():
-            logging.info('Start xmpp client.')
-            self.xmpp.process(block=True)
-        else:
-            logger.error('Cannot start xmpp client.')
+        """ Run xmpp client.
+
+        `ROBO_SLACK_ROSTER=1` fetches roster on session start.
+        """
+        self.xmpp.shard = self.shard
+        fetch_roster = os.environ.get('ROBO_SLACK_ROSTER', '0') == '1'
+        self.xmpp.supervisor = ConnectionSupervisor(
+            self.xmpp, self.xmpp.joining_rooms(), fetch_roster=fetch_roster,
+            logger=logger)
+        self.xmpp.supervisor.run()
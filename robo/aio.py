@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.aio
+    ~~~~~~~~
+
+    asyncio dispatch mode.
+
+    `AsyncRobot` schedules matched handlers concurrently on an event loop.
+    Coroutine handlers are awaited on the loop and synchronous handlers
+    are run in the loop's default executor, so slow handler does not stall
+    other handlers.
+
+    >>> class Lookup(object):
+    >>>     @cmd(regex=r'^lookup (.+)')
+    >>>     async def lookup(self, message, **kwargs):
+    >>>         return await fetch(message.match.group(1))
+
+    `@cmd(max_concurrency=..., timeout=...)` limit handlers same as
+    :class:`robo.executor.HandlerExecutor`, and handlers decorated with
+    `@cmd(executor='process')` are run in robot's process pool.
+
+    This module requires Python3.5+.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import asyncio
+import threading
+from functools import partial
+from robo.robot import Robot
+from robo.message import Envelope
+
+
+class AsyncRobot(Robot):
+    def __init__(self, name='robo', logger=None, bus=None, **kwargs):
+        """Construct a asyncio robot.
+
+        :param name: Robot name
+        :param logger: :class:`logging` Logger
+        :param bus: `blinker`, `direct` or bus instance, see :mod:`robo.bus`
+        """
+        super(AsyncRobot, self).__init__(name, logger, bus, **kwargs)
+        self.loop = None
+        self.loop_thread = None
+        #: Handler name to semaphore of `@cmd(max_concurrency=...)`.
+        self.semaphores = {}
+
+    def start(self, loop=None):
+        """Start event loop in background thread.
+
+        Adapters run in their own thread, so messages are scheduled to
+        this loop thread safely.
+
+        :param loop: Event loop, new event loop is created if None
+        """
+        if self.loop is not None:
+            return self.loop
+
+        self.loop = loop or asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever,
+                                            name='robo-aio')
+        self.loop_thread.daemon = True
+        self.loop_thread.start()
+        self.logger.debug('Event loop started.')
+
+        return self.loop
+
+    def handler_subscriber(self, sender, **kwargs):
+        """Subscriber.
+
+        Schedule matched handlers to event loop.
+        Return :class:`concurrent.futures.Future` which is resolved when all
+        matched handlers are finished, or None if no handler matched.
+
+        :param sender: Received message
+        :param **kwargs: Data to be sent to receivers
+        """
+        record_id = self.record(sender, kwargs)
+        if not self.accepts(sender, kwargs):
+            return None
+
+        parsed = self.parse_message(sender)
+        if parsed is None or not self.admits(kwargs):
+            return None
+
+        message, body = parsed
+        handlers = self.match_handlers(body, **kwargs)
+        if not handlers:
+            return None
+
+        self.start()
+        #: Incoming message is shared by all matched handlers.
+        envelope = Envelope(message, kwargs, record_id)
+        coro = self.dispatch(envelope, handlers, **kwargs)
+
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def dispatch(self, sender, handlers, **kwargs):
+        """Run matched handlers concurrently.
+
+        Replies are notified to adapters in completion order.
+
+        :param sender: Incoming message
+        :param handlers: List of tuple of handler and match object
+        :param **kwargs: Data to be sent to receivers
+        """
+        tasks = [self.call_handler_async(sender, handler, matched, **kwargs)
+                 for handler, matched in handlers]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for (handler, _), result in zip(handlers, results):
+            if isinstance(result, Exception):
+                message = 'Handler `{0}` raised `{1!r}`.'
+                self.logger.error(message.format(handler.send_to, result))
+
+        return results
+
+    async def call_handler_async(self, sender, handler, matched, **kwargs):
+        """Call handler method and notify result to adapter.
+
+        :param sender: Incoming message
+        :param handler: Handler
+        :param matched: :class: `re.match` Matched object
+        :param **kwargs: Data to be sent to receivers
+        """
+        if handler.func is None:
+            func = handler.plugin.load
+            if await self.loop.run_in_executor(None, func) is None:
+                return None
+
+        broadcast = handler.kwargs.get('broadcast', False)
+        record_id = getattr(sender, 'record_id', None)
+        cache = handler.cache
+        if cache is not None:
+            key = self.cache_key(handler, matched, kwargs)
+            result = cache.get(key)
+            if result is not None:
+                #: Cached reply skips handler call.
+                await self.notify_to_adapter_async(result, broadcast,
+                                                   record_id, **kwargs)
+                return result
+
+        message = self.create_message(sender, handler, matched, kwargs)
+        max_concurrency = handler.kwargs.get('max_concurrency')
+        if max_concurrency is None:
+            result = await self.run_handler(handler, message, kwargs)
+        else:
+            semaphore = self.semaphores.get(handler.send_to)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(max_concurrency)
+                self.semaphores[handler.send_to] = semaphore
+            async with semaphore:
+                result = await self.run_handler(handler, message, kwargs)
+
+        if cache is not None and result is not None:
+            cache.set(key, result)
+        await self.notify_to_adapter_async(result, broadcast, record_id,
+                                           **kwargs)
+
+        return result
+
+    async def run_handler(self, handler, message, kwargs):
+        """Run handler method and return it's result.
+
+        Coroutine handler is awaited, handler decorated with
+        `@cmd(executor='process')` is run in process pool and others are run
+        in loop's default executor. Result of handler which exceeded
+        `timeout` is dropped same as :class:`robo.executor.HandlerExecutor`.
+
+        :param handler: Handler
+        :param message: :class:`robo.message.Message`
+        :param kwargs: Data to be sent to receivers
+        """
+        options = handler.kwargs
+        if handler.coroutine:
+            future = handler.func(message, **kwargs)
+        elif options.get('executor') == 'process':
+            if self.process_executor is None:
+                self.process_executor = self.create_process_executor()
+            future = asyncio.wrap_future(self.process_executor.run(
+                handler.instance, handler.method, message, kwargs))
+        else:
+            func = partial(handler.func, message, **kwargs)
+            future = self.loop.run_in_executor(None, func)
+
+        timeout = options.get('timeout')
+        if timeout is None:
+            return await future
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            message_format = 'Handler `{0}` exceeded timeout {1}s, abandoned.'
+            self.logger.warning(message_format.format(handler.send_to,
+                                                      timeout))
+            return None
+
+    async def notify_to_adapter_async(self, sender, broadcast=False,
+                                      record_id=None, **kwargs):
+        """Notify message to adapter.
+
+        Adapter's `say` is awaited if it is a coroutine function, otherwise
+        it is run in executor.
+
+        :param sender: Message
+        :param broadcast: Notify to all adapters
+        :param record_id: Record id of incoming message
+        :param **kwargs: Data to be sent to receivers
+        """
+        if sender is None:
+            return
+        self.stats['replied'] += 1
+        if self.recorder is not None:
+            self.recorder.record_reply(sender, kwargs, record_id)
+        adapters = self.adapters
+        message_format = 'Notify `{0}` to `{1}.`'
+        for name in self.route(broadcast, **kwargs):
+            self.logger.debug(message_format.format(sender.encode('utf-8'),
+                              name))
+            if name in self.outbound:
+                self.outbound[name].put(sender, **kwargs)
+                continue
+            say = adapters[name].say
+            if asyncio.iscoroutinefunction(say):
+                await say(sender, **kwargs)
+            else:
+                func = partial(say, sender, **kwargs)
+                await self.loop.run_in_executor(None, func)
+
+    def run(self, adapter_name):
+        """Run robot.
+
+        If adapter's `run` is a coroutine function, run it on event loop.
+        Otherwise run adapter in this thread and event loop in background.
+
+        :param adapter_name: Adapter name
+        """
+        self.logger.debug('Robo booting...')
+        adapter = self.adapters[adapter_name]
+        if asyncio.iscoroutinefunction(adapter.run):
+            self.loop = asyncio.new_event_loop()
+            self.loop.run_until_complete(adapter.run())
+        else:
+            self.start()
+            adapter.run()
+
+    def shutdown(self):
+        """Shutdown.
+
+        Stop event loop and call handler's shutdown method.
+        """
+        #: Queued messages need event loop.
+        self.stop_inbound_queue()
+        loop = self.loop
+        if loop is not None and self.loop_thread is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            self.loop_thread.join()
+            loop.close()
+            self.loop = None
+            self.loop_thread = None
+            self.logger.debug('Event loop stopped.')
+
+        super(AsyncRobot, self).shutdown()
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.brain
+    ~~~~~~~~~~
+
+    Persistent key value store shared by handlers.
+
+    Values are serialized to JSON and stored to SQLite. Read values are
+    cached in memory, and writes are buffered and flushed in batch by
+    background thread, so handlers do not write to disk on every message.
+
+    Handler which has `brain` attribute gets namespace named by its plugin.
+
+    >>> class Karma(object):
+    ...     def __init__(self):
+    ...         self.brain = None
+    ...
+    ...     @cmd(regex=r'^(?P<name>\\w+)\\+\\+$')
+    ...     def plus(self, message, **kwargs):
+    ...         name = message.match.group('name')
+    ...         count = self.brain.get(name, 0) + 1
+    ...         self.brain.set(name, count)
+    ...         return '{0}: {1}'.format(name, count)
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import json
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from robo.cache import LRUCache
+from robo._compat import string_types
+
+#: Pending value which means key is deleted.
+DELETED = object()
+
+#: Cached value which means key is not stored.
+MISSING = object()
+
+
+class Namespace(object):
+    __slots__ = ('brain', 'name')
+
+    def __init__(self, brain, name):
+        """Construct a view of brain bound to namespace.
+
+        :param brain: :class:`Brain`
+        :param name: Namespace
+        """
+        self.brain = brain
+        self.name = name
+
+    def get(self, key, default=None):
+        return self.brain.get(self.name, key, default)
+
+    def set(self, key, value):
+        self.brain.set(self.name, key, value)
+
+    def delete(self, key):
+        self.brain.delete(self.name, key)
+
+    def keys(self):
+        return self.brain.keys(self.name)
+
+    def __repr__(self):
+        return '<Namespace {0}>'.format(self.name)
+
+
+class Brain(object):
+    def __init__(self, path=':memory:', flush_interval=1.0, batch_size=500,
+                 cache_size=1024, logger=None):
+        """Construct a brain.
+
+        :param path: SQLite database path
+        :param flush_interval: Seconds to buffer writes
+        :param batch_size: Number of buffered writes which triggers flush
+        :param cache_size: Max number of cached values
+        :param logger: :class:`logging` Logger
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.logger = logger or logging.getLogger('robo')
+        self.cache = LRUCache(cache_size)
+        #: (namespace, key) to tuple of value and JSON or `DELETED`, in
+        #: written order.
+        self.pending = OrderedDict()
+        self.pending_lock = threading.Lock()
+        #: Connection is shared by handler threads and flusher.
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection_lock = threading.Lock()
+        with self.connection_lock:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS brain ('
+                'namespace TEXT NOT NULL, key TEXT NOT NULL, '
+                'value TEXT NOT NULL, PRIMARY KEY (namespace, key))')
+            self.connection.commit()
+        self.stats = {
+            'reads': 0,
+            'writes': 0,
+            'flushes': 0,
+            'flushed': 0,
+        }
+        self.stopping = threading.Event()
+        self.wakeup = threading.Event()
+        self.flusher = threading.Thread(target=self.run, name='robo-brain')
+        self.flusher.daemon = True
+        self.flusher.start()
+
+    def namespace(self, name):
+        """Get view of namespace.
+
+        :param name: Namespace
+        """
+        return Namespace(self, name)
+
+    def get(self, namespace, key, default=None):
+        """Get value.
+
+        :param namespace: Namespace
+        :param key: Key
+        :param default: Return value if key is not stored
+        """
+        item = (namespace, key)
+        with self.pending_lock:
+            value = self.pending.get(item, MISSING)
+        if value is DELETED:
+            return default
+        if value is not MISSING:
+            return value[0]
+
+        value = self.cache.get(item, MISSING)
+        if value is MISSING:
+            self.stats['reads'] += 1
+            #: Cached under lock, so flush does not run between read and set.
+            with self.connection_lock:
+                row = self.connection.execute(
+                    'SELECT value FROM brain WHERE namespace = ? AND key = ?',
+                    item).fetchone()
+                value = MISSING if row is None else json.loads(row[0])
+                self.cache.set(item, value)
+
+        return default if value is MISSING else value
+
+    def set(self, namespace, key, value):
+        """Set value, it is written to database by next flush.
+
+        Key and value are checked here, so key which is not text or value
+        which is not JSON serializable raises TypeError to caller.
+
+        :param namespace: Namespace
+        :param key: Key
+        :param value: JSON serializable value
+        """
+        self.write((namespace, key), (value, json.dumps(value)))
+
+    def delete(self, namespace, key):
+        """Delete value.
+
+        :param namespace: Namespace
+        :param key: Key
+        """
+        self.write((namespace, key), DELETED)
+
+    def write(self, item, value):
+        for name in item:
+            if not isinstance(name, string_types):
+                message = 'Namespace and key should be text, not {0!r}.'
+                raise TypeError(message.format(name))
+        with self.pending_lock:
+            self.pending.pop(item, None)
+            self.pending[item] = value
+            self.stats['writes'] += 1
+            full = len(self.pending) >= self.batch_size
+        if full:
+            self.wakeup.set()
+
+    def keys(self, namespace):
+        """List stored keys of namespace.
+
+        :param namespace: Namespace
+        """
+        self.flush()
+        with self.connection_lock:
+            rows = self.connection.execute(
+                'SELECT key FROM brain WHERE namespace = ? ORDER BY key',
+                (namespace,)).fetchall()
+
+        return [r[0] for r in rows]
+
+    def flush(self):
+        """Write buffered values in one transaction.
+
+        Values are kept in pending writes until transaction is committed,
+        so they are read and written again by next flush if it failed.
+        Return number of written values.
+        """
+        with self.connection_lock:
+            with self.pending_lock:
+                batch = list(self.pending.items())
+            if not batch:
+                return 0
+
+            upserts = []
+            deletes = []
+            for item, value in batch:
+                if value is DELETED:
+                    deletes.append(item)
+                else:
+                    upserts.append(item + (value[1],))
+            with self.connection:
+                self.connection.executemany(
+                    'DELETE FROM brain WHERE namespace = ? AND key = ?',
+                    deletes)
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO brain (namespace, key, value) '
+                    'VALUES (?, ?, ?)', upserts)
+
+            with self.pending_lock:
+                for item, value in batch:
+                    #: Values written while flushing are kept for next flush.
+                    if self.pending.get(item) is not value:
+                        continue
+                    del self.pending[item]
+                    self.cache.set(item, MISSING if value is DELETED
+                                   else value[0])
+            self.stats['flushes'] += 1
+            self.stats['flushed'] += len(batch)
+
+        return len(batch)
+
+    def run(self):
+        """Flush buffered values periodically until stopped. """
+        while not self.stopping.is_set():
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.logger.exception('Failed to flush brain.')
+
+    def close(self):
+        """Stop flusher and write buffered values. """
+        self.stopping.set()
+        self.wakeup.set()
+        self.flusher.join()
+        self.flush()
+        with self.connection_lock:
+            self.connection.close()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.bus
+    ~~~~~~~~
+
+    Event bus between adapters and robot.
+
+    Default bus is blinker's named signal `robo.handler`, it is shared by
+    all robots in the process and holds receivers weakly.
+
+    `DirectBus` is a bus per robot which holds receivers strongly and calls
+    them directly, so sending a message does not resolve weak references.
+
+    >>> robot = Robot('robo', bus='direct')
+
+    Bus should have `connect(receiver, weak=True)`, `disconnect(receiver)`
+    and `send(sender, **kwargs)` which returns list of tuple of receiver and
+    its result like blinker.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import threading
+from blinker import signal
+
+#: Name of blinker signal.
+SIGNAL_NAME = 'robo.handler'
+
+
+class DirectBus(object):
+    def __init__(self):
+        """Construct a direct call bus. """
+        #: Tuple is replaced on connect and disconnect, so `send()` iterates
+        #: receivers without lock.
+        self.receivers = ()
+        self.lock = threading.Lock()
+
+    def connect(self, receiver, weak=True):
+        """Connect receiver.
+
+        Receiver is always held strongly, `weak` is accepted for
+        compatibility with blinker.
+
+        :param receiver: Callable called with sender and kwargs
+        :param weak: Ignored
+        """
+        with self.lock:
+            if receiver not in self.receivers:
+                self.receivers = self.receivers + (receiver,)
+
+        return receiver
+
+    def disconnect(self, receiver):
+        """Disconnect receiver.
+
+        :param receiver: Connected receiver
+        """
+        with self.lock:
+            self.receivers = tuple(r for r in self.receivers
+                                   if r != receiver)
+
+    def send(self, sender=None, **kwargs):
+        """Call all receivers.
+
+        Return list of tuple of receiver and its result.
+
+        :param sender: Message
+        :param **kwargs: Data to be sent to receivers
+        """
+        return [(receiver, receiver(sender, **kwargs))
+                for receiver in self.receivers]
+
+
+def create_bus(bus=None):
+    """Create bus by name.
+
+    :param bus: `blinker`, `direct`, bus instance or None for blinker
+    """
+    if bus is None or bus == 'blinker':
+        return signal(SIGNAL_NAME)
+    if bus == 'direct':
+        return DirectBus()
+    if isinstance(bus, str):
+        raise ValueError('Unknown bus `{0}`.'.format(bus))
+
+    return bus
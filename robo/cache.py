@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.cache
+    ~~~~~~~~~~
+
+    Caches.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import json
+import tempfile
+import threading
+from collections import OrderedDict
+from robo._compat import monotonic
+
+
+class LRUCache(object):
+    def __init__(self, maxsize=128):
+        """Construct a bounded LRU cache.
+
+        :param maxsize: Max number of items
+        """
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Get cached value and mark it as recently used.
+
+        :param key: Cache key
+        :param default: Return value if key is not cached
+        """
+        with self.lock:
+            try:
+                value = self.items.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.items[key] = value
+            self.hits += 1
+
+            return value
+
+    def set(self, key, value):
+        """Cache value, least recently used item is evicted if cache is full.
+
+        :param key: Cache key
+        :param value: Value
+        """
+        with self.lock:
+            self.items.pop(key, None)
+            self.items[key] = value
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        """Delete cached value.
+
+        :param key: Cache key
+        """
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        """Clear all items. """
+        with self.lock:
+            self.items.clear()
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, key):
+        return key in self.items
+
+
+class TTLCache(LRUCache):
+    def __init__(self, maxsize=128, ttl=None, clock=monotonic):
+        """Construct a bounded LRU cache whose items expire.
+
+        :param maxsize: Max number of items
+        :param ttl: Seconds to keep items, never expired if None
+        :param clock: Function returns current seconds
+        """
+        super(TTLCache, self).__init__(maxsize)
+        self.ttl = ttl
+        self.clock = clock
+
+    def get(self, key, default=None):
+        """Get cached value if it is not expired.
+
+        :param key: Cache key
+        :param default: Return value if key is not cached or expired
+        """
+        with self.lock:
+            try:
+                expires, value = self.items.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires is not None and expires <= self.clock():
+                self.misses += 1
+                return default
+            self.items[key] = (expires, value)
+            self.hits += 1
+
+            return value
+
+    def set(self, key, value):
+        """Cache value until `ttl` seconds passed.
+
+        :param key: Cache key
+        :param value: Value
+        """
+        expires = None
+        if self.ttl is not None:
+            expires = self.clock() + self.ttl
+        super(TTLCache, self).set(key, (expires, value))
+
+
+class HandlerCache(object):
+    def __init__(self):
+        """Result caches of handler instance.
+
+        Injected to handler instance which has `result_cache` attribute.
+
+        >>> class Lookup(object):
+        >>>     result_cache = None
+        >>>
+        >>>     @cmd(regex=r'^lookup (.+)', cache_ttl=60)
+        >>>     def lookup(self, message, **kwargs):
+        >>>         return fetch(message.match.group(1))
+        >>>
+        >>>     @cmd(regex=r'^update (.+)')
+        >>>     def update(self, message, **kwargs):
+        >>>         self.result_cache.invalidate('lookup', message.match.group(1))
+        """
+        #: Handler method name to :class:`TTLCache`.
+        self.caches = {}
+
+    def invalidate(self, method=None, *groups, **kwargs):
+        """Invalidate cached results.
+
+        If only `method` is given, all results of the method are removed.
+        If `groups` are given, result of the groups is removed, `room` is
+        required if the method was decorated with `cache_room=True`.
+
+        :param method: Handler method name, all methods if None
+        :param *groups: Groups of matched object
+        :param **kwargs: `room`
+        """
+        if method is None:
+            caches = list(self.caches.values())
+        else:
+            caches = [self.caches[method]] if method in self.caches else []
+
+        for cache in caches:
+            if not groups:
+                cache.clear()
+                continue
+            key = tuple(groups)
+            if 'room' in kwargs:
+                key = (kwargs['room'],) + key
+            cache.delete(key)
+
+
+class DiscoveryCache(object):
+    #: Bump when format of cache file is changed.
+    version = 1
+
+    def __init__(self, path):
+        """Construct a persistent cache of plugin discovery.
+
+        Module list of search path is keyed by directory's mtime, handler
+        metadata of plugin is keyed by file's mtime and size.
+
+        :param path: Cache file path
+        """
+        self.path = path
+        self.dirs = {}
+        self.files = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        """Load cache file. Broken or old cache file is ignored. """
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+
+        if not isinstance(data, dict) or data.get('version') != self.version:
+            return
+        self.dirs = data.get('dirs', {})
+        self.files = data.get('files', {})
+
+    def save(self):
+        """Write cache file atomically if cache was updated. """
+        if not self.dirty:
+            return
+
+        data = {'version': self.version, 'dirs': self.dirs,
+                'files': self.files}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.robo-cache-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, sort_keys=True)
+            if os.path.exists(self.path) and os.name == 'nt':
+                os.remove(self.path)
+            os.rename(tmp, self.path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.dirty = False
+
+    def get_modules(self, directory, mtime):
+        """Get cached module list of directory.
+
+        Return list of tuple of module name and is package flag, or None if
+        directory was changed.
+
+        :param directory: Search path
+        :param mtime: Current mtime of directory
+        """
+        entry = self.dirs.get(directory)
+        if entry is None or entry['mtime'] != mtime:
+            return None
+
+        return [tuple(m) for m in entry['modules']]
+
+    def set_modules(self, directory, mtime, modules):
+        """Cache module list of directory.
+
+        :param directory: Search path
+        :param mtime: Current mtime of directory
+        :param modules: List of tuple of module name and is package flag
+        """
+        self.dirs[directory] = {'mtime': mtime,
+                                'modules': [list(m) for m in modules]}
+        self.dirty = True
+
+    def get_manifest(self, path, mtime, size):
+        """Get cached handler metadata of plugin.
+
+        Return tuple of hit flag and manifest, manifest is None if plugin
+        can not be analyzed statically.
+
+        :param path: Plugin source path
+        :param mtime: Current mtime of source
+        :param size: Current size of source
+        """
+        entry = self.files.get(path)
+        if entry is None or entry['mtime'] != mtime or entry['size'] != size:
+            return False, None
+
+        return True, entry['manifest']
+
+    def set_manifest(self, path, mtime, size, manifest):
+        """Cache handler metadata of plugin.
+
+        Manifest which can not be serialized to JSON is not cached.
+
+        :param path: Plugin source path
+        :param mtime: Current mtime of source
+        :param size: Current size of source
+        :param manifest: Handler metadata
+        """
+        entry = {'mtime': mtime, 'size': size, 'manifest': manifest}
+        try:
+            json.dumps(entry)
+        except (TypeError, ValueError):
+            self.files.pop(path, None)
+            return
+        self.files[path] = entry
+        self.dirty = True
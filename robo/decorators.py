@@ -9,12 +9,15 @@
     :license: BSD, see LICENSE for more details.
 """
 from functools import wraps
+from robo._compat import iscoroutinefunction
 
 
 def cmd(*args, **kwargs):
     def _cmd(f):
         f.__robo_event = True
         f.__robo_kwargs = kwargs
+        #: Coroutine handler is dispatched by `robo.aio.AsyncRobot`.
+        f.__robo_coroutine = iscoroutinefunction(f)
 
         @wraps(f)
         def __cmd(func, message, **_kwargs):
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.dedup
+    ~~~~~~~~~~
+
+    Duplicate incoming message suppression.
+
+    Chat services may deliver messages which were already handled again,
+    like history of rooms replayed on reconnect. Keys of seen messages are
+    kept for a time window, and message whose key was seen is dropped.
+
+    Key is `message_id` sent from adapter, or hash of source, room, user,
+    body and `timestamp`. Message which has neither id nor timestamp is
+    never dropped, because the same text may be sent again.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from robo._compat import monotonic, to_unicode
+
+
+def message_key(sender, kwargs):
+    """Key of incoming message, return None if it can not be identified.
+
+    :param sender: Received message
+    :param kwargs: Data sent from adapter
+    """
+    source = kwargs.get('source', None)
+    message_id = kwargs.get('message_id', None)
+    if message_id is not None:
+        return (source, message_id)
+
+    timestamp = kwargs.get('timestamp', None)
+    if timestamp is None:
+        return None
+
+    values = [source, kwargs.get('room', None), kwargs.get('user', None),
+              sender, timestamp]
+    text = u'\x00'.join(u'' if v is None else to_unicode(v) for v in values)
+
+    return (source, hashlib.sha1(text.encode('utf-8')).hexdigest())
+
+
+class Deduplicator(object):
+    def __init__(self, window=300.0, maxsize=10000, clock=monotonic):
+        """Construct a deduplicator.
+
+        :param window: Seconds to remember seen messages
+        :param maxsize: Max number of remembered messages
+        :param clock: Callable returns current seconds
+        """
+        self.window = window
+        self.maxsize = maxsize
+        self.clock = clock
+        #: Key to seconds when first seen, oldest first.
+        self.seen = OrderedDict()
+        self.lock = threading.Lock()
+
+    def is_duplicate(self, sender, kwargs):
+        """Remember message and return True if it was already seen.
+
+        :param sender: Received message
+        :param kwargs: Data sent from adapter
+        """
+        key = message_key(sender, kwargs)
+        if key is None:
+            return False
+
+        with self.lock:
+            now = self.clock()
+            seen = self.seen
+            while seen:
+                oldest = next(iter(seen))
+                if len(seen) < self.maxsize and \
+                        now - seen[oldest] < self.window:
+                    break
+                del seen[oldest]
+            if key in seen:
+                return True
+            seen[key] = now
+
+            return False
+
+    def __len__(self):
+        return len(self.seen)
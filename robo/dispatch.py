@@ -0,0 +1,376 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.dispatch
+    ~~~~~~~~~~~~~
+
+    Handler registry and dispatch index.
+
+    Matching every handler's regex against every message is linear in the
+    number of handlers. `HandlerIndex` buckets handlers by the literal
+    prefix of their regex, so only handlers which could possibly match are
+    tested. Patterns without a literal prefix are pre-checked with a
+    combined alternation.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import re
+import string
+
+#: Characters which are always literal in a regex.
+LITERAL_CHARS = frozenset(string.ascii_letters + string.digits +
+                          ' !"#%&\',-/:;<=>@_`~')
+
+#: Characters which are quantifiers, previous literal might be optional.
+OPTIONAL_QUANTIFIERS = frozenset('*?{')
+
+#: Max length of literal prefix. Keeps the number of lookups small.
+MAX_PREFIX_LENGTH = 16
+
+#: `re.IGNORECASE` matches these characters to ascii letters,
+#: but `str.lower()` does not.
+CASEFOLD_TABLE = {0x130: u'i', 0x131: u'i', 0x17f: u's'}
+
+#: Back references and conditionals refer groups by number, they can not be
+#: combined into one alternation.
+BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=|\(\?\(')
+
+
+def literal_prefix(pattern):
+    """Extract literal prefix from regex pattern.
+
+    >>> literal_prefix(r'^ping$')
+    'ping'
+    >>> literal_prefix(r'echo\\s+(.*)')
+    'echo'
+    >>> literal_prefix(r'hello?')
+    'hell'
+    >>> literal_prefix(r'(hi|hello)')
+    ''
+
+    :param pattern: Regex pattern string
+    """
+    if has_toplevel_branch(pattern):
+        return ''
+
+    if pattern.startswith('^'):
+        pattern = pattern[1:]
+    elif pattern.startswith('\\A'):
+        pattern = pattern[2:]
+
+    prefix = []
+    length = len(pattern)
+    i = 0
+    while i < length:
+        char = pattern[i]
+        if char == '\\' and i + 1 < length and \
+                not pattern[i + 1].isalnum() and \
+                ord(pattern[i + 1]) < 128:
+            #: Escaped meta character like `\.`.
+            prefix.append(pattern[i + 1])
+            i += 2
+        elif char in LITERAL_CHARS:
+            prefix.append(char)
+            i += 1
+        else:
+            if char in OPTIONAL_QUANTIFIERS and prefix:
+                prefix.pop()
+            break
+
+    return ''.join(prefix)[:MAX_PREFIX_LENGTH]
+
+
+def has_toplevel_branch(pattern):
+    """Return True if pattern contains `|` outside of groups and classes.
+
+    :param pattern: Regex pattern string
+    """
+    depth = 0
+    in_class = False
+    i = 0
+    length = len(pattern)
+    while i < length:
+        char = pattern[i]
+        if char == '\\':
+            i += 2
+            continue
+        if in_class:
+            if char == ']':
+                in_class = False
+        elif char == '[':
+            in_class = True
+            #: `[]]` and `[^]]` contain `]` as literal.
+            if pattern[i + 1:i + 2] == '^':
+                i += 1
+            if pattern[i + 1:i + 2] == ']':
+                i += 1
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+        i += 1
+
+    return False
+
+
+def casefold(value):
+    """Fold value same as `re.IGNORECASE` does for ascii characters.
+
+    :param value: Text
+    """
+    return value.translate(CASEFOLD_TABLE).lower()
+
+
+class HandlerSpec(object):
+    __slots__ = ('instance', 'method', 'func', 'kwargs', 'regex', 'room',
+                 'missing', 'send_to', 'injects_docs', 'coroutine', 'plugin',
+                 'cache', 'throttle')
+
+    def __init__(self, instance, method, func, kwargs, regex, room=None,
+                 missing=False, module=None, plugin=None, coroutine=False,
+                 cache=None, throttle=None):
+        """Construct a registered handler method.
+
+        Everything needed for dispatching is computed here, so dispatching
+        message only compares attributes and calls `func`.
+
+        Handler which is not imported yet has no `instance` and `func`,
+        `plugin` imports it when first matched.
+
+        :param instance: Handler instance
+        :param method: Handler method name
+        :param func: Bound handler method
+        :param kwargs: Keyword args given to `@cmd()`
+        :param regex: Compiled regex
+        :param room: Compiled room regex
+        :param missing: Called only when no other handler matched
+        :param module: Module name, required if instance is None
+        :param plugin: Plugin which imports handler lazily
+        :param coroutine: Handler method is coroutine function
+        :param cache: Result cache, see `@cmd(cache_ttl=..., cache_size=...)`
+        :param throttle: Throttle of handler, see `@cmd(rate=...)`
+        """
+        self.instance = instance
+        self.method = method
+        self.func = func
+        self.kwargs = kwargs
+        self.regex = regex
+        self.room = room
+        self.missing = missing
+        self.plugin = plugin
+        self.cache = cache
+        self.throttle = throttle
+        if instance is not None:
+            module = instance.__module__
+        self.send_to = '{0}.{1}'.format(module, method)
+        #: `robo.handlers.help` shows registered docs.
+        self.injects_docs = module == 'robo.handlers.help'
+        self.coroutine = getattr(func, '__robo_coroutine', coroutine)
+
+    def bind(self, instance):
+        """Bind handler instance which was imported lazily.
+
+        :param instance: Handler instance
+        """
+        self.func = getattr(instance, self.method)
+        self.coroutine = getattr(self.func, '__robo_coroutine', False)
+        self.instance = instance
+
+    def __getitem__(self, key):
+        """Compatible with handler dict of old versions. """
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self):
+        return '<HandlerSpec {0} {1!r}>'.format(self.send_to,
+                                                self.regex.pattern)
+
+
+class HandlerIndex(object):
+    def __init__(self, handlers):
+        """Construct a dispatch index.
+
+        Missing handlers are not indexed, they are matched only when no
+        other handler matched.
+
+        :param handlers: List of handlers
+        """
+        #: Number of handlers this index was built from.
+        self.size = len(handlers)
+        self.missings = []
+        #: Handlers which are restricted to rooms by `room` pattern.
+        self.restricted = []
+        #: {prefix length: {prefix: [(position, handler)]}}
+        self.folded = {}
+        self.exact = {}
+        #: [(combined regex or None, [(position, handler)])]
+        self.fallbacks = []
+        self.candidate_count = 0
+
+        groups = {}
+        for position, handler in enumerate(handlers):
+            self.add(position, handler, groups)
+
+        for flags, entries in groups.items():
+            self.fallbacks.extend(self.combine(flags, entries))
+
+    def add(self, position, handler, groups):
+        """Add handler to prefix bucket.
+
+        Handler which has no literal prefix is added to `groups` by regex
+        flags, they should be combined by `combine()`.
+
+        :param position: Registered position of handler
+        :param handler: Handler
+        :param groups: Regex flags to list of (position, handler)
+        """
+        regex = handler.regex
+        if regex is None:
+            return
+        if handler.room is not None:
+            self.restricted.append(handler)
+        if handler.missing is True:
+            self.missings.append(handler)
+            return
+
+        self.candidate_count += 1
+        entry = (position, handler)
+        prefix = ''
+        if not regex.flags & re.VERBOSE:
+            prefix = literal_prefix(regex.pattern)
+
+        if prefix:
+            if regex.flags & re.IGNORECASE:
+                buckets = self.folded
+                prefix = casefold(prefix)
+            else:
+                buckets = self.exact
+            bucket = buckets.setdefault(len(prefix), {})
+            bucket.setdefault(prefix, []).append(entry)
+        else:
+            groups.setdefault(regex.flags, []).append(entry)
+
+    def replace(self, handlers, removed, added):
+        """Create new index which `removed` handlers are replaced by `added`.
+
+        Index itself is not changed, so messages being dispatched keep using
+        it. Only combined regexes which contain removed or added handlers
+        are compiled again, other entries are just moved to new position.
+
+        :param handlers: New list of handlers
+        :param removed: Handlers removed from this index
+        :param added: Handlers added to `handlers`
+        """
+        positions = dict((id(h), i) for i, h in enumerate(handlers))
+        index = HandlerIndex([])
+        index.size = len(handlers)
+
+        def remap(entries):
+            return [(positions[id(h)], h) for _, h in entries
+                    if id(h) in positions]
+
+        for buckets, target in ((self.folded, index.folded),
+                                (self.exact, index.exact)):
+            for length, bucket in buckets.items():
+                for prefix, entries in bucket.items():
+                    entries = remap(entries)
+                    if entries:
+                        target.setdefault(length, {})[prefix] = entries
+
+        index.missings = [h for h in self.missings if id(h) in positions]
+        index.restricted = [h for h in self.restricted
+                            if id(h) in positions]
+        index.candidate_count = self.candidate_count - len(
+            [h for h in removed if h.regex is not None and not h.missing])
+
+        groups = {}
+        for handler in added:
+            index.add(positions[id(handler)], handler, groups)
+        index.missings.sort(key=lambda h: positions[id(h)])
+
+        #: Combine again if handlers are added to or removed from group.
+        fallbacks = []
+        changed = set(groups)
+        for combined, entries in self.fallbacks:
+            flags = entries[0][1].regex.flags
+            remapped = remap(entries)
+            if len(remapped) != len(entries):
+                changed.add(flags)
+            fallbacks.append((flags, combined, remapped))
+
+        for flags, combined, entries in fallbacks:
+            if flags in changed:
+                groups.setdefault(flags, []).extend(entries)
+            elif entries:
+                index.fallbacks.append((combined, entries))
+
+        for flags, entries in groups.items():
+            entries.sort(key=lambda e: e[0])
+            index.fallbacks.extend(index.combine(flags, entries))
+
+        return index
+
+    def combine(self, flags, entries):
+        """Combine non-literal patterns into one alternation.
+
+        :param flags: Regex flags
+        :param entries: List of (position, handler)
+        """
+        combinable = []
+        rv = []
+        for entry in entries:
+            pattern = entry[1].regex.pattern
+            if BACKREFERENCE.search(pattern):
+                rv.append((None, [entry]))
+            else:
+                combinable.append(entry)
+
+        if not combinable:
+            return rv
+
+        patterns = '|'.join('(?:{0})'.format(e[1].regex.pattern)
+                            for e in combinable)
+        try:
+            rv.append((re.compile(patterns, flags), combinable))
+        except (re.error, OverflowError, AssertionError):
+            #: Duplicate group names or too many groups.
+            rv.extend((None, [e]) for e in combinable)
+
+        return rv
+
+    def candidates(self, body):
+        """List handlers which might match given body in registered order.
+
+        :param body: Message body
+        """
+        rv = []
+        if self.folded:
+            folded = casefold(body[:MAX_PREFIX_LENGTH])
+            for length, bucket in self.folded.items():
+                entries = bucket.get(folded[:length])
+                if entries:
+                    rv.extend(entries)
+
+        for length, bucket in self.exact.items():
+            entries = bucket.get(body[:length])
+            if entries:
+                rv.extend(entries)
+
+        for combined, entries in self.fallbacks:
+            if combined is None or combined.match(body):
+                rv.extend(entries)
+
+        rv.sort(key=lambda e: e[0])
+
+        return [e[1] for e in rv]
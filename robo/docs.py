@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.docs
+    ~~~~~~~~~
+
+    Help index of registered handlers.
+
+    Help text is rendered once when handlers are registered, and words of
+    patterns and descriptions are indexed, so `help <term>` looks up only
+    lines which contain the term.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import re
+
+#: Regex escapes like `\s` and `\d` are not words.
+ESCAPE = re.compile(r'\\[a-zA-Z]')
+
+WORD = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def tokenize(text):
+    """Split text into lower case words.
+
+    :param text: Pattern or description
+    """
+    return WORD.findall(ESCAPE.sub(' ', text).lower())
+
+
+class HelpIndex(object):
+    def __init__(self, docs):
+        """Construct a help index.
+
+        :param docs: List of doc dict registered by robot
+        """
+        self.docs = docs
+        #: Number of docs this index was built from.
+        self.size = len(docs)
+
+        width = max([len(d['pattern']) for d in docs] or [0])
+        line_format = '{0} {1:%s} - {2}' % width
+        self.lines = [line_format.format(d['robot_name'], d['pattern'],
+                                         d['description']) for d in docs]
+        self.text = '\n'.join(self.lines)
+
+        #: Prefix of word to list of line numbers.
+        self.terms = {}
+        for number, doc in enumerate(docs):
+            words = set(tokenize(doc['pattern']))
+            words.update(tokenize(doc['description']))
+            prefixes = set(w[:i] for w in words for i in range(1, len(w) + 1))
+            for prefix in prefixes:
+                self.terms.setdefault(prefix, []).append(number)
+
+    def is_stale(self, docs):
+        """Return True if docs were changed after this index was built.
+
+        :param docs: List of doc dict registered by robot
+        """
+        return docs is not self.docs or len(docs) != self.size
+
+    def search(self, query):
+        """List line numbers which contain all words of query as prefix.
+
+        :param query: Search words
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+
+        postings = sorted((self.terms.get(w, []) for w in words), key=len)
+        rv = postings[0]
+        for posting in postings[1:]:
+            if not rv:
+                break
+            found = set(posting)
+            rv = [n for n in rv if n in found]
+
+        return rv
+
+    def page(self, numbers=None, page=1, page_size=30):
+        """Render lines of the page.
+
+        Return tuple of text, page and number of pages.
+
+        :param numbers: Line numbers, all lines if None
+        :param page: Page number starts with 1
+        :param page_size: Number of lines per page
+        """
+        count = self.size if numbers is None else len(numbers)
+        pages = max(1, (count + page_size - 1) // page_size)
+        page = min(max(page, 1), pages)
+        if numbers is None and pages == 1:
+            return self.text, page, pages
+
+        start = (page - 1) * page_size
+        end = start + page_size
+        if numbers is None:
+            lines = self.lines[start:end]
+        else:
+            lines = [self.lines[n] for n in numbers[start:end]]
+
+        return '\n'.join(lines), page, pages
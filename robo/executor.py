@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.executor
+    ~~~~~~~~~~~~~
+
+    Thread pool handler executor.
+
+    Handlers are run on a bounded thread pool instead of adapter's thread,
+    so a slow handler does not block receiving messages.
+
+    Handler method can limit concurrency and execution time.
+
+    >>> class Lookup(object):
+    >>>     @cmd(regex=r'^lookup (.+)', max_concurrency=2, timeout=10)
+    >>>     def lookup(self, message, **kwargs):
+    >>>         return fetch(message.match.group(1))
+
+
+    CPU bound handler method can be run in worker process pool.
+
+    >>> class Report(object):
+    >>>     @cmd(regex=r'^report$', executor='process')
+    >>>     def report(self, message, **kwargs):
+    >>>         return build_report()
+
+    Worker processes are not forked from robot's process which runs adapter
+    and queue threads, because forked children may inherit locks held by
+    those threads. They are started by `forkserver` or `spawn`.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import heapq
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from robo.utils import picklable
+from robo._compat import monotonic
+
+#: Handler instances created in worker process.
+_instances = {}
+
+#: Start methods of worker process in preferred order.
+START_METHODS = ('forkserver', 'spawn')
+
+
+def create_process_pool(max_workers=None):
+    """Create process pool whose workers are not forked from this process.
+
+    Python which can not choose start method uses default one.
+
+    :param max_workers: Max number of processes, default is cpu count
+    """
+    try:
+        methods = multiprocessing.get_all_start_methods()
+    except AttributeError:
+        return ProcessPoolExecutor(max_workers=max_workers)
+
+    for method in START_METHODS:
+        if method in methods:
+            context = multiprocessing.get_context(method)
+            try:
+                return ProcessPoolExecutor(max_workers=max_workers,
+                                           mp_context=context)
+            except TypeError:
+                break
+
+    return ProcessPoolExecutor(max_workers=max_workers)
+
+
+def run_in_process(module, class_name, method, attrs, message, kwargs):
+    """Run handler method in worker process.
+
+    Handler class is instantiated once per worker process and attributes
+    like `robot_name` or `options` are injected same as `Robot` does.
+
+    :param module: Module name of handler class
+    :param class_name: Handler class name
+    :param method: Handler method name
+    :param attrs: Attributes to be injected
+    :param message: :class:`robo.message.Message`
+    :param kwargs: Picklable data sent to receivers
+    """
+    key = (module, class_name)
+    instance = _instances.get(key)
+    if instance is None:
+        plugin = __import__(module, globals(), {}, ['__name__'])
+        instance = getattr(plugin, class_name)()
+        for name, value in attrs.items():
+            if hasattr(instance, name):
+                setattr(instance, name, value)
+        _instances[key] = instance
+
+    return getattr(instance, method)(message, **kwargs)
+
+
+class Job(object):
+    __slots__ = ('key', 'func', 'args', 'kwargs', 'timeout', 'notify', 'slot',
+                 'started', 'done', 'abandoned')
+
+    def __init__(self, key, func, args, kwargs, timeout=None, notify=None):
+        """Construct a job.
+
+        :param key: Handler name
+        :param func: Handler method
+        :param args: Positional args of handler method
+        :param kwargs: Keyword args of handler method
+        :param timeout: Seconds to abandon job
+        :param notify: Callable to notify result, overrides executor's one
+        """
+        self.key = key
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.notify = notify
+        #: Concurrency slot of handler, None if concurrency is not limited.
+        self.slot = None
+        self.started = None
+        self.done = False
+        self.abandoned = False
+
+
+class Slot(object):
+    __slots__ = ('limit', 'running', 'pending')
+
+    def __init__(self, limit):
+        """Construct a concurrency slot of handler.
+
+        :param limit: Max number of concurrent jobs
+        """
+        self.limit = limit
+        self.running = 0
+        self.pending = deque()
+
+
+class Watchdog(threading.Thread):
+    def __init__(self, callback):
+        """Construct a watchdog which calls callback when job timed out.
+
+        :param callback: Callable which receives timed out job
+        """
+        threading.Thread.__init__(self, name='robo-watchdog')
+        self.daemon = True
+        self.callback = callback
+        self.deadlines = []
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.counter = 0
+
+    def watch(self, job):
+        """Watch job until it's timeout.
+
+        :param job: Job
+        """
+        with self.condition:
+            #: Counter keeps heap comparable when deadlines are same.
+            self.counter += 1
+            deadline = job.started + job.timeout
+            heapq.heappush(self.deadlines, (deadline, self.counter, job))
+            self.condition.notify()
+
+    def stop(self):
+        """Stop watchdog. """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.stopped:
+                    if not self.deadlines:
+                        self.condition.wait()
+                        continue
+                    wait = self.deadlines[0][0] - monotonic()
+                    if wait <= 0:
+                        break
+                    self.condition.wait(wait)
+
+                if self.stopped:
+                    return
+                _, _, job = heapq.heappop(self.deadlines)
+
+            if not job.done:
+                self.callback(job)
+
+
+class HandlerExecutor(object):
+    def __init__(self, notify, max_workers=4, logger=None):
+        """Construct a handler executor.
+
+        :param notify: Callable to notify handler's result to adapters
+        :param max_workers: Max number of threads
+        :param logger: :class:`logging` Logger
+        """
+        self.notify = notify
+        self.max_workers = max_workers
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.logger = logger or logging.getLogger('robo')
+        self.slots = {}
+        self.lock = threading.Lock()
+        #: Notified when all submitted jobs are finished or abandoned.
+        self.idle = threading.Condition(self.lock)
+        self.outstanding = 0
+        #: Adapters are not always thread safe.
+        self.notify_lock = threading.Lock()
+        self.watchdog = None
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'abandoned': 0,
+            'queued': 0,
+        }
+
+    def submit(self, key, func, args=(), kwargs=None, max_concurrency=None,
+               timeout=None, notify=None):
+        """Submit handler method.
+
+        If handler already runs `max_concurrency` jobs, job waits until one
+        of running job finished.
+
+        :param key: Handler name
+        :param func: Handler method
+        :param args: Positional args of handler method
+        :param kwargs: Keyword args of handler method, also sent to adapters
+        :param max_concurrency: Max number of concurrent jobs of handler
+        :param timeout: Seconds to abandon job
+        :param notify: Callable to notify result, default is executor's one
+        """
+        job = Job(key, func, args, kwargs or {}, timeout, notify)
+        with self.lock:
+            self.stats['submitted'] += 1
+            self.outstanding += 1
+            if max_concurrency is None:
+                self.start(job)
+                return job
+
+            slot = self.slots.get(key)
+            if slot is None:
+                slot = self.slots[key] = Slot(max_concurrency)
+            job.slot = slot
+            if slot.running < slot.limit:
+                slot.running += 1
+                self.start(job)
+            else:
+                slot.pending.append(job)
+                self.stats['queued'] += 1
+                message = 'Handler `{0}` reached max concurrency {1}.'
+                self.logger.debug(message.format(key, slot.limit))
+
+        return job
+
+    def start(self, job):
+        """Start job. Caller should hold lock.
+
+        :param job: Job
+        """
+        job.started = monotonic()
+        if job.timeout is not None:
+            if self.watchdog is None:
+                self.watchdog = Watchdog(self.abandon)
+                self.watchdog.start()
+            self.watchdog.watch(job)
+
+        self.pool.submit(self.run, job)
+
+    def run(self, job):
+        """Run job in worker thread and notify result.
+
+        :param job: Job
+        """
+        try:
+            result = job.func(*job.args, **job.kwargs)
+        except Exception:
+            self.logger.exception('Handler `{0}` failed.'.format(job.key))
+            result = None
+            failed = True
+        else:
+            failed = False
+
+        with self.lock:
+            if job.abandoned:
+                message = 'Handler `{0}` finished after abandoned in {1:.3f}s.'
+                self.logger.warning(message.format(
+                    job.key, monotonic() - job.started))
+                return
+            job.done = True
+            self.stats['failed' if failed else 'completed'] += 1
+            self.release(job)
+
+        #: Replies are delivered in completion order.
+        try:
+            with self.notify_lock:
+                (job.notify or self.notify)(result, **job.kwargs)
+        finally:
+            with self.lock:
+                self.finish()
+
+    def abandon(self, job):
+        """Abandon timed out job.
+
+        Running thread can not be killed, so result of the job is dropped.
+
+        :param job: Job
+        """
+        with self.lock:
+            if job.done:
+                return
+            job.abandoned = True
+            self.stats['abandoned'] += 1
+            self.release(job)
+            self.finish()
+
+        message = 'Handler `{0}` exceeded timeout {1}s, abandoned.'
+        self.logger.warning(message.format(job.key, job.timeout))
+
+    def release(self, job):
+        """Release concurrency slot and start pending job.
+
+        Caller should hold lock.
+
+        :param job: Finished job
+        """
+        slot = job.slot
+        if slot is None:
+            return
+
+        if slot.pending:
+            self.start(slot.pending.popleft())
+        else:
+            slot.running -= 1
+
+    def finish(self):
+        """Mark job as finished. Caller should hold lock. """
+        self.outstanding -= 1
+        if self.outstanding == 0:
+            self.idle.notify_all()
+
+    def shutdown(self, wait=True):
+        """Shutdown thread pool.
+
+        Abandoned jobs are not waited.
+
+        :param wait: Wait until submitted and pending jobs are finished
+        """
+        if wait:
+            with self.lock:
+                while self.outstanding > 0:
+                    self.idle.wait()
+        self.pool.shutdown(wait=wait)
+        if self.watchdog is not None:
+            self.watchdog.stop()
+            self.watchdog = None
+
+
+class ProcessExecutor(object):
+    def __init__(self, notify, max_workers=None, attrs=None, logger=None):
+        """Construct a process pool executor for CPU bound handlers.
+
+        Process pool is not started until first handler is submitted.
+
+        :param notify: Callable to notify handler's result to adapters
+        :param max_workers: Max number of processes, default is cpu count
+        :param attrs: Attributes to be injected to handler instance
+        :param logger: :class:`logging` Logger
+        """
+        self.notify = notify
+        self.max_workers = max_workers
+        self.attrs = picklable(attrs or {})
+        self.logger = logger or logging.getLogger('robo')
+        self.pool = None
+        self.lock = threading.Lock()
+        self.notify_lock = threading.Lock()
+
+    def submit(self, instance, method, message, kwargs, notify=None):
+        """Submit handler method to process pool.
+
+        Handler instance itself is not sent, worker process creates it's
+        own instance of the same class.
+
+        :param instance: Handler instance
+        :param method: Handler method name
+        :param message: :class:`robo.message.Message`
+        :param kwargs: Data sent to receivers, also sent to adapters
+        :param notify: Callable to notify result, default is executor's one
+        """
+        notify = notify or self.notify
+        future = self.run(instance, method, message, kwargs)
+        key = message.to
+
+        def done(future):
+            try:
+                result = future.result()
+            except Exception:
+                self.logger.exception('Handler `{0}` failed.'.format(key))
+                result = None
+            with self.notify_lock:
+                notify(result, **kwargs)
+
+        future.add_done_callback(done)
+
+        return future
+
+    def run(self, instance, method, message, kwargs):
+        """Submit handler method to process pool and return future of it's
+        result without notifying.
+
+        :param instance: Handler instance
+        :param method: Handler method name
+        :param message: :class:`robo.message.Message`
+        :param kwargs: Data sent to receivers
+        """
+        with self.lock:
+            if self.pool is None:
+                self.pool = create_process_pool(self.max_workers)
+                self.logger.debug('Process pool started.')
+            return self.pool.submit(run_in_process, instance.__module__,
+                                    instance.__class__.__name__, method,
+                                    self.attrs, message, picklable(kwargs))
+
+    def shutdown(self, wait=True):
+        """Shutdown process pool.
+
+        :param wait: Wait until running handlers are finished
+        """
+        with self.lock:
+            pool = self.pool
+            self.pool = None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+            self.logger.debug('Process pool stopped.')
@@ -5,26 +5,83 @@
 
     Show registered handler's help.
 
+    > robo help
+    > robo help deploy
+    > robo help page 2
+
 
     :copyright: (c) 2016 Shinya Ohyanagi, All rights reserved.
     :license: BSD, see LICENSE for more details.
 """
+import re
+from robo.docs import HelpIndex
 from robo.decorators import cmd
 
+#: `page <n>` at the end of query.
+PAGE = re.compile(r'(?:^|\s+)page\s+(\d+)$', re.IGNORECASE)
+
 
 class Help(object):
+    #: Number of lines per page.
+    page_size = 30
+
+    def __init__(self):
+        self.index = None
+
+    def get_index(self, message):
+        """Get help index which robot built, or build it if docs changed.
+
+        :param message: :class:`robo.message.Message` which has docs
+        """
+        docs = message.docs
+        index = message.help_index
+        if index is None or index.is_stale(docs):
+            index = self.index
+            if index is None or index.is_stale(docs):
+                index = self.index = HelpIndex(docs)
+
+        return index
+
+    def render(self, index, numbers, page, query):
+        """Render the page and footer if there are multiple pages.
+
+        :param index: :class:`robo.docs.HelpIndex`
+        :param numbers: Line numbers, all lines if None
+        :param page: Page number
+        :param query: Search words
+        """
+        text, page, pages = index.page(numbers, page, self.page_size)
+        if pages == 1:
+            return text
+
+        footer = 'Page {0}/{1}.'.format(page, pages)
+        if page < pages:
+            command = ' '.join(w for w in ('help', query, 'page') if w)
+            footer += ' Next: `{0} {1} {2}`'.format(
+                index.docs[0]['robot_name'], command, page + 1)
+
+        return '{0}\n{1}'.format(text, footer)
+
     @cmd(regex='^help$', description='Show this help message')
     def say(self, message, **kwargs):
-        pattern_length = 0
-        for d in message.docs:
-            if len(d['pattern']) > pattern_length:
-                pattern_length = len(d['pattern'])
-
-        msg = '{0} {1:%s} - {2}' % pattern_length
-        docs = []
-        for doc in message.docs:
-            description = msg.format(doc['robot_name'], doc['pattern'],
-                                     doc['description'])
-            docs.append(description)
-
-        return '\n'.join(docs)
+        index = self.get_index(message)
+
+        return self.render(index, None, 1, '')
+
+    @cmd(regex=r'^help\s+(.+)$', description='Search help by words')
+    def search(self, message, **kwargs):
+        index = self.get_index(message)
+        query = message.match.group(1).strip()
+        page = 1
+        paged = PAGE.search(query)
+        if paged:
+            page = int(paged.group(1))
+            query = query[:paged.start()]
+
+        numbers = None
+        if query:
+            numbers = index.search(query)
+            if not numbers:
+                return 'No help for `{0}`.'.format(query)
+
+        return self.render(index, numbers, page, query)
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.inbound
+    ~~~~~~~~~~~~
+
+    Inbound message queue.
+
+    Incoming messages are queued between adapters and dispatcher, so a burst
+    of messages is buffered up to `maxsize`. When queue is full, messages are
+    handled by policy.
+
+    - `block`: Adapter waits until queue has room.
+    - `drop_oldest`: Oldest queued message is dropped.
+    - `drop_lowest_priority`: Oldest message which has lowest priority is
+      dropped. If incoming message has lower priority than all queued
+      messages, incoming message is dropped.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import logging
+import threading
+from collections import deque
+from robo._compat import monotonic
+
+#: Policies when queue is full.
+POLICIES = ('block', 'drop_oldest', 'drop_lowest_priority')
+
+
+class Incoming(object):
+    __slots__ = ('sender', 'kwargs', 'priority', 'enqueued')
+
+    def __init__(self, sender, kwargs, priority, enqueued):
+        """Construct a queued incoming message.
+
+        :param sender: Received message
+        :param kwargs: Data sent from adapter
+        :param priority: Priority, larger is more important
+        :param enqueued: Seconds when message was queued
+        """
+        self.sender = sender
+        self.kwargs = kwargs
+        self.priority = priority
+        self.enqueued = enqueued
+
+
+def default_priority(sender, kwargs):
+    """Priority of incoming message, adapters can send `priority`.
+
+    :param sender: Received message
+    :param kwargs: Data sent from adapter
+    """
+    return kwargs.get('priority', 0)
+
+
+class InboundQueue(object):
+    def __init__(self, dispatch, maxsize=1000, policy='block', priority=None,
+                 logger=None):
+        """Construct a inbound queue.
+
+        :param dispatch: Function called with queued message and kwargs
+        :param maxsize: Max number of queued messages
+        :param policy: `block`, `drop_oldest` or `drop_lowest_priority`
+        :param priority: Function returns priority of message and kwargs
+        :param logger: :class:`logging` Logger
+        """
+        if policy not in POLICIES:
+            raise ValueError('Policy should be one of {0}.'.format(
+                ', '.join(POLICIES)))
+        self.dispatch = dispatch
+        self.maxsize = maxsize
+        self.policy = policy
+        self.priority = priority or default_priority
+        self.logger = logger or logging.getLogger('robo')
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.stats = {
+            'queued': 0,
+            'dispatched': 0,
+            'shed': 0,
+            'blocked': 0,
+            'failed': 0,
+            'max_depth': 0,
+            'wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+        }
+        self.worker = threading.Thread(target=self.run, name='robo-inbound')
+        self.worker.daemon = True
+        self.worker.start()
+
+    @property
+    def depth(self):
+        """Number of queued messages. """
+        return len(self.queue)
+
+    def put(self, sender, **kwargs):
+        """Queue incoming message.
+
+        Return False if the message was shed.
+
+        :param sender: Received message
+        :param **kwargs: Data sent from adapter
+        """
+        item = Incoming(sender, kwargs, self.priority(sender, kwargs),
+                        monotonic())
+        with self.condition:
+            if len(self.queue) >= self.maxsize and not self.make_room(item):
+                return False
+
+            self.queue.append(item)
+            self.stats['queued'] += 1
+            if len(self.queue) > self.stats['max_depth']:
+                self.stats['max_depth'] = len(self.queue)
+            self.condition.notify_all()
+
+        return True
+
+    def make_room(self, item):
+        """Make room for incoming message by policy.
+
+        Return False if incoming message should be shed.
+        Caller should hold `condition`.
+
+        :param item: :class:`Incoming`
+        """
+        if self.policy == 'block':
+            self.stats['blocked'] += 1
+            while len(self.queue) >= self.maxsize and not self.stopping:
+                self.condition.wait()
+            if self.stopping:
+                return self.shed(item)
+            return True
+
+        victim = self.queue[0]
+        if self.policy == 'drop_lowest_priority':
+            #: `min()` returns oldest one of lowest priority.
+            victim = min(self.queue, key=lambda i: i.priority)
+            if item.priority < victim.priority:
+                return self.shed(item)
+
+        self.queue.remove(victim)
+        self.shed(victim)
+
+        return True
+
+    def shed(self, item):
+        """Count shed message.
+
+        :param item: :class:`Incoming`
+        """
+        self.stats['shed'] += 1
+        message = 'Inbound queue is full, shed message with priority {0}.'
+        self.logger.warning(message.format(item.priority))
+
+        return False
+
+    def get(self):
+        """Wait for queued message.
+
+        Return None when queue is stopped and empty.
+        """
+        with self.condition:
+            while not self.queue:
+                if self.stopping:
+                    return None
+                self.condition.wait()
+            item = self.queue.popleft()
+            #: Wake up blocked adapters.
+            self.condition.notify_all()
+
+        return item
+
+    def run(self):
+        """Dispatch queued messages until stopped. """
+        stats = self.stats
+        while True:
+            item = self.get()
+            if item is None:
+                return
+
+            wait = monotonic() - item.enqueued
+            stats['wait_seconds'] += wait
+            if wait > stats['max_wait_seconds']:
+                stats['max_wait_seconds'] = wait
+            try:
+                self.dispatch(item.sender, **item.kwargs)
+                stats['dispatched'] += 1
+            except Exception:
+                stats['failed'] += 1
+                self.logger.exception('Failed to dispatch message.')
+
+    def stop(self, timeout=None):
+        """Stop worker after queued messages are dispatched.
+
+        :param timeout: Seconds to wait for worker
+        """
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        self.worker.join(timeout)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.manifest
+    ~~~~~~~~~~~~~
+
+    Extract `@cmd()` metadata from handler source without importing it.
+
+    Only simple handlers can be analyzed statically, a handler class which
+    inherits other class, a method which has other decorators or `@cmd()`
+    which has non-literal arguments are not supported. For such handlers
+    `read_manifest()` returns None and handler should be imported.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import re
+import ast
+
+#: `ast.AsyncFunctionDef` does not exist in Python2.
+FUNCTION_TYPES = tuple(getattr(ast, name) for name in
+                       ('FunctionDef', 'AsyncFunctionDef')
+                       if hasattr(ast, name))
+
+
+class ManifestError(Exception):
+    pass
+
+
+def read_manifest(path, class_name):
+    """Read handler methods metadata from handler source.
+
+    Return list of dict which contains `method`, `kwargs` and `coroutine`
+    sorted by method name, or None if the source can not be analyzed.
+
+    :param path: Handler source path
+    :param class_name: Handler class name
+    """
+    try:
+        with open(path, 'rb') as f:
+            source = f.read()
+        tree = ast.parse(source, path)
+        return parse_module(tree, class_name)
+    except (IOError, OSError, SyntaxError, ValueError, TypeError,
+            ManifestError):
+        return None
+
+
+def parse_module(tree, class_name):
+    """Find handler class and parse its methods.
+
+    :param tree: :class:`ast.Module`
+    :param class_name: Handler class name
+    """
+    names = imported_names(tree)
+    if names.get('cmd') != 'robo.decorators.cmd':
+        raise ManifestError('`cmd` is not imported from robo.decorators.')
+
+    classes = [node for node in tree.body
+               if isinstance(node, ast.ClassDef) and node.name == class_name]
+    if len(classes) != 1:
+        raise ManifestError('Handler class not found.')
+
+    handler_class = classes[0]
+    for base in handler_class.bases:
+        if not (isinstance(base, ast.Name) and base.id == 'object'):
+            raise ManifestError('Handler class inherits other class.')
+    if handler_class.decorator_list:
+        raise ManifestError('Handler class is decorated.')
+
+    rv = []
+    for node in handler_class.body:
+        if not isinstance(node, FUNCTION_TYPES):
+            continue
+        decorators = node.decorator_list
+        commands = [d for d in decorators if is_cmd(d)]
+        if not commands:
+            continue
+        if len(decorators) > 1:
+            raise ManifestError('Handler method has other decorators.')
+
+        kwargs = {}
+        for keyword in commands[0].keywords:
+            if keyword.arg is None:
+                raise ManifestError('`**kwargs` can not be analyzed.')
+            kwargs[keyword.arg] = evaluate(keyword.value, names)
+
+        rv.append({
+            'method': node.name,
+            'kwargs': kwargs,
+            'coroutine': not isinstance(node, ast.FunctionDef),
+        })
+
+    #: Same order as `inspect.getmembers()`.
+    return sorted(rv, key=lambda m: m['method'])
+
+
+def imported_names(tree):
+    """Map imported names to full names at module level.
+
+    :param tree: :class:`ast.Module`
+    """
+    rv = {}
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module:
+            for alias in node.names:
+                full_name = '{0}.{1}'.format(node.module, alias.name)
+                rv[alias.asname or alias.name] = full_name
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                rv[alias.asname or alias.name] = alias.name
+
+    return rv
+
+
+def is_cmd(node):
+    """Return True if decorator is `@cmd()`.
+
+    :param node: Decorator node
+    """
+    return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) \
+        and node.func.id == 'cmd'
+
+
+def evaluate(node, names):
+    """Evaluate `@cmd()` keyword argument.
+
+    Literals and regex flags like `re.I | re.M` are supported.
+
+    :param node: Expression node
+    :param names: Imported names
+    """
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        return evaluate(node.left, names) | evaluate(node.right, names)
+
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) \
+            and names.get(node.value.id) == 're':
+        value = getattr(re, node.attr, None)
+        if not isinstance(value, int):
+            raise ManifestError('Unknown regex flag `{0}`.'.format(node.attr))
+        return int(value)
+
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError):
+        raise ManifestError('Argument is not literal.')
@@ -9,22 +9,184 @@
     :copyright: (c) 2016 Shinya Ohyanagi, All rights reserved.
     :license: BSD, see LICENSE for more details.
 """
+from robo.utils import picklable
+
+
+class MatchResult(object):
+    __slots__ = ('string', 'pos', 'endpos', 'lastindex', 'lastgroup',
+                 '_groups', '_spans', '_names')
+
+    def __init__(self, match):
+        """Picklable snapshot of :class:`re.match` object.
+
+        :param match: Match object
+        """
+        pattern = match.re
+        count = pattern.groups + 1
+        self.string = match.string
+        self.pos = match.pos
+        self.endpos = match.endpos
+        self.lastindex = match.lastindex
+        self.lastgroup = match.lastgroup
+        self._groups = match.group(*range(count)) if count > 1 else \
+            (match.group(0),)
+        self._spans = tuple(match.span(i) for i in range(count))
+        self._names = dict(pattern.groupindex)
+
+    def __getstate__(self):
+        return dict((k, getattr(self, k)) for k in self.__slots__)
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+
+    def _index(self, group):
+        return self._names[group] if group in self._names else group
+
+    def group(self, *args):
+        if len(args) == 0:
+            return self._groups[0]
+        if len(args) == 1:
+            return self._groups[self._index(args[0])]
+
+        return tuple(self._groups[self._index(g)] for g in args)
+
+    def groups(self, default=None):
+        return tuple(default if g is None else g for g in self._groups[1:])
+
+    def groupdict(self, default=None):
+        rv = {}
+        for name, index in self._names.items():
+            value = self._groups[index]
+            rv[name] = default if value is None else value
+
+        return rv
+
+    def span(self, group=0):
+        return self._spans[self._index(group)]
+
+    def start(self, group=0):
+        return self.span(group)[0]
+
+    def end(self, group=0):
+        return self.span(group)[1]
+
+    def __getitem__(self, group):
+        return self.group(group)
+
+    def __repr__(self):
+        message = '<MatchResult span={0}, match={1!r}>'
+
+        return message.format(self._spans[0], self._groups[0])
+
+
+class Envelope(object):
+    __slots__ = ('body', 'kwargs', 'record_id')
+
+    def __init__(self, body, kwargs, record_id=None):
+        """Incoming message.
+
+        Envelope is created once per incoming message and shared read-only
+        by all matched handlers.
+
+        :param body: Message body
+        :param kwargs: Data sent from adapter
+        :param record_id: Id given by :class:`robo.replay.Recorder`
+        """
+        object.__setattr__(self, 'body', body)
+        object.__setattr__(self, 'kwargs', kwargs)
+        object.__setattr__(self, 'record_id', record_id)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Envelope is read-only.')
+
+    def __getstate__(self):
+        """Drop data which can not be pickled like adapter's raw message. """
+        return {'body': self.body, 'kwargs': picklable(self.kwargs),
+                'record_id': self.record_id}
+
+    def __setstate__(self, state):
+        object.__setattr__(self, 'body', state['body'])
+        object.__setattr__(self, 'kwargs', state['kwargs'])
+        object.__setattr__(self, 'record_id', state.get('record_id'))
+
+    @property
+    def source(self):
+        return self.kwargs.get('source', None)
+
+    @property
+    def send_from(self):
+        return self.kwargs.get('send_from', None)
+
+    @property
+    def room(self):
+        return self.kwargs.get('room', None)
 
 
 class Message(object):
+    __slots__ = ('envelope', 'match', 'to', 'docs', 'help_index')
+
     def __init__(self, body, match, **kwargs):
         """Message.
 
         :param body: Message body
         :param match: Match object
-        :param **kwargs: Adapter source, send from, sent to, docs.
+        :param **kwargs: Adapter source, send from, sent to, docs,
+                         help index.
         """
-        self.body = body
+        self.envelope = Envelope(body, kwargs)
         self.match = match
-        self.source = kwargs['source'] if 'source' in kwargs else None
-        self.send_from = kwargs['send_from'] if 'send_from' in kwargs else None
-        self.to = kwargs['send_to'] if 'send_to' in kwargs else None
-        self.docs = kwargs['docs'] if 'docs' in kwargs else None
+        self.to = kwargs.get('send_to', None)
+        self.docs = kwargs.get('docs', None)
+        self.help_index = kwargs.get('help_index', None)
+
+    @classmethod
+    def view(cls, envelope, match, to=None, docs=None, help_index=None):
+        """Create handler's view of shared incoming message.
+
+        :param envelope: :class:`Envelope` Incoming message
+        :param match: Match object
+        :param to: Handler name
+        :param docs: Registered docs
+        :param help_index: :class:`robo.docs.HelpIndex` of `docs`
+        """
+        rv = cls.__new__(cls)
+        rv.envelope = envelope
+        rv.match = match
+        rv.to = to
+        rv.docs = docs
+        rv.help_index = help_index
+
+        return rv
+
+    @property
+    def body(self):
+        return self.envelope.body
+
+    @property
+    def source(self):
+        return self.envelope.source
+
+    @property
+    def send_from(self):
+        return self.envelope.send_from
+
+    @property
+    def room(self):
+        return self.envelope.room
+
+    def __getstate__(self):
+        """Reduce match object to picklable `MatchResult`. """
+        match = self.match
+        if match is not None and not isinstance(match, MatchResult):
+            match = MatchResult(match)
+
+        return {'envelope': self.envelope, 'match': match, 'to': self.to,
+                'docs': self.docs, 'help_index': self.help_index}
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
 
     def __repr__(self):
         message = 'Message(body={0}, match={1}, source={2}, send_from={3})'
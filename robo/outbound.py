@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.outbound
+    ~~~~~~~~~~~~~
+
+    Outbound send queue.
+
+    Replies are queued per adapter and sent by background worker, so
+    handlers do not block on chat service. Sending is rate limited by token
+    bucket and consecutive replies to the same room are merged into one
+    message.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import logging
+import threading
+from collections import deque
+from robo._compat import monotonic
+from robo.ratelimit import TokenBucket
+
+
+class Reply(object):
+    __slots__ = ('message', 'kwargs', 'key', 'enqueued')
+
+    def __init__(self, message, kwargs, key, enqueued):
+        """Construct a queued reply.
+
+        :param message: Message body
+        :param kwargs: Data sent to adapter
+        :param key: Coalescing key, None if reply should not be merged
+        :param enqueued: Seconds when reply was queued
+        """
+        self.message = message
+        self.kwargs = kwargs
+        self.key = key
+        self.enqueued = enqueued
+
+
+def room_key(kwargs):
+    """Coalescing key of reply.
+
+    Replies which does not know its room are never merged.
+
+    :param kwargs: Data sent to adapter
+    """
+    room = kwargs.get('room', None)
+    if room is None:
+        return None
+
+    return (kwargs.get('source', None), room)
+
+
+class OutboundQueue(object):
+    def __init__(self, adapter, rate=1.0, burst=5, coalesce_window=0.5,
+                 max_coalesce=20, maxsize=1000, separator='\n', logger=None):
+        """Construct a outbound queue.
+
+        :param adapter: Adapter instance which has `say` method
+        :param rate: Messages per second
+        :param burst: Max number of messages sent at once
+        :param coalesce_window: Seconds to wait for replies to the same room
+        :param max_coalesce: Max number of replies merged into one message
+        :param maxsize: Max number of queued replies, oldest one is dropped
+        :param separator: Separator of merged replies
+        :param logger: :class:`logging` Logger
+        """
+        self.adapter = adapter
+        self.bucket = TokenBucket(rate, burst)
+        self.coalesce_window = coalesce_window
+        self.max_coalesce = max_coalesce
+        self.maxsize = maxsize
+        self.separator = separator
+        self.logger = logger or logging.getLogger('robo')
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.stopping = False
+        #: Interrupts pacing when stopped.
+        self.stopped = threading.Event()
+        self.stats = {
+            'queued': 0,
+            'sent': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'failed': 0,
+        }
+        self.worker = threading.Thread(target=self.run, name='robo-outbound')
+        self.worker.daemon = True
+        self.worker.start()
+
+    @property
+    def depth(self):
+        """Number of queued replies. """
+        return len(self.queue)
+
+    def put(self, message, **kwargs):
+        """Queue reply.
+
+        :param message: Message body
+        :param **kwargs: Data sent to adapter
+        """
+        if message is None:
+            return
+
+        reply = Reply(message, kwargs, room_key(kwargs), monotonic())
+        with self.condition:
+            if len(self.queue) >= self.maxsize:
+                self.queue.popleft()
+                self.stats['dropped'] += 1
+                self.logger.warning('Outbound queue is full, dropped reply.')
+            self.queue.append(reply)
+            self.stats['queued'] += 1
+            self.condition.notify()
+
+    def next_batch(self):
+        """Wait for replies and merge consecutive replies to the same room.
+
+        Return None when queue is stopped and empty.
+        """
+        with self.condition:
+            while not self.queue:
+                if self.stopping:
+                    return None
+                self.condition.wait()
+
+            batch = [self.queue.popleft()]
+            key = batch[0].key
+            if key is None:
+                return batch
+
+            deadline = batch[0].enqueued + self.coalesce_window
+            while len(batch) < self.max_coalesce:
+                if self.queue:
+                    if self.queue[0].key != key:
+                        break
+                    batch.append(self.queue.popleft())
+                    continue
+
+                remaining = deadline - monotonic()
+                if remaining <= 0 or self.stopping:
+                    break
+                self.condition.wait(remaining)
+
+            return batch
+
+    def run(self):
+        """Send queued replies until stopped. """
+        while True:
+            batch = self.next_batch()
+            if batch is None:
+                return
+
+            delay = self.bucket.delay()
+            while delay > 0 or not self.bucket.consume():
+                #: Queued replies are sent without pacing after stopped.
+                if self.stopped.wait(delay):
+                    break
+                delay = self.bucket.delay()
+
+            self.stats['coalesced'] += len(batch) - 1
+            message = self.separator.join(r.message for r in batch)
+            try:
+                self.adapter.say(message, **batch[0].kwargs)
+                self.stats['sent'] += 1
+            except Exception:
+                self.stats['failed'] += 1
+                self.logger.exception('Failed to send reply.')
+
+    def stop(self, timeout=None):
+        """Stop worker after queued replies are sent.
+
+        Rate limit is not applied to replies queued before stopped.
+
+        :param timeout: Seconds to wait for worker
+        """
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        self.stopped.set()
+        self.worker.join(timeout)
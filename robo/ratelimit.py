@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.ratelimit
+    ~~~~~~~~~~~~~~
+
+    Rate limiting.
+
+    `Throttle` holds token bucket per user and per room of incoming
+    messages. Buckets are evicted when they are refilled, or least recently
+    used one is evicted when table is full, so memory is bounded.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import threading
+from collections import OrderedDict
+from robo._compat import monotonic
+
+
+class TokenBucket(object):
+    def __init__(self, rate, capacity=None, clock=monotonic):
+        """Construct a token bucket.
+
+        :param rate: Tokens added per second
+        :param capacity: Max number of tokens, burst size, default is `rate`
+                         but at least one token
+        :param clock: Callable returns current seconds
+        """
+        self.rate = float(rate)
+        if capacity is None:
+            capacity = max(1.0, self.rate)
+        self.capacity = float(capacity)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def refill(self, now):
+        """Add tokens since last update. Caller should hold lock.
+
+        :param now: Current seconds
+        """
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def consume(self, tokens=1):
+        """Consume tokens, return False if there are not enough tokens.
+
+        :param tokens: Number of tokens
+        """
+        with self.lock:
+            self.refill(self.clock())
+            if self.tokens < tokens:
+                return False
+            self.tokens -= tokens
+
+            return True
+
+    def delay(self, tokens=1):
+        """Seconds until given number of tokens are available.
+
+        :param tokens: Number of tokens
+        """
+        with self.lock:
+            self.refill(self.clock())
+            if self.tokens >= tokens:
+                return 0.0
+
+            return (tokens - self.tokens) / self.rate
+
+
+def throttle_keys(kwargs):
+    """List keys of buckets for incoming message.
+
+    Message which does not have user or room is not throttled by it.
+
+    :param kwargs: Data sent from adapter
+    """
+    source = kwargs.get('source', None)
+    rv = []
+    for name in ('user', 'room'):
+        value = kwargs.get(name, None)
+        if value is not None:
+            rv.append((name, source, value))
+
+    return rv
+
+
+class Throttle(object):
+    def __init__(self, rate, burst=None, maxsize=10000, clock=monotonic):
+        """Construct a throttle.
+
+        :param rate: Messages per second of each user and room
+        :param burst: Max number of messages at once, default is `rate` but
+                      at least one message
+        :param maxsize: Max number of buckets
+        :param clock: Callable returns current seconds
+        """
+        self.rate = float(rate)
+        self.burst = burst
+        self.maxsize = maxsize
+        self.clock = clock
+        #: Key to bucket, least recently used first.
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+        capacity = float(burst if burst is not None else max(1.0, rate))
+        #: Bucket which is idle longer than this is full, same as new one.
+        self.idle = capacity / self.rate
+
+    def bucket(self, key, now):
+        """Get bucket of key and evict idle buckets. Caller should hold lock.
+
+        :param key: Bucket key
+        :param now: Current seconds
+        """
+        buckets = self.buckets
+        bucket = buckets.pop(key, None)
+        while buckets:
+            oldest = next(iter(buckets))
+            if len(buckets) < self.maxsize and \
+                    now - buckets[oldest].updated < self.idle:
+                break
+            del buckets[oldest]
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst, self.clock)
+        buckets[key] = bucket
+
+        return bucket
+
+    def allow(self, kwargs):
+        """Consume tokens of user and room, return False if throttled.
+
+        Tokens are consumed only when all buckets have a token.
+
+        :param kwargs: Data sent from adapter
+        """
+        keys = throttle_keys(kwargs)
+        if not keys:
+            return True
+
+        with self.lock:
+            now = self.clock()
+            buckets = [self.bucket(key, now) for key in keys]
+            if any(b.delay() > 0 for b in buckets):
+                return False
+            for bucket in buckets:
+                bucket.consume()
+
+            return True
+
+    def __len__(self):
+        return len(self.buckets)
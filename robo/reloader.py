@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.reloader
+    ~~~~~~~~~~~~~
+
+    Watch handler plugin sources and reload changed plugins.
+
+    inotify is used if `inotify_simple` is installed, otherwise sources are
+    polled. Either way a plugin is reloaded only when mtime or size of its
+    source is changed, so multiple events of one save reload it once.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import logging
+import threading
+
+try:
+    import inotify_simple
+except ImportError:
+    #: Fallback to polling.
+    inotify_simple = None
+
+
+class Reloader(threading.Thread):
+    def __init__(self, robot, interval=1.0, use_inotify=True, logger=None):
+        """Construct a plugin watcher.
+
+        :param robot: :class:`robo.robot.Robot`
+        :param interval: Polling interval seconds
+        :param use_inotify: Use inotify if available
+        :param logger: :class:`logging` Logger
+        """
+        super(Reloader, self).__init__()
+        self.daemon = True
+        self.robot = robot
+        self.interval = interval
+        self.use_inotify = use_inotify and inotify_simple is not None
+        self.logger = logger or logging.getLogger('robo')
+        self.stopped = threading.Event()
+        #: Source path to tuple of mtime and size.
+        self.stats = self.snapshot()
+
+    def sources(self):
+        """Map source path of registered plugins to module name. """
+        rv = {}
+        for module, (loader, name) in list(self.robot.plugins.items()):
+            path = loader.sources.get(name)
+            if path is not None:
+                rv[path] = module
+
+        return rv
+
+    def snapshot(self):
+        """Stat all plugin sources. """
+        rv = {}
+        for path in self.sources():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            rv[path] = (stat.st_mtime, stat.st_size)
+
+        return rv
+
+    def check(self):
+        """Reload plugins whose source was changed.
+
+        Return list of reloaded module names.
+        """
+        sources = self.sources()
+        stats = self.snapshot()
+        rv = []
+        for path, stat in stats.items():
+            previous = self.stats.get(path)
+            if previous is not None and previous != stat:
+                if self.robot.reload_plugin(sources[path]):
+                    rv.append(sources[path])
+        self.stats = stats
+
+        return rv
+
+    def run(self):
+        if self.use_inotify:
+            self.watch()
+        else:
+            self.poll()
+
+    def poll(self):
+        """Check sources every `interval` seconds. """
+        while not self.stopped.wait(self.interval):
+            self.check()
+
+    def watch(self):
+        """Check sources when inotify reports events in plugin directories.
+
+        `interval` is used as read timeout to check `stop()` was called.
+        """
+        flags = inotify_simple.flags
+        mask = flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE
+        inotify = inotify_simple.INotify()
+        try:
+            for directory in set(os.path.dirname(p) for p in self.stats):
+                inotify.add_watch(directory, mask)
+            while not self.stopped.is_set():
+                if inotify.read(timeout=int(self.interval * 1000)):
+                    self.check()
+        finally:
+            inotify.close()
+
+    def stop(self, timeout=None):
+        """Stop watching.
+
+        :param timeout: Seconds to wait thread
+        """
+        self.stopped.set()
+        if self.is_alive():
+            self.join(timeout)
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.replay
+    ~~~~~~~~~~~
+
+    Record and replay inbound traffic.
+
+    `Recorder` appends each incoming message and reply to JSON lines log,
+    `Replayer` sends recorded messages through robot's signal again and
+    reports throughput, latency of each handler and replies which differ
+    from recorded ones.
+
+    >>> robot.setup_recorder('traffic.log')
+    >>> ...
+    >>> report = Replayer(robot, 'traffic.log', speed=10).run()
+
+    Incoming message is recorded as `{"t": ..., "k": "in", "n": ...,
+    "src": ..., "room": ..., "user": ..., "body": ...}` and reply as
+    `{"t": ..., "k": "out", "n": ..., "room": ..., "body": ...}`, `n` is
+    record id of incoming message which the reply is for. Record id is held
+    by :class:`robo.message.Envelope`, so it is not passed to handlers.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import io
+import os
+import json
+import time
+import threading
+from functools import wraps
+from robo.utils import percentile
+from robo._compat import monotonic, to_unicode
+
+
+def read_log(path):
+    """Read recorded entries.
+
+    Broken lines, like the last line written while process was killed,
+    are skipped.
+
+    :param path: Log path
+    """
+    rv = []
+    with io.open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                rv.append(json.loads(line))
+            except ValueError:
+                continue
+
+    return rv
+
+
+class Recorder(object):
+    def __init__(self, path, clock=time.time):
+        """Construct a recorder.
+
+        :param path: Log path, entries are appended
+        :param clock: Function returns current timestamp
+        """
+        self.path = path
+        self.clock = clock
+        #: Log is appended, ids continue from former sessions.
+        self.count = 0
+        if os.path.exists(path):
+            self.count = max([e.get('n') or 0 for e in read_log(path)
+                              if e.get('k') == 'in'] or [0])
+        self.file = io.open(path, 'a', encoding='utf-8')
+        self.lock = threading.Lock()
+
+    def write(self, entry):
+        """Append entry as a line.
+
+        :param entry: Dict
+        """
+        line = json.dumps(entry, separators=(',', ':'), sort_keys=True)
+        with self.lock:
+            self.file.write(to_unicode(line) + u'\n')
+
+    def record(self, sender, kwargs, record_id=None):
+        """Record incoming message and return its record id.
+
+        :param sender: Received message
+        :param kwargs: Data sent from adapter
+        :param record_id: Recorded id of replayed message, new id if None
+        """
+        if record_id is None:
+            with self.lock:
+                self.count += 1
+                record_id = self.count
+        self.write({
+            't': self.clock(),
+            'k': 'in',
+            'n': record_id,
+            'src': kwargs.get('source'),
+            'room': kwargs.get('room'),
+            'user': kwargs.get('user'),
+            'body': to_unicode(sender),
+        })
+
+        return record_id
+
+    def record_reply(self, sender, kwargs, record_id=None):
+        """Record reply.
+
+        :param sender: Reply
+        :param kwargs: Data sent to adapter
+        :param record_id: Record id of incoming message
+        """
+        self.write({
+            't': self.clock(),
+            'k': 'out',
+            'n': record_id,
+            'room': kwargs.get('room'),
+            'body': to_unicode(sender),
+        })
+
+    def flush(self):
+        with self.lock:
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class Capture(object):
+    def __init__(self):
+        """Collect replies of replayed messages in memory.
+
+        Used as robot's recorder while replaying.
+        """
+        self.replies = {}
+        self.lock = threading.Lock()
+
+    def record(self, sender, kwargs, record_id=None):
+        return record_id
+
+    def record_reply(self, sender, kwargs, record_id=None):
+        with self.lock:
+            self.replies.setdefault(record_id, []).append(to_unicode(sender))
+
+    def close(self):
+        pass
+
+
+class Replayer(object):
+    def __init__(self, robot, path, speed=None, settle=0.0):
+        """Construct a replayer.
+
+        :param robot: :class:`robo.robot.Robot`
+        :param path: Recorded log path
+        :param speed: Multiplier of recorded pace, as fast as possible if None
+        :param settle: Seconds to wait replies of background handlers
+        """
+        self.robot = robot
+        self.entries = read_log(path)
+        self.speed = speed
+        self.settle = settle
+        #: Handler name to list of seconds.
+        self.latencies = {}
+        self.latency_lock = threading.Lock()
+
+    def measure(self, call_handler):
+        """Wrap `Robot.call_handler()` to measure latency of each handler.
+
+        Handlers which are run by executor are measured until submitted.
+
+        :param call_handler: Robot's `call_handler`
+        """
+        @wraps(call_handler)
+        def wrapper(sender, handler, matched, **kwargs):
+            start = monotonic()
+            try:
+                return call_handler(sender, handler, matched, **kwargs)
+            finally:
+                elapsed = monotonic() - start
+                with self.latency_lock:
+                    self.latencies.setdefault(handler.send_to,
+                                              []).append(elapsed)
+
+        return wrapper
+
+    def send(self, entry):
+        """Send recorded message through signal.
+
+        `record_id` is taken by robot, it is not passed to handlers.
+
+        :param entry: Recorded incoming message
+        """
+        kwargs = {'record_id': entry['n']}
+        for key, name in (('src', 'source'), ('room', 'room'),
+                          ('user', 'user')):
+            if entry.get(key) is not None:
+                kwargs[name] = entry[key]
+        self.robot.handler_signal.send(entry['body'], **kwargs)
+
+    def run(self):
+        """Replay recorded messages and return report. """
+        messages = [e for e in self.entries if e.get('k') == 'in']
+        capture = Capture()
+        robot = self.robot
+        recorder = robot.recorder
+        robot.recorder = capture
+        #: `call_handler` may be already wrapped by instance attribute.
+        wrapped = robot.__dict__.get('call_handler')
+        robot.call_handler = self.measure(robot.call_handler)
+        try:
+            started = monotonic()
+            first = messages[0]['t'] if messages else 0
+            for entry in messages:
+                if self.speed is not None:
+                    delay = (entry['t'] - first) / self.speed - \
+                        (monotonic() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+                self.send(entry)
+            elapsed = monotonic() - started
+            if self.settle:
+                time.sleep(self.settle)
+        finally:
+            if wrapped is None:
+                del robot.call_handler
+            else:
+                robot.call_handler = wrapped
+            robot.recorder = recorder
+
+        return self.report(messages, capture.replies, elapsed)
+
+    def report(self, messages, replies, elapsed):
+        """Build report.
+
+        :param messages: Replayed messages
+        :param replies: Record id to list of replies
+        :param elapsed: Seconds to replay messages
+        """
+        recorded = {}
+        for entry in self.entries:
+            if entry.get('k') == 'out':
+                recorded.setdefault(entry.get('n'), []).append(entry['body'])
+
+        diffs = []
+        for entry in messages:
+            expected = recorded.get(entry['n'], [])
+            actual = replies.get(entry['n'], [])
+            #: Background handlers reply in completion order.
+            if sorted(expected) != sorted(actual):
+                diffs.append({'n': entry['n'], 'body': entry['body'],
+                              'expected': expected, 'actual': actual})
+
+        handlers = {}
+        for name, values in self.latencies.items():
+            values = sorted(values)
+            handlers[name] = {
+                'count': len(values),
+                'p50_ms': percentile(values, 0.5) * 1000,
+                'p99_ms': percentile(values, 0.99) * 1000,
+                'max_ms': values[-1] * 1000,
+            }
+
+        return {
+            'messages': len(messages),
+            'elapsed': elapsed,
+            'messages_per_second': len(messages) / elapsed if elapsed else 0,
+            'handlers': handlers,
+            'diffs': diffs,
+        }
@@ -13,13 +13,22 @@
 """
 import os
 import re
+import sys
 import inspect
 import pkgutil
 import logging
-from blinker import signal
-from robo.message import Message
+import threading
+from functools import partial
+from collections import OrderedDict
+from robo.bus import create_bus
+from robo.message import Envelope, Message
+from robo.cache import DiscoveryCache, HandlerCache, LRUCache, TTLCache
+from robo.docs import HelpIndex
+from robo.dispatch import HandlerIndex, HandlerSpec
+from robo.manifest import read_manifest
+from robo.ratelimit import Throttle
 from robo.utils import snakecase_to_pascalcase
-from robo._compat import to_unicode
+from robo._compat import monotonic, reload_module, to_unicode
 
 
 class PluginLoader(object):
@@ -31,14 +40,54 @@ class PluginLoader(object):
 
     So just create a simple plugin loader.
     """
-    def __init__(self, package):
+    def __init__(self, package, cache_path=None, rescan=False):
         """Construct plugin loader.
 
+        If `cache_path` is given, module list and handler metadata are cached
+        to the file and reused while plugin files are not changed.
+
         :param package: Package name
+        :param cache_path: Discovery cache file path
+        :param rescan: Ignore cached entries and scan all plugins
         """
         self.plugin_paths = []
         #: Base plugin package name.
         self.package = package
+        #: Plugin name to source path, set by `list_plugins()`.
+        self.sources = {}
+        self.cache = None
+        if cache_path is not None:
+            self.cache = DiscoveryCache(cache_path)
+            if rescan:
+                self.cache.dirs = {}
+                self.cache.files = {}
+
+    def list_modules(self, directory):
+        """List modules in directory as tuple of name and is package flag.
+
+        :param directory: Plugin path
+        """
+        if self.cache is None:
+            return [(n, p) for _, n, p in pkgutil.iter_modules([directory])]
+
+        try:
+            mtime = os.stat(directory).st_mtime
+        except OSError:
+            return []
+
+        modules = self.cache.get_modules(directory, mtime)
+        if modules is None:
+            modules = [(n, p) for _, n, p in
+                       pkgutil.iter_modules([directory])]
+            self.cache.set_modules(directory, mtime, modules)
+            #: Forget removed plugins.
+            paths = set(os.path.join(directory, n + '.py')
+                        for n, _ in modules)
+            for path in list(self.cache.files):
+                if os.path.dirname(path) == directory and path not in paths:
+                    del self.cache.files[path]
+
+        return modules
 
     def list_plugins(self, searchpath):
         """List plugin names.
@@ -46,14 +95,53 @@ class PluginLoader(object):
         :param searchpath: List of plugin paths
         """
         rv = []
-        for _, modname, ispkg in pkgutil.iter_modules(searchpath):
-            if ispkg is False:
-                #: Register only files.
-                #: Package(directoires) are ignored.
-                rv.append(modname)
+        seen = set()
+        for directory in searchpath:
+            for modname, ispkg in self.list_modules(directory):
+                if ispkg is False and modname not in seen:
+                    #: Register only files.
+                    #: Package(directoires) are ignored.
+                    #: Same name in former path wins like `pkgutil`.
+                    seen.add(modname)
+                    rv.append(modname)
+                    self.sources[modname] = os.path.join(directory,
+                                                         modname + '.py')
 
         return sorted(rv)
 
+    def read_manifest(self, name):
+        """Read `@cmd()` metadata of plugin without importing it.
+
+        Return None if plugin can not be analyzed statically.
+
+        :param name: Plugin file name
+        """
+        path = self.sources.get(name)
+        if path is None:
+            return None
+
+        if self.cache is None:
+            return read_manifest(path, snakecase_to_pascalcase(name))
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        hit, manifest = self.cache.get_manifest(path, stat.st_mtime,
+                                                stat.st_size)
+        if not hit:
+            manifest = read_manifest(path, snakecase_to_pascalcase(name))
+            self.cache.set_manifest(path, stat.st_mtime, stat.st_size,
+                                    manifest)
+
+        return manifest
+
+    def save_cache(self):
+        """Write discovery cache file if cache is enabled. """
+        if self.cache is not None:
+            self.cache.save()
+
     def load_plugin(self, name):
         """Load plugin.
 
@@ -62,6 +150,58 @@ class PluginLoader(object):
         package = self.package + '.' + name
         return __import__(package, globals(), {}, ['__name__'])
 
+    def reload_plugin(self, name):
+        """Import plugin again to apply changes of source.
+
+        :param name: Plugin file name
+        """
+        module = sys.modules.get(self.package + '.' + name)
+        if module is None:
+            return self.load_plugin(name)
+
+        return reload_module(module)
+
+
+class LazyPlugin(object):
+    def __init__(self, robot, loader, name):
+        """Plugin which is imported when one of its handlers first matched.
+
+        :param robot: Robot
+        :param loader: :class:`PluginLoader`
+        :param name: Plugin file name
+        """
+        self.robot = robot
+        self.loader = loader
+        self.name = name
+        self.handlers = []
+        self.instance = None
+        #: Plugin which failed to import is not imported again.
+        self.failed = False
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Import plugin, instantiate handler class and bind handlers.
+
+        Return None if plugin failed to import, failure is logged once and
+        handlers of the plugin are not called.
+        """
+        with self.lock:
+            if self.instance is None and not self.failed:
+                try:
+                    instance = self.robot.load_handler(self.loader, self.name)
+                except Exception:
+                    self.failed = True
+                    message = 'Failed to import `{0}`, its handlers are ' \
+                        'disabled.'
+                    self.robot.logger.exception(message.format(self.name))
+                    return None
+                for handler in self.handlers:
+                    handler.bind(instance)
+                self.robot.attach_caches(instance, self.handlers)
+                self.instance = instance
+
+        return self.instance
+
 
 class Robot(object):
     #: Default log format.
@@ -69,11 +209,23 @@ class Robot(object):
         '[%(asctime)s %(levelname)s][%(pathname)s:%(lineno)d]: %(message)s'
     )
 
-    def __init__(self, name='robo', logger=None, **kwargs):
+    #: Max number of rooms to cache eligible handlers.
+    room_cache_size = 256
+
+    #: Seconds to wait for outbound queues to send queued replies on
+    #: shutdown.
+    outbound_stop_timeout = 5.0
+
+    #: Max number of processes for `@cmd(executor='process')`.
+    #: Default is number of cpus.
+    process_workers = None
+
+    def __init__(self, name='robo', logger=None, bus=None, **kwargs):
         """Construct a robot.
 
         :param name: Robot name
         :param logger: :class:`logging` Logger
+        :param bus: `blinker`, `direct` or bus instance, see :mod:`robo.bus`
         """
         self.name = name
         #: Trigger robot's name.
@@ -84,6 +236,47 @@ class Robot(object):
         self.adapters = {}
         self.handlers = []
         self.docs = []
+        #: Dispatch index of `handlers`, see `rebuild_index()`.
+        self.index = None
+        #: Rendered and searchable `docs`, rebuilt with dispatch index.
+        self.help_index = None
+        #: Room name to handlers which are eligible in the room.
+        self.room_cache = LRUCache(self.room_cache_size)
+        #: Thread pool executor, see `setup_executor()`.
+        self.executor = None
+        #: Process pool for `@cmd(executor='process')`, started lazily.
+        self.process_executor = None
+        #: Adapter name to outbound queue, see `setup_outbound_queue()`.
+        self.outbound = {}
+        #: Inbound queue, see `setup_inbound_queue()`.
+        self.inbound = None
+        #: Traffic recorder, see `setup_recorder()`.
+        self.recorder = None
+        #: Key value store shared by handlers, see `setup_brain()`.
+        self.brain = None
+        #: Handlers are injected from thread pool in parallel loading.
+        self.brain_lock = threading.Lock()
+        #: Reply routing table, `source` of incoming message to adapter name.
+        self.routes = {}
+        #: Module name to tuple of loader and plugin name, for reloading.
+        self.plugins = OrderedDict()
+        #: Plugin watcher, see `setup_reloader()`.
+        self.reloader = None
+        self.reload_lock = threading.Lock()
+        #: Rooms which this robot dispatches, see `setup_shard()`.
+        self.shard = None
+        #: Throttle of users and rooms, see `setup_throttle()`.
+        self.throttle = None
+        #: Seen messages, see `setup_dedup()`.
+        self.dedup = None
+        self.stats = {
+            'received': 0,
+            'skipped': 0,
+            'duplicated': 0,
+            'throttled': 0,
+            'matched': 0,
+            'replied': 0,
+        }
         self.options = kwargs
 
         if logger is None:
@@ -93,7 +286,7 @@ class Robot(object):
         self.logger = logger
 
         #: Create signals for receive events.
-        self.handler_signal = signal('robo.handler')
+        self.handler_signal = create_bus(bus)
         #: Register subscriber.
         self.handler_signal.connect(self.handler_subscriber, weak=True)
 
@@ -108,9 +301,83 @@ class Robot(object):
         :param sender: Received message
         :param **kwargs: Data to be sent to receivers
         """
+        record_id = self.record(sender, kwargs)
+        if not self.accepts(sender, kwargs):
+            return
+
+        parsed = self.parse_message(sender)
+        if parsed is None or not self.admits(kwargs):
+            return
+
+        message, body = parsed
+        #: Incoming message is shared by all matched handlers.
+        envelope = Envelope(message, kwargs, record_id)
+        for handler, matched in self.match_handlers(body, **kwargs):
+            self.call_handler(envelope, handler, matched, **kwargs)
+
+    def record(self, sender, kwargs):
+        """Record incoming message if recorder is set up.
+
+        Return record id or None. `record_id` sent with replayed message is
+        removed from kwargs, so handlers do not receive it.
+
+        :param sender: Received message
+        :param kwargs: Data to be sent to receivers
+        """
+        record_id = kwargs.pop('record_id', None)
+        if self.recorder is None:
+            return None
+
+        return self.recorder.record(sender, kwargs, record_id)
+
+    def accepts(self, sender, kwargs):
+        """Count incoming message and check this robot should dispatch it.
+
+        Messages from rooms owned by other shards are skipped and messages
+        which were already received are dropped.
+
+        :param sender: Received message
+        :param kwargs: Data to be sent to receivers
+        """
+        stats = self.stats
+        stats['received'] += 1
+        if self.shard is not None and \
+                not self.shard.owns(kwargs.get('room', None)):
+            stats['skipped'] += 1
+            return False
+        if self.dedup is not None and self.dedup.is_duplicate(sender, kwargs):
+            stats['duplicated'] += 1
+            return False
+
+        return True
+
+    def admits(self, kwargs):
+        """Check user and room of message addressed to robot do not exceed
+        rate of throttle.
+
+        Called after robot's name is matched, so messages which are not
+        addressed to robot do not consume tokens, and before matching
+        handlers.
+
+        :param kwargs: Data to be sent to receivers
+        """
+        if self.throttle is None or self.throttle.allow(kwargs):
+            return True
+        self.stats['throttled'] += 1
+
+        return False
+
+    def parse_message(self, sender):
+        """Parse incoming message.
+
+        Return tuple of message and body which robot's name is deleted.
+        If message is not started with robot's name, return None.
+
+        :param sender: Received message
+        """
         if sender is None:
             self.logger.info('Subscribing message is None.')
-            return
+            return None
 
         message = to_unicode(sender)
         message_format = 'Subscribing message is `{0}`'
@@ -119,44 +386,99 @@ class Robot(object):
         #: Message should start with robot's name(default is robo).
         trigger = self.trigger_pattern.match(message)
         if trigger is None:
-            return
+            return None
 
         #: Delete robot's name.
         #: > robo ping
         #: body would be `ping`.
-        body = trigger.group(1)
+        return message, trigger.group(1)
 
-        #: `missing` is called only when any handler doesn't match
-        #: given message.
-        missings = []
-        matched_count = 0
-        unmatched_count = 0
+    def match_handlers(self, body, **kwargs):
+        """List handlers to be triggered by given body.
 
-        handlers = self.handlers
-        for handler in handlers:
-            if 'regex' in handler:
-                if handler['missing'] is True:
-                    missings.append(handler)
-                    continue
+        Return list of tuple of handler and match object in registered
+        order.
+
+        :param body: Message body which robot's name is deleted
+        :param **kwargs: Data to be sent to receivers
+        """
+        index = self.index
+        if index is None or index.size != len(self.handlers):
+            index = self.rebuild_index()
 
-                pattern = handler['regex']
-                matched = pattern.match(body)
-                if matched:
-                    ret = self.trigger_handler(message, handler, matched,
-                                               **kwargs)
-                    if ret is True:
-                        matched_count += 1
+        #: Room eligibility is looked up once per message.
+        eligibles = self.eligible_handlers(kwargs.get('room', None), index)
+
+        rv = []
+        regex_matched_count = 0
+        throttled = False
+        for handler in index.candidates(body):
+            matched = handler.regex.match(body)
+            if matched:
+                regex_matched_count += 1
+                if handler.room is not None and \
+                        id(handler) not in eligibles:
+                    continue
+                if self.is_allowed(handler, kwargs):
+                    rv.append((handler, matched))
                 else:
-                    unmatched_count += 1
+                    throttled = True
+
+        #: `missing` is called only when any handler doesn't match
+        #: given message. Throttled command is not missing.
+        unmatched_count = index.candidate_count - regex_matched_count
+        if not rv and not throttled and unmatched_count > 0:
+            for missing_handler in index.missings:
+                if missing_handler.room is not None and \
+                        id(missing_handler) not in eligibles:
+                    continue
+                matched = missing_handler.regex.match(body)
+                if matched and self.is_allowed(missing_handler, kwargs):
+                    rv.append((missing_handler, matched))
+
+        self.stats['matched'] += len(rv)
+
+        return rv
+
+    def eligible_handlers(self, room, index=None):
+        """Set of ids of room restricted handlers eligible in given room.
+
+        Handlers which have no `room` are always eligible, so they are not
+        contained. Result is cached per room until handlers are changed.
+
+        :param room: Room name
+        :param index: Dispatch index, current index if None
+        """
+        if index is None:
+            index = self.index
+            if index is None or index.size != len(self.handlers):
+                index = self.rebuild_index()
+        if room is None or not index.restricted:
+            return frozenset()
+
+        eligibles = self.room_cache.get(room)
+        if eligibles is None:
+            eligibles = frozenset(id(h) for h in index.restricted
+                                  if h.room.match(room))
+            #: Do not cache handlers which were swapped by reloading.
+            if index is self.index:
+                self.room_cache.set(room, eligibles)
+
+        return eligibles
+
+    def rebuild_index(self):
+        """Rebuild dispatch index from registered handlers.
+
+        Called when handlers are registered, so dispatching a message does
+        not scan all handlers. Cached room eligibility is cleared too.
+        """
+        self.index = HandlerIndex(self.handlers)
+        self.help_index = HelpIndex(self.docs)
+        self.room_cache.clear()
+        self.logger.debug('Dispatch index rebuilt with {0} handlers.'.format(
+            self.index.size))
 
-        if matched_count == 0 and unmatched_count > 0:
-            for missing_handler in missings:
-                if 'regex' in missing_handler:
-                    pattern = missing_handler['regex']
-                    matched = pattern.match(body)
-                    if matched:
-                        self.trigger_handler(message, missing_handler,
-                                             matched, **kwargs)
+        return self.index
 
     def trigger_handler(self, sender, handler, matched, **kwargs):
         """Execute handler class if trigger condition all matched.
@@ -183,143 +505,790 @@ class Robot(object):
         :param matched: :class: `re.match` Matched object
         :param **kwargs: Data to be sent to receivers
         """
-        if handler.get('room', None) is not None:
+        if not self.is_triggerable(handler, **kwargs):
+            return False
+
+        return self.call_handler(sender, handler, matched, **kwargs)
+
+    def is_triggerable(self, handler, **kwargs):
+        """Check incoming message satisfy handler's trigger condition.
+
+        :param handler: Handler
+        :param **kwargs: Data to be sent to receivers
+        """
+        if handler.room is not None:
             #: Exit if handler method decorated with `room`,
             #: but incoming message not contained `room` or `room` is not
             #: matched.
-            if kwargs.get('room', None) is None:
+            room = kwargs.get('room', None)
+            if room is None:
                 return False
 
-            if not handler['room'].match(kwargs.get('room')):
+            if id(handler) not in self.eligible_handlers(room):
                 return False
 
-        method = handler['method']
-        instance = handler['instance']
-        if hasattr(instance, method):
-            obj = getattr(instance, method)
-            if instance.__module__ == 'robo.handlers.help':
-                kwargs['docs'] = self.docs
+        return True
 
-            send_to = '{0}.{1}'.format(instance.__module__, method)
-            message = Message(sender, match=matched,
-                              send_to=send_to, **kwargs)
+    def is_allowed(self, handler, kwargs):
+        """Check user and room of incoming message do not exceed handler's
+        rate.
 
-            result = obj(message, **kwargs)
-            #: Notify message to adapter.
-            self.notify_to_adapter(result, **kwargs)
+        Tokens of handler's throttle are consumed only by matched messages.
 
+        :param handler: Handler
+        :param kwargs: Data to be sent to receivers
+        """
+        if handler.throttle is None or handler.throttle.allow(kwargs):
             return True
+        self.stats['throttled'] += 1
 
         return False
 
-    def notify_to_adapter(self, sender, **kwargs):
+    def create_message(self, sender, handler, matched, kwargs):
+        """Create message object for handler.
+
+        `kwargs` is updated, if handler needs registered docs. Help index
+        is passed only by message, so it is not sent to adapters.
+
+        :param sender: Incoming message or :class:`robo.message.Envelope`
+        :param handler: Handler
+        :param matched: :class: `re.match` Matched object
+        :param kwargs: Data to be sent to receivers
+        """
+        docs = None
+        help_index = None
+        if handler.injects_docs:
+            docs = kwargs['docs'] = self.docs
+            help_index = self.help_index
+
+        if not isinstance(sender, Envelope):
+            sender = Envelope(sender, dict(kwargs))
+
+        return Message.view(sender, matched, handler.send_to, docs,
+                            help_index)
+
+    def call_handler(self, sender, handler, matched, **kwargs):
+        """Call handler method and notify result to adapter.
+
+        :param sender: Incoming message
+        :param handler: Handler
+        :param matched: :class: `re.match` Matched object
+        :param **kwargs: Data to be sent to receivers
+        """
+        if handler.func is None and handler.plugin.load() is None:
+            return False
+
+        if handler.coroutine:
+            message = 'Coroutine handler `{0}` needs `robo.aio.AsyncRobot`.'
+            self.logger.error(message.format(handler.send_to))
+            return False
+
+        options = handler.kwargs
+        notify = self.notify_to_adapter
+        if options.get('broadcast', False):
+            notify = partial(notify, broadcast=True)
+        record_id = getattr(sender, 'record_id', None)
+        if record_id is not None:
+            notify = partial(notify, record_id=record_id)
+
+        cache = handler.cache
+        if cache is not None:
+            key = self.cache_key(handler, matched, kwargs)
+            result = cache.get(key)
+            if result is not None:
+                #: Cached reply skips handler call.
+                notify(result, **kwargs)
+                return True
+            notify = partial(self.notify_and_cache, notify, cache, key)
+
+        message = self.create_message(sender, handler, matched, kwargs)
+        if options.get('executor') == 'process':
+            #: Result is notified to adapter when handler finished.
+            if self.process_executor is None:
+                self.process_executor = self.create_process_executor()
+            self.process_executor.submit(handler.instance, handler.method,
+                                         message, kwargs, notify=notify)
+            return True
+
+        if self.executor is not None:
+            #: Result is notified to adapter when handler finished.
+            max_concurrency = options.get('max_concurrency')
+            self.executor.submit(handler.send_to, handler.func, (message,),
+                                 kwargs,
+                                 max_concurrency=max_concurrency,
+                                 timeout=options.get('timeout'),
+                                 notify=notify)
+            return True
+
+        result = handler.func(message, **kwargs)
+        #: Notify message to adapter.
+        notify(result, **kwargs)
+
+        return True
+
+    def cache_key(self, handler, matched, kwargs):
+        """Result cache key of handler.
+
+        Key is groups of matched object, and room if handler was decorated
+        with `cache_room=True`.
+
+        :param handler: Handler
+        :param matched: :class: `re.match` Matched object
+        :param kwargs: Data to be sent to receivers
+        """
+        key = matched.groups()
+        if handler.kwargs.get('cache_room', False):
+            key = (kwargs.get('room', None),) + key
+
+        return key
+
+    def notify_and_cache(self, notify, cache, key, sender, **kwargs):
+        """Cache result of handler and notify it.
+
+        None is not cached, handler which failed returns None.
+
+        :param notify: Function to notify result
+        :param cache: :class:`robo.cache.TTLCache`
+        :param key: Cache key
+        :param sender: Result of handler
+        :param **kwargs: Data to be sent to receivers
+        """
+        if sender is not None:
+            cache.set(key, sender)
+        notify(sender, **kwargs)
+
+    def notify_to_adapter(self, sender, broadcast=False, record_id=None,
+                          **kwargs):
         """Notify message to adapter.
 
+        Message is sent only to adapter which received incoming message.
+        If `broadcast` is True or adapter is unknown, message is sent to
+        all adapters.
+
         :param sender: Message
+        :param broadcast: Notify to all adapters
+        :param record_id: Record id of incoming message
         :param **kwargs: Data to be sent to receivers
         """
-        #: Notify to all adapters.
         if sender is None:
             return
+        self.stats['replied'] += 1
+        if self.recorder is not None:
+            self.recorder.record_reply(sender, kwargs, record_id)
         adapters = self.adapters
+        outbound = self.outbound
         message_format = 'Notify `{0}` to `{1}.`'
-        for name in adapters:
+        for name in self.route(broadcast, **kwargs):
             self.logger.debug(message_format.format(sender.encode('utf-8'),
                               name))
-            adapters[name].say(sender, **kwargs)
+            if name in outbound:
+                outbound[name].put(sender, **kwargs)
+            else:
+                adapters[name].say(sender, **kwargs)
+
+    def route(self, broadcast=False, **kwargs):
+        """List adapter names to notify.
+
+        Adapters send `source` with incoming message, reply is routed to
+        the adapter registered with the `source`.
+
+        :param broadcast: Notify to all adapters
+        :param **kwargs: Data to be sent to receivers
+        """
+        if not broadcast:
+            name = self.routes.get(kwargs.get('source', None))
+            if name is not None and name in self.adapters:
+                return (name,)
 
-    def setup_handlers(self, paths, package='robo.handlers'):
+        #: Notify to all adapters.
+        return list(self.adapters)
+
+    def setup_inbound_queue(self, **kwargs):
+        """Setup bounded queue between adapters and dispatcher.
+
+        Adapters only queue incoming messages, and background worker
+        dispatches them. When queue is full, adapters are blocked or
+        messages are shed by `policy`.
+
+        :param **kwargs: Options of :class:`robo.inbound.InboundQueue`
+        """
+        from robo.inbound import InboundQueue
+        kwargs.setdefault('logger', self.logger)
+        self.inbound = InboundQueue(self.handler_subscriber, **kwargs)
+        self.handler_signal.disconnect(self.handler_subscriber)
+        self.handler_signal.connect(self.enqueue, weak=True)
+        self.logger.debug('Inbound queue set up.')
+
+        return self.inbound
+
+    def enqueue(self, sender, **kwargs):
+        """Subscriber which queues incoming message to inbound queue.
+
+        :param sender: Received message
+        :param **kwargs: Data to be sent to receivers
+        """
+        self.inbound.put(sender, **kwargs)
+
+    def stop_inbound_queue(self):
+        """Dispatch queued messages and subscribe signal directly again. """
+        if self.inbound is None:
+            return
+
+        self.handler_signal.disconnect(self.enqueue)
+        self.inbound.stop()
+        self.inbound = None
+        self.handler_signal.connect(self.handler_subscriber, weak=True)
+
+    def setup_outbound_queue(self, adapter_name, **kwargs):
+        """Setup outbound send queue of adapter.
+
+        Replies to the adapter are sent by background worker with rate
+        limit, consecutive replies to the same room are merged.
+
+        :param adapter_name: Adapter name
+        :param **kwargs: Options of :class:`robo.outbound.OutboundQueue`
+        """
+        from robo.outbound import OutboundQueue
+        kwargs.setdefault('logger', self.logger)
+        queue = OutboundQueue(self.adapters[adapter_name], **kwargs)
+        self.outbound[adapter_name] = queue
+        self.logger.debug('Outbound queue of `{0}` set up.'.format(
+            adapter_name))
+
+        return queue
+
+    def setup_shard(self, index, count):
+        """Dispatch only messages from rooms owned by the shard.
+
+        Adapters which have `shard` attribute get the shard, so they can
+        join only owned rooms.
+
+        :param index: Index of this shard
+        :param count: Number of shards
+        """
+        from robo.shard import Shard
+        self.shard = Shard(index, count)
+        for adapter in self.adapters.values():
+            if hasattr(adapter, 'shard'):
+                adapter.shard = self.shard
+        self.logger.debug('Shard {0}/{1} set up.'.format(index, count))
+
+        return self.shard
+
+    def collect_stats(self):
+        """Collect stats of robot, executor and queues.
+
+        Keys of inbound queue, executor, outbound queue and brain stats are
+        prefixed with `inbound.`, `executor.`, `outbound.` and `brain.`.
+        """
+        rv = dict(self.stats)
+        if self.inbound is not None:
+            for key, value in self.inbound.stats.items():
+                rv['inbound.' + key] = value
+        if self.executor is not None:
+            for key, value in self.executor.stats.items():
+                rv['executor.' + key] = value
+        for queue in self.outbound.values():
+            for key, value in queue.stats.items():
+                key = 'outbound.' + key
+                rv[key] = rv.get(key, 0) + value
+        caches = [h.cache for h in self.handlers if h.cache is not None]
+        if caches:
+            rv['cache.hits'] = sum(c.hits for c in caches)
+            rv['cache.misses'] = sum(c.misses for c in caches)
+        if self.brain is not None:
+            for key, value in self.brain.stats.items():
+                rv['brain.' + key] = value
+
+        return rv
+
+    def setup_recorder(self, path):
+        """Record incoming messages and replies to log.
+
+        Log can be replayed by :class:`robo.replay.Replayer`.
+
+        :param path: Log path
+        """
+        from robo.replay import Recorder
+        self.recorder = Recorder(path)
+        self.logger.debug('Recording traffic to `{0}`.'.format(path))
+
+        return self.recorder
+
+    def setup_brain(self, path=':memory:', **kwargs):
+        """Setup key value store injected to handlers as `brain`.
+
+        Should be called before handlers are loaded, in-memory brain is
+        created if handler needs it and brain is not set up.
+
+        :param path: SQLite database path
+        :param **kwargs: Options of :class:`robo.brain.Brain`
+        """
+        from robo.brain import Brain
+        self.brain = Brain(path, logger=self.logger, **kwargs)
+        self.logger.debug('Brain is stored to `{0}`.'.format(path))
+
+        return self.brain
+
+    def setup_dedup(self, window=300.0, maxsize=10000):
+        """Drop messages which were already received.
+
+        Adapter should send `message_id` or `timestamp` with message, see
+        :mod:`robo.dedup`.
+
+        :param window: Seconds to remember received messages
+        :param maxsize: Max number of remembered messages
+        """
+        from robo.dedup import Deduplicator
+        self.dedup = Deduplicator(window, maxsize)
+        message = 'Drop duplicate messages in {0} seconds.'
+        self.logger.debug(message.format(window))
+
+        return self.dedup
+
+    def setup_throttle(self, rate, burst=None, maxsize=10000):
+        """Throttle incoming messages per user and per room.
+
+        Handler can be throttled by its own rate with `@cmd(rate=...)`.
+
+        :param rate: Messages per second of each user and room
+        :param burst: Max number of messages at once, default is `rate` but
+                      at least one message
+        :param maxsize: Max number of users and rooms to be tracked
+        """
+        self.throttle = Throttle(rate, burst, maxsize)
+        message = 'Throttle messages to {0} per second.'
+        self.logger.debug(message.format(rate))
+
+        return self.throttle
+
+    def setup_executor(self, max_workers=4):
+        """Setup thread pool executor for handlers.
+
+        Handlers are run on thread pool instead of adapter's thread.
+        `@cmd(max_concurrency=..., timeout=...)` are effective only when
+        executor is set up.
+
+        :param max_workers: Max number of threads
+        """
+        from robo.executor import HandlerExecutor
+        self.executor = HandlerExecutor(self.notify_to_adapter,
+                                        max_workers=max_workers,
+                                        logger=self.logger)
+        self.logger.debug('Executor with {0} workers set up.'.format(
+            max_workers))
+
+    def create_process_executor(self):
+        """Create process pool executor for CPU bound handlers.
+
+        `robot_name` and `options` are injected to handler instances in
+        worker process.
+        """
+        from robo.executor import ProcessExecutor
+        attrs = {'robot_name': self.name, 'options': self.options}
+
+        return ProcessExecutor(self.notify_to_adapter,
+                               max_workers=self.process_workers,
+                               attrs=attrs, logger=self.logger)
+
+    def setup_handlers(self, paths, package='robo.handlers', lazy=False,
+                       cache_path=None, rescan=False, workers=None):
         """Setup handlers.
 
+        If `lazy` is True, handlers are registered from metadata which is
+        read from source statically, and plugin is imported when one of its
+        handlers first matched. Plugins which can not be analyzed are
+        imported immediately.
+
+        If `cache_path` is given, plugin discovery is cached to the file and
+        only changed plugins are scanned at next startup.
+
+        If `workers` is given, handler classes are instantiated on thread
+        pool. Plugins are still imported one by one in order, and handlers
+        are registered in the same order as serial loading.
+
         :param paths: Handler paths
         :param package: Package name
+        :param lazy: Import plugins lazily
+        :param cache_path: Discovery cache file path
+        :param rescan: Ignore discovery cache and scan all plugins
+        :param workers: Number of threads to instantiate handler classes
         """
         if not isinstance(paths, list):
             paths = [paths]
 
-        handler_base = PluginLoader(package=package)
+        handler_base = PluginLoader(package=package, cache_path=cache_path,
+                                    rescan=rescan)
         handler_names = handler_base.list_plugins(searchpath=paths)
-        for name in handler_names:
-            plugin = handler_base.load_plugin(name)
-            handler_class = getattr(plugin, snakecase_to_pascalcase(name))
-            handler_obj = handler_class()
-            if hasattr(handler_obj, 'signal'):
-                handler_obj.signal = self.handler_signal
-                message = 'Injected signal to handler `{0}`.'
-                self.logger.debug(message.format(handler_class))
-
-            if hasattr(handler_obj, 'robot_name'):
-                handler_obj.robot_name = self.name
-                message = 'Injected robot name to `{0}`.'
-                self.logger.debug(message.format(handler_class))
-
-            if hasattr(handler_obj, 'options'):
-                handler_obj.options = self.options
-                message = 'Injected options to `{0}`.'
-                self.logger.debug(message.format(handler_class))
-
-            #: List all handlers method.
-            methods = self.parse_handler_methods(handler_obj)
-            self.handlers.extend(methods)
-            self.logger.debug('Handler `{0}` loaded.'.format(plugin))
-
-    def parse_handler_methods(self, instance):
+
+        pool = None
+        if workers is not None:
+            from concurrent.futures import ThreadPoolExecutor
+            pool = ThreadPoolExecutor(max_workers=workers)
+
+        def construct(handler_class, elapsed):
+            start = monotonic()
+            handler_obj = self.construct_handler(handler_class)
+
+            return handler_obj, elapsed + monotonic() - start
+
+        started = monotonic()
+        load_times = OrderedDict()
+        loaded = []
+        try:
+            for name in handler_names:
+                module = '{0}.{1}'.format(package, name)
+                self.plugins[module] = (handler_base, name)
+                manifest = handler_base.read_manifest(name) if lazy else None
+                if manifest is not None:
+                    loaded.append((name, manifest, None))
+                    continue
+
+                start = monotonic()
+                handler_class = self.import_handler(handler_base, name)
+                elapsed = monotonic() - start
+                if pool is None:
+                    result = construct(handler_class, elapsed)
+                else:
+                    result = pool.submit(construct, handler_class, elapsed)
+                loaded.append((name, None, result))
+
+            #: Register in order regardless of finished order.
+            for name, manifest, result in loaded:
+                if manifest is not None:
+                    methods = self.parse_manifest(handler_base, name,
+                                                  manifest)
+                    message = 'Handler `{0}` registered lazily.'
+                    self.logger.debug(message.format(name))
+                else:
+                    if pool is not None:
+                        result = result.result()
+                    handler_obj, load_times[name] = result
+                    #: List all handlers method.
+                    methods = self.parse_handler_methods(handler_obj)
+                self.handlers.extend(methods)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self.log_load_times(load_times, monotonic() - started)
+        try:
+            handler_base.save_cache()
+        except (IOError, OSError) as e:
+            self.logger.warning('Failed to write plugin cache: {0}'.format(e))
+        self.rebuild_index()
+
+    def log_load_times(self, load_times, elapsed):
+        """Log time to import and instantiate each plugin, slowest first.
+
+        :param load_times: Plugin name to seconds
+        :param elapsed: Seconds to setup all handlers
+        """
+        if not load_times:
+            return
+
+        lines = ['Loaded {0} handler plugins in {1:.1f} ms.'.format(
+            len(load_times), elapsed * 1000)]
+        for name, seconds in sorted(load_times.items(),
+                                    key=lambda t: t[1], reverse=True):
+            lines.append('  {0}: {1:.1f} ms'.format(name, seconds * 1000))
+        self.logger.info('\n'.join(lines))
+
+    def load_handler(self, loader, name, reload=False):
+        """Import plugin and create handler instance.
+
+        :param loader: :class:`PluginLoader`
+        :param name: Plugin file name
+        :param reload: Import plugin again
+        """
+        handler_class = self.import_handler(loader, name, reload=reload)
+
+        return self.construct_handler(handler_class)
+
+    def import_handler(self, loader, name, reload=False):
+        """Import plugin and return handler class.
+
+        :param loader: :class:`PluginLoader`
+        :param name: Plugin file name
+        :param reload: Import plugin again
+        """
+        if reload:
+            plugin = loader.reload_plugin(name)
+        else:
+            plugin = loader.load_plugin(name)
+        self.logger.debug('Handler `{0}` loaded.'.format(plugin))
+
+        return getattr(plugin, snakecase_to_pascalcase(name))
+
+    def construct_handler(self, handler_class):
+        """Create handler instance and inject robot's properties.
+
+        :param handler_class: Handler class
+        """
+        handler_obj = handler_class()
+        self.inject(handler_obj)
+
+        return handler_obj
+
+    def inject(self, handler_obj):
+        """Inject robot's properties to handler instance.
+
+        :param handler_obj: Handler instance
+        """
+        handler_class = handler_obj.__class__
+        if hasattr(handler_obj, 'signal'):
+            handler_obj.signal = self.handler_signal
+            message = 'Injected signal to handler `{0}`.'
+            self.logger.debug(message.format(handler_class))
+
+        if hasattr(handler_obj, 'robot_name'):
+            handler_obj.robot_name = self.name
+            message = 'Injected robot name to `{0}`.'
+            self.logger.debug(message.format(handler_class))
+
+        if hasattr(handler_obj, 'options'):
+            handler_obj.options = self.options
+            message = 'Injected options to `{0}`.'
+            self.logger.debug(message.format(handler_class))
+
+        if hasattr(handler_obj, 'result_cache'):
+            handler_obj.result_cache = HandlerCache()
+            message = 'Injected result cache to `{0}`.'
+            self.logger.debug(message.format(handler_class))
+
+        if hasattr(handler_obj, 'brain'):
+            with self.brain_lock:
+                if self.brain is None:
+                    self.setup_brain()
+            #: Namespace is plugin name, so reloaded plugin keeps its data.
+            name = handler_class.__module__.split('.')[-1]
+            handler_obj.brain = self.brain.namespace(name)
+            message = 'Injected brain `{0}` to `{1}`.'
+            self.logger.debug(message.format(name, handler_class))
+
+    def parse_handler_methods(self, instance, docs=None):
         """Parse plugin methods.
 
         List all handlers method.
 
         :param instance: Handler instance object
+        :param docs: List to append docs, default is `docs`
         """
         methods = []
         for func_name, func in inspect.getmembers(instance, inspect.ismethod):
             #: Handler's method was decorated with @cmd(),
             if getattr(func, '__robo_event', False):
                 plugin_kwargs = getattr(func, '__robo_kwargs', {})
-                regex = None
-                #: Default regex flag is ignorecase.
-                regex_flags = re.IGNORECASE
-                if 'flags' in plugin_kwargs:
-                    #: Regex flags.
-                    regex_flags = plugin_kwargs['flags']
-                    self.logger.debug('Regex flag is `{0}`'.format(regex_flags))
-
-                if 'regex' in plugin_kwargs:
-                    regex = re.compile(plugin_kwargs['regex'], regex_flags)
-                    self.logger.debug('Regex is `{0}.`'.format(regex.pattern))
-
-                missing = False
-                if 'missing' in plugin_kwargs:
-                    missing = True
-                    self.logger.debug('Missing is `{0}`'.format(missing))
-
-                room = None
-                if 'room' in plugin_kwargs:
-                    room = re.compile(plugin_kwargs['room'], re.IGNORECASE)
-                    self.logger.debug('Room regex is `{0}`.'.format(room))
-
-                #: `description` is for help.
-                #: `> robo help` will show all usages.
-                description = plugin_kwargs['description'] if 'description' in \
-                    plugin_kwargs else ''
-
-                doc = {
-                    'robot_name': self.name,
-                    'description': description,
-                    'pattern': regex.pattern
-                }
-                self.docs.append(doc)
-                method = {
-                    'instance': instance,
-                    'method': func_name,
-                    'kwargs': plugin_kwargs,
-                    'regex': regex,
-                    'room': room,
-                    'missing': missing
-                }
-                methods.append(method)
+                methods.append(self.create_handler(plugin_kwargs, instance,
+                                                   func_name, func,
+                                                   docs=docs))
+        self.attach_caches(instance, methods)
 
         return methods
 
+    def attach_caches(self, instance, handlers):
+        """Let handler instance invalidate result caches of its handlers.
+
+        :param instance: Handler instance object
+        :param handlers: Handlers of the instance
+        """
+        result_cache = getattr(instance, 'result_cache', None)
+        if not isinstance(result_cache, HandlerCache):
+            return
+
+        for handler in handlers:
+            if handler.cache is not None:
+                result_cache.caches[handler.method] = handler.cache
+
+    def parse_manifest(self, loader, name, manifest):
+        """Create handlers which are not imported yet from manifest.
+
+        :param loader: :class:`PluginLoader`
+        :param name: Plugin file name
+        :param manifest: Result of :func:`robo.manifest.read_manifest`
+        """
+        plugin = LazyPlugin(self, loader, name)
+        module = '{0}.{1}'.format(loader.package, name)
+        for method in manifest:
+            handler = self.create_handler(method['kwargs'], None,
+                                          method['method'], None,
+                                          module=module, plugin=plugin,
+                                          coroutine=method['coroutine'])
+            plugin.handlers.append(handler)
+
+        return plugin.handlers
+
+    def create_handler(self, plugin_kwargs, instance, func_name, func,
+                       docs=None, **kwargs):
+        """Create handler from `@cmd()` keyword args and register docs.
+
+        :param plugin_kwargs: Keyword args given to `@cmd()`
+        :param instance: Handler instance object
+        :param func_name: Handler method name
+        :param func: Bound handler method
+        :param docs: List to append docs, default is `docs`
+        :param **kwargs: Keyword args of :class:`robo.dispatch.HandlerSpec`
+        """
+        regex = None
+        #: Default regex flag is ignorecase.
+        regex_flags = re.IGNORECASE
+        if 'flags' in plugin_kwargs:
+            #: Regex flags.
+            regex_flags = plugin_kwargs['flags']
+            self.logger.debug('Regex flag is `{0}`'.format(regex_flags))
+
+        if 'regex' in plugin_kwargs:
+            regex = re.compile(plugin_kwargs['regex'], regex_flags)
+            self.logger.debug('Regex is `{0}.`'.format(regex.pattern))
+
+        missing = False
+        if 'missing' in plugin_kwargs:
+            missing = True
+            self.logger.debug('Missing is `{0}`'.format(missing))
+
+        room = None
+        if 'room' in plugin_kwargs:
+            room = re.compile(plugin_kwargs['room'], re.IGNORECASE)
+            self.logger.debug('Room regex is `{0}`.'.format(room))
+
+        #: `description` is for help.
+        #: `> robo help` will show all usages.
+        description = plugin_kwargs['description'] if 'description' in \
+            plugin_kwargs else ''
+
+        cache = None
+        if 'cache_ttl' in plugin_kwargs or 'cache_size' in plugin_kwargs:
+            cache = TTLCache(plugin_kwargs.get('cache_size', 128),
+                             plugin_kwargs.get('cache_ttl', None))
+
+        throttle = None
+        if 'rate' in plugin_kwargs:
+            throttle = Throttle(plugin_kwargs['rate'],
+                                plugin_kwargs.get('burst', None))
+
+        doc = {
+            'robot_name': self.name,
+            'description': description,
+            'pattern': regex.pattern
+        }
+        if docs is None:
+            docs = self.docs
+        docs.append(doc)
+
+        return HandlerSpec(instance, func_name, func, plugin_kwargs, regex,
+                           room=room, missing=missing, cache=cache,
+                           throttle=throttle, **kwargs)
+
+    def reload_plugin(self, module):
+        """Import changed plugin again and swap its handlers.
+
+        Handlers and docs are replaced at once, and only entries of the
+        plugin are updated in dispatch index. Messages being dispatched
+        finish with old handlers. If plugin fails to import, old handlers
+        are kept.
+
+        Old handler instance's `shutdown` is called after swapped, and
+        process pool is restarted because its workers hold instances of old
+        code.
+
+        :param module: Module name of plugin
+        """
+        loader, name = self.plugins[module]
+        with self.reload_lock:
+            try:
+                instance = self.load_handler(loader, name, reload=True)
+            except Exception as e:
+                message = 'Failed to reload `{0}`, keep old handlers: {1}'
+                self.logger.error(message.format(module, e))
+                return False
+
+            docs = []
+            methods = self.parse_handler_methods(instance, docs)
+            removed = self.swap_handlers(module, methods, docs)
+
+            if self.process_executor is not None:
+                #: New pool is started when next handler is submitted.
+                self.process_executor.shutdown(wait=False)
+
+        self.shutdown_handlers(removed)
+        self.logger.info('Handler `{0}` reloaded.'.format(module))
+
+        return True
+
+    def swap_handlers(self, module, methods, docs):
+        """Replace handlers of plugin with new ones.
+
+        New lists are assigned instead of updating lists in place, so
+        readers always see consistent handlers.
+        Return removed handlers.
+
+        :param module: Module name of plugin
+        :param methods: New handlers
+        :param docs: Docs of new handlers
+        """
+        handlers = self.handlers
+        prefix = module + '.'
+        positions = [i for i, h in enumerate(handlers)
+                     if h.send_to.startswith(prefix)
+                     and '.' not in h.send_to[len(prefix):]]
+        if positions:
+            start, end = positions[0], positions[-1] + 1
+        else:
+            start = end = len(handlers)
+
+        removed = handlers[start:end]
+        new_handlers = handlers[:start] + methods + handlers[end:]
+        new_docs = self.docs[:start] + docs + self.docs[end:]
+
+        index = self.index
+        if index is not None and index.size == len(handlers):
+            index = index.replace(new_handlers, removed, methods)
+        else:
+            index = HandlerIndex(new_handlers)
+
+        self.handlers = new_handlers
+        self.docs = new_docs
+        self.index = index
+        self.help_index = HelpIndex(new_docs)
+        self.room_cache.clear()
+
+        return removed
+
+    def shutdown_handlers(self, handlers):
+        """Call `shutdown` of handler instances once per instance.
+
+        :param handlers: Handlers
+        """
+        instances = []
+        for handler in handlers:
+            instance = handler.instance
+            #: Handlers which are not imported yet are skipped.
+            if instance is None or \
+                    any(instance is i for i in instances):
+                continue
+            instances.append(instance)
+            if not hasattr(instance, 'shutdown'):
+                continue
+            try:
+                instance.shutdown()
+            except Exception:
+                message = 'Failed to shutdown `{0}`.'
+                self.logger.exception(message.format(handler.send_to))
+
+    def setup_reloader(self, interval=1.0):
+        """Watch plugin sources and reload changed plugins.
+
+        inotify is used if `inotify_simple` is installed, otherwise sources
+        are polled every `interval` seconds.
+
+        :param interval: Polling interval seconds
+        """
+        from robo.reloader import Reloader
+        self.reloader = Reloader(self, interval=interval, logger=self.logger)
+        self.reloader.start()
+
+        return self.reloader
+
     def load_adapter(self, adapter_name, package='robo.adapters'):
         """Setup adapters.
 
@@ -330,7 +1299,13 @@ class Robot(object):
         plugin = adapter_base.load_plugin(adapter_name)
         adapter_class = getattr(plugin, snakecase_to_pascalcase(adapter_name))
         #: Register signal instance to adapter class.
-        self.adapters[adapter_name] = adapter_class(self.handler_signal)
+        adapter = adapter_class(self.handler_signal)
+        if self.shard is not None and hasattr(adapter, 'shard'):
+            adapter.shard = self.shard
+        self.adapters[adapter_name] = adapter
+        #: Replies to message from the adapter are routed to the adapter.
+        source = getattr(adapter, 'source', adapter_name)
+        self.routes[source] = adapter_name
         self.logger.debug('Adapter `{0}` loaded.'.format(plugin))
 
     def register_default_handlers(self):
@@ -348,10 +1323,35 @@ class Robot(object):
 
         If handler has shutdown method, call it.
         """
-        handlers = self.handlers
-        for handler in handlers:
-            if hasattr(handler['instance'], 'shutdown'):
-                handler['instance'].shutdown()
+        if self.reloader is not None:
+            self.reloader.stop()
+            self.reloader = None
+
+        #: Dispatch queued messages before stopping executors.
+        self.stop_inbound_queue()
+
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+        if self.process_executor is not None:
+            self.process_executor.shutdown()
+            self.process_executor = None
+
+        #: Stop after handlers finished, queued replies are sent.
+        for name in list(self.outbound):
+            self.outbound.pop(name).stop(self.outbound_stop_timeout)
+
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+        self.shutdown_handlers(self.handlers)
+
+        #: Closed after handlers, values written on shutdown are flushed.
+        if self.brain is not None:
+            self.brain.close()
+            self.brain = None
 
     def run(self, adapter_name):
         """Run robot.
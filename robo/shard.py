@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.shard
+    ~~~~~~~~~~
+
+    Split rooms to worker processes.
+
+    Each room is owned by one shard chosen by stable hash of room name, so
+    every worker process agrees on the owner without coordination.
+
+    >>> shard = Shard(0, 4)
+    >>> rooms = shard.filter(['general@conference.example.com',
+    ...                       'random@conference.example.com'])
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import zlib
+
+
+def shard_of(room, count):
+    """Return shard index which owns the room.
+
+    `zlib.crc32()` is used instead of `hash()`, because `hash()` of text is
+    randomized per process.
+
+    :param room: Room name
+    :param count: Number of shards
+    """
+    key = room.strip().lower().encode('utf-8')
+
+    return (zlib.crc32(key) & 0xffffffff) % count
+
+
+class Shard(object):
+    def __init__(self, index, count):
+        """Construct a shard.
+
+        :param index: Index of this shard, 0 to `count` - 1
+        :param count: Number of shards
+        """
+        if not 0 <= index < count:
+            raise ValueError('Shard index should be 0 to {0}.'.format(
+                count - 1))
+        self.index = index
+        self.count = count
+
+    def owns(self, room):
+        """Return True if the room is owned by this shard.
+
+        Messages which are not sent to room, like direct messages, are
+        owned by the first shard.
+
+        :param room: Room name or None
+        """
+        if room is None:
+            return self.index == 0
+
+        return shard_of(room, self.count) == self.index
+
+    def filter(self, rooms):
+        """List rooms owned by this shard.
+
+        :param rooms: List of room names
+        """
+        return [room for room in rooms if self.owns(room)]
+
+    def __repr__(self):
+        return '<Shard {0}/{1}>'.format(self.index, self.count)
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.supervisor
+    ~~~~~~~~~~~~~~~
+
+    Run room sharded robots in worker processes.
+
+    Supervisor starts one worker process per shard, restarts dead workers
+    and merges stats reported by workers.
+
+    >>> def worker(shard, reporter):
+    >>>     robot = Robot('robo')
+    >>>     robot.setup_shard(shard.index, shard.count)
+    >>>     robot.register_default_handlers()
+    >>>     robot.load_adapter('slack')
+    >>>     reporter.start(robot)
+    >>>     robot.run('slack')
+    >>>
+    >>> Supervisor(worker, 4).run()
+
+    `worker` should be picklable, module level function.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import logging
+import threading
+import multiprocessing
+from robo.shard import Shard
+from robo._compat import monotonic
+
+try:
+    from queue import Empty
+except ImportError:
+    #: Python2.
+    from Queue import Empty
+
+
+def merge_stats(stats):
+    """Sum stats of workers by key.
+
+    Stats whose name starts with `max_`, like `inbound.max_depth`, are
+    merged to the largest value instead of total.
+
+    :param stats: List of stats dict
+    """
+    rv = {}
+    for worker_stats in stats:
+        for key, value in worker_stats.items():
+            if key not in rv:
+                rv[key] = value
+            elif key.rsplit('.', 1)[-1].startswith('max_'):
+                rv[key] = max(rv[key], value)
+            else:
+                rv[key] += value
+
+    return rv
+
+
+class StatsReporter(object):
+    def __init__(self, index, queue, interval=10.0):
+        """Construct a reporter which sends stats to supervisor.
+
+        :param index: Shard index of worker
+        :param queue: :class:`multiprocessing.Queue`
+        :param interval: Report interval seconds
+        """
+        self.index = index
+        self.queue = queue
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def report(self, robot):
+        """Send stats of robot to supervisor.
+
+        :param robot: :class:`robo.robot.Robot`
+        """
+        self.queue.put((self.index, robot.collect_stats()))
+
+    def start(self, robot):
+        """Report stats every `interval` seconds in background thread.
+
+        :param robot: :class:`robo.robot.Robot`
+        """
+        def run():
+            while not self.stopped.wait(self.interval):
+                self.report(robot)
+
+        self.thread = threading.Thread(target=run, name='robo-stats')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+
+def run_worker(target, shard, queue, interval, args):
+    """Entry point of worker process.
+
+    :param target: Worker function
+    :param shard: :class:`robo.shard.Shard`
+    :param queue: Stats queue
+    :param interval: Report interval seconds
+    :param args: Extra args of worker function
+    """
+    reporter = StatsReporter(shard.index, queue, interval)
+    try:
+        target(shard, reporter, *args)
+    finally:
+        reporter.stop()
+
+
+class Supervisor(object):
+    def __init__(self, target, workers, args=(), interval=1.0,
+                 report_interval=10.0, logger=None):
+        """Construct a supervisor.
+
+        :param target: Worker function called with shard, reporter and args
+        :param workers: Number of worker processes
+        :param args: Extra args of worker function
+        :param interval: Seconds to check workers
+        :param report_interval: Seconds to report stats from workers
+        :param logger: :class:`logging` Logger
+        """
+        self.target = target
+        self.workers = workers
+        self.args = tuple(args)
+        self.interval = interval
+        self.report_interval = report_interval
+        self.logger = logger or logging.getLogger('robo')
+        self.queue = multiprocessing.Queue()
+        #: Shard index to worker process.
+        self.processes = {}
+        #: Shard index to latest reported stats.
+        self.worker_stats = {}
+        #: Stats of workers which were died, not to lose counts.
+        self.dead_stats = {}
+        self.restarts = 0
+        self.stopped = threading.Event()
+
+    def spawn(self, index):
+        """Start worker process of the shard.
+
+        :param index: Shard index
+        """
+        shard = Shard(index, self.workers)
+        process = multiprocessing.Process(
+            target=run_worker, name='robo-shard-{0}'.format(index),
+            args=(self.target, shard, self.queue, self.report_interval,
+                  self.args))
+        process.start()
+        self.processes[index] = process
+        self.logger.info('Worker of {0} started, pid {1}.'.format(
+            shard, process.pid))
+
+        return process
+
+    def start(self):
+        """Start all workers. """
+        for index in range(self.workers):
+            self.spawn(index)
+
+    def collect(self):
+        """Receive stats reported by workers. """
+        while True:
+            try:
+                index, stats = self.queue.get_nowait()
+            except Empty:
+                break
+            self.worker_stats[index] = stats
+
+    def check(self):
+        """Restart dead workers.
+
+        Return list of restarted shard indexes.
+        """
+        self.collect()
+        rv = []
+        for index, process in list(self.processes.items()):
+            if process.is_alive() or self.stopped.is_set():
+                continue
+            message = 'Worker of shard {0} died with exit code {1}.'
+            self.logger.warning(message.format(index, process.exitcode))
+            process.join()
+            #: Counters of new worker start from zero.
+            stats = self.worker_stats.pop(index, {})
+            self.dead_stats = merge_stats([self.dead_stats, stats])
+            self.restarts += 1
+            self.spawn(index)
+            rv.append(index)
+
+        return rv
+
+    def stats(self):
+        """Merge stats of all workers. """
+        self.collect()
+        rv = merge_stats([self.dead_stats] + list(self.worker_stats.values()))
+        rv['workers'] = len([p for p in self.processes.values()
+                             if p.is_alive()])
+        rv['restarts'] = self.restarts
+
+        return rv
+
+    def run(self):
+        """Start workers and supervise until `stop()` is called. """
+        self.start()
+        reported = monotonic()
+        try:
+            while not self.stopped.wait(self.interval):
+                self.check()
+                if monotonic() - reported >= self.report_interval:
+                    reported = monotonic()
+                    stats = sorted(self.stats().items())
+                    self.logger.info('Stats: {0}'.format(', '.join(
+                        '{0}={1}'.format(k, v) for k, v in stats)))
+        finally:
+            self.stop()
+
+    def stop(self, timeout=5.0):
+        """Stop all workers.
+
+        :param timeout: Seconds to wait each worker
+        """
+        self.stopped.set()
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes.values():
+            process.join(timeout)
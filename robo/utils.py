@@ -9,6 +9,7 @@
     :copyright: (c) 2014 Shinya Ohyanagi, All rights reserved.
     :license: BSD, see LICENSE for more details.
 """
+import pickle
 
 
 def snakecase_to_pascalcase(value):
@@ -26,3 +27,32 @@ def snakecase_to_pascalcase(value):
     items = value.split('_')
 
     return items[0].capitalize() + ''.join(x.title() for x in items[1:])
+
+
+def percentile(values, ratio):
+    """Nearest rank percentile.
+
+    :param values: Sorted values
+    :param ratio: 0.0 - 1.0
+    """
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(ratio * (len(values) - 1))))
+
+    return values[index]
+
+
+def picklable(kwargs):
+    """Drop values which can not be pickled.
+
+    :param kwargs: Dict
+    """
+    rv = {}
+    for key, value in kwargs.items():
+        try:
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            continue
+        rv[key] = value
+
+    return rv
@@ -12,7 +12,8 @@
 import os
 from setuptools import setup, find_packages
 
-requires = ['blinker']
+#: `concurrent.futures` is backported to Python2 by `futures`.
+requires = ['blinker', 'futures; python_version < "3"']
 
 app_name = 'robo'
 
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.benchmarks.dispatch
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Micro benchmark of dispatch path.
+
+    Generate synthetic handler modules and push messages through
+    `Robot.handler_subscriber()` with `Null` adapter.
+
+    If bus is given, messages are sent through the bus like adapters do,
+    so overhead of the bus is included.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import sys
+import gc
+import time
+import random
+import shutil
+import logging
+import platform
+import tempfile
+from robo.robot import Robot
+from robo.utils import percentile, snakecase_to_pascalcase
+
+try:
+    import tracemalloc
+except ImportError:
+    #: Python2 does not have tracemalloc.
+    tracemalloc = None
+
+timer = getattr(time, 'perf_counter', time.time)
+
+#: Number of handler methods per generated module.
+METHODS_PER_MODULE = 50
+
+#: Rooms of generated messages.
+ROOMS = ['@general', '@random', '@dev', '@ops', '@bench']
+
+
+def handler_kind(i):
+    """Kind of i-th generated handler.
+
+    60% literal, 20% regex, 15% room, 5% missing.
+
+    :param i: Handler number
+    """
+    kind = i % 20
+    if kind < 12:
+        return 'literal'
+    if kind < 16:
+        return 'regex'
+    if kind < 19:
+        return 'room'
+
+    return 'missing'
+
+
+def handler_source(i):
+    """Source of i-th generated handler method.
+
+    :param i: Handler number
+    """
+    kind = handler_kind(i)
+    if kind == 'literal':
+        decorator = "@cmd(regex=r'^cmd{0}\\b', description='literal')"
+    elif kind == 'regex':
+        decorator = "@cmd(regex=r'(?:run|exec)\\s+job{0}$')"
+    elif kind == 'room':
+        decorator = "@cmd(regex=r'^deploy{0}\\b', room=r'^@{1}')"
+    else:
+        decorator = "@cmd(regex=r'.+job{0}', missing=True)"
+
+    lines = [
+        '    ' + decorator.format(i, ROOMS[i % len(ROOMS)][1:]),
+        '    def handler{0}(self, message, **kwargs):'.format(i),
+        "        return 'handler{0}'".format(i),
+        '',
+    ]
+
+    return '\n'.join(lines)
+
+
+def generate_handlers(path, package, count):
+    """Generate handler modules.
+
+    :param path: Directory to write modules
+    :param package: Package name
+    :param count: Number of handler methods
+    """
+    package_path = os.path.join(path, package)
+    os.makedirs(package_path)
+    with open(os.path.join(package_path, '__init__.py'), 'w') as f:
+        f.write('')
+
+    for start in range(0, count, METHODS_PER_MODULE):
+        name = 'bench{0:05d}'.format(start)
+        lines = [
+            '# -*- coding: utf-8 -*-',
+            'from robo.decorators import cmd',
+            '',
+            '',
+            'class {0}(object):'.format(snakecase_to_pascalcase(name)),
+        ]
+        end = min(start + METHODS_PER_MODULE, count)
+        lines.extend(handler_source(i) for i in range(start, end))
+        with open(os.path.join(package_path, name + '.py'), 'w') as f:
+            f.write('\n'.join(lines))
+
+    return package_path
+
+
+def generate_messages(name, count, handlers, seed=0):
+    """Generate messages.
+
+    Messages are mix of literal hit, regex hit, room hit and miss.
+
+    :param name: Robot name
+    :param count: Number of messages
+    :param handlers: Number of handler methods
+    :param seed: Random seed
+    """
+    rand = random.Random(seed)
+    rv = []
+    for _ in range(count):
+        i = rand.randrange(handlers)
+        kind = handler_kind(i)
+        room = rand.choice(ROOMS)
+        if rand.random() < 0.2:
+            body = 'unknown command {0}'.format(i)
+        elif kind == 'literal':
+            body = 'cmd{0} foo'.format(i)
+        elif kind == 'regex':
+            body = 'run job{0}'.format(i)
+        elif kind == 'room':
+            body = 'deploy{0} now'.format(i)
+        else:
+            body = 'missing job{0}'.format(i)
+        rv.append(('{0} {1}'.format(name, body), room))
+
+    return rv
+
+
+class DispatchBenchmark(object):
+    def __init__(self, handlers, messages=2000, name='bench', seed=0,
+                 bus=None):
+        """Construct a benchmark.
+
+        :param handlers: Number of handler methods
+        :param messages: Number of messages
+        :param name: Robot name
+        :param seed: Random seed
+        :param bus: Bus name, call subscriber directly if None
+        """
+        self.handlers = handlers
+        self.messages = messages
+        self.name = name
+        self.seed = seed
+        self.bus = bus
+        self.path = None
+        self.package = None
+
+    def setup(self):
+        """Generate handler modules. """
+        self.path = tempfile.mkdtemp(prefix='robo-bench-')
+        self.package = 'robo_bench_{0}_{1}'.format(self.handlers, os.getpid())
+        generate_handlers(self.path, self.package, self.handlers)
+        sys.path.insert(0, self.path)
+
+    def teardown(self):
+        """Remove generated modules. """
+        sys.path.remove(self.path)
+        for name in list(sys.modules):
+            if name == self.package or name.startswith(self.package + '.'):
+                del sys.modules[name]
+        shutil.rmtree(self.path)
+
+    def create_robot(self):
+        logger = logging.getLogger('robo.bench')
+        logger.setLevel(logging.CRITICAL)
+        #: Robots of former benchmarks should not receive blinker signal.
+        gc.collect()
+        robot = Robot(self.name, logger, bus=self.bus)
+        robot.setup_handlers(os.path.join(self.path, self.package),
+                             self.package)
+        robot.load_adapter('null', 'tests.fixtures.adapters')
+
+        return robot
+
+    def dispatch(self, robot, messages, latencies=None):
+        """Push messages through `Robot.handler_subscriber()`.
+
+        :param robot: Robot
+        :param messages: List of tuple of message and room
+        :param latencies: List to append each latency
+        """
+        subscriber = robot.handler_subscriber
+        if self.bus is not None:
+            subscriber = robot.handler_signal.send
+        responses = robot.adapters['null'].responses
+        for message, room in messages:
+            start = timer()
+            subscriber(message, room=room, source='null')
+            if latencies is not None:
+                latencies.append(timer() - start)
+            del responses[:]
+
+    def measure_memory(self, messages):
+        """Peak memory of setting up handlers and dispatching messages.
+
+        :param messages: List of tuple of message and room
+        """
+        if tracemalloc is None:
+            return None
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            robot = self.create_robot()
+            self.dispatch(robot, messages)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return peak
+
+    def run(self):
+        """Run benchmark and return result. """
+        self.setup()
+        try:
+            messages = generate_messages(self.name, self.messages,
+                                         self.handlers, self.seed)
+            robot = self.create_robot()
+            #: Warm up caches.
+            self.dispatch(robot, messages[:100])
+
+            latencies = []
+            gc.disable()
+            try:
+                start = timer()
+                self.dispatch(robot, messages, latencies)
+                elapsed = timer() - start
+            finally:
+                gc.enable()
+            peak = self.measure_memory(messages)
+        finally:
+            self.teardown()
+
+        latencies.sort()
+        return {
+            'handlers': self.handlers,
+            'bus': self.bus,
+            'messages': self.messages,
+            'messages_per_second': self.messages / elapsed if elapsed else 0,
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'peak_memory_kb': peak / 1024.0 if peak is not None else None,
+        }
+
+
+def environment():
+    """Describe benchmark environment. """
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def run_benchmarks(sizes, messages=2000, seed=0, buses=(None,)):
+    """Run benchmarks for each number of handlers and bus.
+
+    :param sizes: List of number of handlers
+    :param messages: Number of messages per benchmark
+    :param seed: Random seed
+    :param buses: List of bus names, None calls subscriber directly
+    """
+    results = []
+    for size in sizes:
+        for bus in buses:
+            benchmark = DispatchBenchmark(size, messages=messages, seed=seed,
+                                          bus=bus)
+            results.append(benchmark.run())
+
+    return {'environment': environment(), 'results': results}
+
+
+def compare(current, baseline):
+    """Compare results with baseline.
+
+    Return list of tuple of number of handlers, metric name, baseline value,
+    current value and ratio. Metric name is prefixed with bus name if
+    messages were sent through bus.
+
+    :param current: Benchmark result
+    :param baseline: Baseline benchmark result
+    """
+    metrics = ('messages_per_second', 'p50_ms', 'p99_ms', 'peak_memory_kb')
+    baselines = dict(((r['handlers'], r.get('bus')), r)
+                     for r in baseline['results'])
+    rv = []
+    for result in current['results']:
+        bus = result.get('bus')
+        base = baselines.get((result['handlers'], bus))
+        if base is None:
+            continue
+        for metric in metrics:
+            before = base.get(metric)
+            after = result.get(metric)
+            if not before or after is None:
+                continue
+            name = metric if bus is None else '{0}.{1}'.format(bus, metric)
+            rv.append((result['handlers'], name, before, after,
+                       after / before))
+
+    return rv
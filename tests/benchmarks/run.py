@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.benchmarks.run
+    ~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Run dispatch benchmarks.
+
+    $ python tests/benchmarks/run.py -o after.json -b before.json
+    $ python tests/benchmarks/run.py -n 100 --bus blinker direct
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+
+import json  # noqa E402
+import argparse  # noqa E402
+from tests.benchmarks.dispatch import compare, run_benchmarks  # noqa E402
+
+#: Default number of handlers.
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+
+#: Buses to send messages through.
+DEFAULT_BUSES = ['none', 'blinker', 'direct']
+
+
+def print_results(results):
+    """Print results as table.
+
+    :param results: Benchmark results
+    """
+    header = '{0:>8} {1:>8} {2:>12} {3:>10} {4:>10} {5:>12}'
+    row = '{0:>8} {1:>8} {2:>12.1f} {3:>10.4f} {4:>10.4f} {5:>12}'
+    print(header.format('handlers', 'bus', 'messages/s', 'p50 ms', 'p99 ms',
+                        'peak KiB'))
+    for r in results['results']:
+        peak = r['peak_memory_kb']
+        peak = '{0:.1f}'.format(peak) if peak is not None else '-'
+        print(row.format(r['handlers'], r.get('bus') or '-',
+                         r['messages_per_second'], r['p50_ms'], r['p99_ms'],
+                         peak))
+
+
+def print_comparison(comparison):
+    """Print comparison with baseline.
+
+    :param comparison: Result of `compare()`
+    """
+    row = '{0:>8} {1:>20} {2:>12.4f} {3:>12.4f} {4:>8.2f}x'
+    print('')
+    print('{0:>8} {1:>20} {2:>12} {3:>12} {4:>9}'.format(
+        'handlers', 'metric', 'baseline', 'current', 'ratio'))
+    for item in comparison:
+        print(row.format(*item))
+
+
+def main(args):
+    """Main.
+
+    :param args: :class:`argparse` Args
+    """
+    buses = [None if b == 'none' else b for b in args.bus]
+    results = run_benchmarks(args.handlers, messages=args.messages,
+                             seed=args.seed, buses=buses)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print_comparison(compare(results, baseline))
+
+
+def parse_options():
+    """Parse options. """
+    parser = argparse.ArgumentParser(description='Dispatch benchmarks')
+    parser.add_argument('-n', '--handlers', type=int, nargs='+',
+                        default=DEFAULT_SIZES)
+    parser.add_argument('-m', '--messages', type=int, default=2000)
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('--bus', nargs='+', default=DEFAULT_BUSES,
+                        choices=DEFAULT_BUSES,
+                        help='`none` calls subscriber without bus')
+    parser.add_argument('-o', '--output', help='Write results as JSON')
+    parser.add_argument('-b', '--baseline', help='Compare with JSON results')
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main(parse_options())
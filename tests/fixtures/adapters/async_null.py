@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+class AsyncNull(object):
+    def __init__(self, signal):
+        self.signal = signal
+        self.responses = []
+
+    async def say(self, message, **kwargs):
+        self.responses.append(message)
+        return message
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+class Other(object):
+    source = 'other'
+
+    def __init__(self, signal):
+        self.signal = signal
+        self.responses = []
+
+    def say(self, message, **kwargs):
+        self.responses.append(message)
+        return message
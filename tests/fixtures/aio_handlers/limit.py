@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+import os
+import asyncio
+from robo.decorators import cmd
+
+
+class Limit(object):
+    running = 0
+    max_running = 0
+
+    @cmd(regex=r'^limited$', max_concurrency=1)
+    async def limited(self, message, **kwargs):
+        Limit.running += 1
+        Limit.max_running = max(Limit.max_running, Limit.running)
+        await asyncio.sleep(0.05)
+        Limit.running -= 1
+        return 'limited'
+
+    @cmd(regex=r'^late$', timeout=0.05)
+    async def late(self, message, **kwargs):
+        await asyncio.sleep(1)
+        return 'late'
+
+    @cmd(regex=r'^pid$', executor='process')
+    def pid(self, message, **kwargs):
+        return str(os.getpid())
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+import time
+import asyncio
+from robo.decorators import cmd
+
+
+class Slow(object):
+    @cmd(regex=r'^slow')
+    async def slow_async(self, message, **kwargs):
+        await asyncio.sleep(0.2)
+        return 'slow async'
+
+    @cmd(regex=r'^slow')
+    def slow_sync(self, message, **kwargs):
+        time.sleep(0.2)
+        return 'slow sync'
+
+    @cmd(regex=r'^fast')
+    async def fast(self, message, **kwargs):
+        return 'fast {0}'.format(message.body)
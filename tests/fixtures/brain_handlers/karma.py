@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from robo.decorators import cmd
+
+
+class Karma(object):
+    def __init__(self):
+        self.brain = None
+
+    @cmd(regex=r'^(\w+)\+\+$', description='Increment karma')
+    def plus(self, message, **kwargs):
+        name = message.match.group(1)
+        count = self.brain.get(name, 0) + 1
+        self.brain.set(name, count)
+
+        return '{0}: {1}'.format(name, count)
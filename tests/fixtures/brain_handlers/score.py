@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+from robo.decorators import cmd
+
+
+class Score(object):
+    def __init__(self):
+        self.brain = None
+
+    @cmd(regex=r'^score (\w+)$', description='Show score')
+    def score(self, message, **kwargs):
+        return str(self.brain.get(message.match.group(1), 0))
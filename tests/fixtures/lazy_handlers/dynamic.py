@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+from robo.decorators import cmd
+
+
+class Base(object):
+    @cmd(regex=r'^base$', description='base')
+    def base(self, message, **kwargs):
+        return 'base'
+
+
+class Dynamic(Base):
+    @cmd(regex=r'^dynamic$', description='dynamic')
+    def dynamic(self, message, **kwargs):
+        return 'dynamic'
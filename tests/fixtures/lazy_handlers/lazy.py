@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+import re
+from robo.decorators import cmd
+
+
+class Lazy(object):
+    robot_name = None
+
+    @cmd(regex=r'^lazy$', description='lazy', flags=re.I | re.M)
+    def lazy(self, message, **kwargs):
+        return 'lazy {0}'.format(self.robot_name)
+
+    @cmd(regex=r'^sleepy$', room=r'^@random', description='sleepy')
+    def sleepy(self, message, **kwargs):
+        return 'sleepy'
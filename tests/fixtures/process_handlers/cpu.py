@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+import os
+from robo.decorators import cmd
+
+
+class Cpu(object):
+    robot_name = None
+
+    @cmd(regex=r'^pid$', executor='process')
+    def pid(self, message, **kwargs):
+        return str(os.getpid())
+
+    @cmd(regex=r'^square (?P<number>\d+)$', executor='process')
+    def square(self, message, **kwargs):
+        number = int(message.match.group('number'))
+        return '{0} {1} {2}'.format(self.robot_name, number * number,
+                                    kwargs.get('room'))
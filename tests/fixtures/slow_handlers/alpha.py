@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+import time
+from robo.decorators import cmd
+
+
+class Alpha(object):
+    def __init__(self):
+        #: Warming up takes time.
+        time.sleep(0.3)
+
+    @cmd(regex=r'^alpha$', description='alpha')
+    def alpha(self, message, **kwargs):
+        return 'alpha'
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+import time
+from robo.decorators import cmd
+
+
+class Beta(object):
+    def __init__(self):
+        #: Warming up takes time.
+        time.sleep(0.2)
+
+    @cmd(regex=r'^beta$', description='beta')
+    def beta(self, message, **kwargs):
+        return 'beta'
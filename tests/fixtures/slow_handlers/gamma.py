@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+import time
+from robo.decorators import cmd
+
+
+class Gamma(object):
+    def __init__(self):
+        #: Warming up takes time.
+        time.sleep(0.1)
+
+    @cmd(regex=r'^gamma$', description='gamma')
+    def gamma(self, message, **kwargs):
+        return 'gamma'
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from robo.decorators import cmd
+
+
+class Spam(object):
+    @cmd(regex=r'^spam$', description='spam', rate=0.01)
+    def spam(self, message, **kwargs):
+        return 'spam'
+
+    @cmd(regex=r'^ham$', description='ham')
+    def ham(self, message, **kwargs):
+        return 'ham'
+
+    @cmd(regex=r'^spa\d', description='spa')
+    def spa(self, message, **kwargs):
+        return None
+
+    @cmd(regex=r'.+', missing=True)
+    def unknown(self, message, **kwargs):
+        return 'unknown'
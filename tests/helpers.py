@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.helpers
+    ~~~~~~~~~~~~~~~~~~
+
+    Helpers shared by tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+
+
+class Clock(object):
+    def __init__(self):
+        """Fake clock which returns `now` until test advances it. """
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
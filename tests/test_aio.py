@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_aio
+    ~~~~~~~~~~~~~~~~~~~
+
+    asyncio dispatch mode tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import time
+import logging
+from unittest import TestCase, skipIf
+from robo._compat import PY2
+from robo.robot import Robot
+if not PY2:
+    from robo.aio import AsyncRobot
+
+
+def create_robot():
+    logger = logging.getLogger('robo')
+    logger.level = logging.ERROR
+    robot = AsyncRobot('test', logger)
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'fixtures', 'aio_handlers')
+    robot.setup_handlers(path, 'tests.fixtures.aio_handlers')
+    robot.load_adapter('async_null', 'tests.fixtures.adapters')
+
+    return robot
+
+
+def send(robot, message, **kwargs):
+    for receiver, future in robot.handler_signal.send(message, **kwargs):
+        if receiver == robot.handler_subscriber and future is not None:
+            return future.result(5)
+
+
+@skipIf(PY2, 'asyncio requires Python3')
+class TestAsyncRobot(TestCase):
+    def setUp(self):
+        self.robot = create_robot()
+
+    def tearDown(self):
+        self.robot.shutdown()
+
+    def test_should_await_coroutine_handler(self):
+        """ AsyncRobot should await coroutine handler and notify result. """
+        send(self.robot, 'test fast')
+        self.assertEqual(self.robot.adapters['async_null'].responses,
+                         ['fast test fast'])
+
+    def test_should_run_handlers_concurrently(self):
+        """ AsyncRobot should run sync and async handlers concurrently. """
+        start = time.time()
+        send(self.robot, 'test slow')
+        elapsed = time.time() - start
+        self.assertEqual(sorted(self.robot.adapters['async_null'].responses),
+                         ['slow async', 'slow sync'])
+        self.assertTrue(elapsed < 0.35)
+
+    def test_should_not_schedule_unmatched_message(self):
+        """ AsyncRobot().handler_subscriber() should return None if not matched. """
+        self.assertIsNone(self.robot.handler_subscriber('test unknown'))
+        self.assertIsNone(self.robot.loop)
+
+    def test_should_limit_concurrency(self):
+        """ AsyncRobot should run handler up to max_concurrency at once. """
+        from tests.fixtures.aio_handlers.limit import Limit
+        futures = [self.robot.handler_subscriber('test limited')
+                   for _ in range(3)]
+        for future in futures:
+            future.result(5)
+        self.assertEqual(self.robot.adapters['async_null'].responses,
+                         ['limited'] * 3)
+        self.assertEqual(Limit.max_running, 1)
+
+    def test_should_drop_result_of_timed_out_handler(self):
+        """ AsyncRobot should drop result of handler exceeded timeout. """
+        start = time.time()
+        send(self.robot, 'test late')
+        self.assertTrue(time.time() - start < 0.5)
+        self.assertEqual(self.robot.adapters['async_null'].responses, [])
+
+    def test_should_run_handler_in_worker_process(self):
+        """ AsyncRobot should run executor='process' handler in worker. """
+        send(self.robot, 'test pid')
+        self.assertIsNotNone(self.robot.process_executor)
+        responses = self.robot.adapters['async_null'].responses
+        self.assertEqual(len(responses), 1)
+        self.assertNotEqual(responses[0], str(os.getpid()))
+
+    def test_sync_robot_should_not_call_coroutine_handler(self):
+        """ Robot should not call coroutine handler. """
+        logger = logging.getLogger('robo')
+        logger.level = logging.CRITICAL
+        robot = Robot('sync', logger)
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'fixtures', 'aio_handlers')
+        robot.setup_handlers(path, 'tests.fixtures.aio_handlers')
+        robot.load_adapter('null', 'tests.fixtures.adapters')
+        robot.handler_signal.send('sync fast')
+        self.assertEqual(robot.adapters['null'].responses, [])
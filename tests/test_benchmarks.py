@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_benchmarks
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Benchmark suite tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import sys
+from unittest import TestCase
+from tests.benchmarks.dispatch import (DispatchBenchmark, compare,
+                                       generate_messages, run_benchmarks)
+
+
+class TestDispatchBenchmark(TestCase):
+    def test_should_report_metrics(self):
+        """ DispatchBenchmark().run() should report throughput and latency. """
+        ret = DispatchBenchmark(40, messages=200).run()
+        self.assertEqual(ret['handlers'], 40)
+        self.assertTrue(ret['messages_per_second'] > 0)
+        self.assertTrue(ret['p99_ms'] >= ret['p50_ms'])
+        self.assertFalse(any(m.startswith('robo_bench_') for m in sys.modules))
+
+    def test_should_send_through_bus(self):
+        """ DispatchBenchmark(bus='direct') should send messages via bus. """
+        ret = run_benchmarks([20], messages=50, buses=[None, 'direct'])
+        self.assertEqual([r['bus'] for r in ret['results']], [None, 'direct'])
+        ret = [c for c in compare(ret, ret) if c[1].startswith('direct.')]
+        self.assertTrue(ret)
+
+    def test_generated_handlers_should_respond(self):
+        """ Generated handlers should respond to generated messages. """
+        benchmark = DispatchBenchmark(60)
+        benchmark.setup()
+        try:
+            robot = benchmark.create_robot()
+            self.assertEqual(len(robot.handlers), 60)
+            robot.handler_subscriber('bench cmd0 foo', room='@general')
+            self.assertEqual(robot.adapters['null'].responses, ['handler0'])
+        finally:
+            benchmark.teardown()
+
+    def test_messages_should_be_reproducible(self):
+        """ generate_messages() should generate same messages by seed. """
+        self.assertEqual(generate_messages('bench', 10, 100, seed=1),
+                         generate_messages('bench', 10, 100, seed=1))
+
+    def test_should_compare_with_baseline(self):
+        """ compare() should calculate ratio to baseline. """
+        baseline = run_benchmarks([20], messages=50)
+        baseline['results'][0]['messages_per_second'] = 100.0
+        current = {'results': [dict(baseline['results'][0],
+                                    messages_per_second=150.0)]}
+        ret = [c for c in compare(current, baseline)
+               if c[1] == 'messages_per_second']
+        self.assertEqual(ret, [(20, 'messages_per_second', 100.0, 150.0, 1.5)])
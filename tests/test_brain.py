@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_brain
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Brain tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import time
+import shutil
+import sqlite3
+import logging
+import tempfile
+from unittest import TestCase
+from robo.robot import Robot
+from robo.brain import Brain
+
+
+class TestBrain(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'brain.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_should_buffer_writes(self):
+        """ Brain().set() should be read before flushed. """
+        brain = Brain(self.path, flush_interval=60)
+        brain.set('karma', 'alice', 1)
+        brain.set('karma', 'alice', 2)
+        brain.set('other', 'alice', {'a': [1]})
+        self.assertEqual(brain.get('karma', 'alice'), 2)
+        self.assertEqual(brain.get('other', 'alice'), {'a': [1]})
+        self.assertEqual(brain.stats['flushes'], 0)
+        self.assertEqual(brain.flush(), 2)
+        self.assertEqual(brain.get('karma', 'alice'), 2)
+        #: Values are cached when flushed.
+        self.assertEqual(brain.stats['reads'], 0)
+        brain.close()
+
+    def test_should_persist_values(self):
+        """ Brain().close() should flush values to database. """
+        brain = Brain(self.path, flush_interval=60)
+        namespace = brain.namespace('karma')
+        namespace.set('alice', 1)
+        namespace.set('bob', 2)
+        namespace.set('carol', 3)
+        namespace.delete('carol')
+        brain.close()
+
+        brain = Brain(self.path)
+        namespace = brain.namespace('karma')
+        self.assertEqual(namespace.get('alice'), 1)
+        self.assertEqual(namespace.get('carol', 0), 0)
+        self.assertEqual(namespace.keys(), ['alice', 'bob'])
+        self.assertEqual(brain.namespace('other').keys(), [])
+        brain.close()
+
+    def test_should_reject_value_which_is_not_serializable(self):
+        """ Brain().set() should raise if value is not JSON serializable. """
+        brain = Brain(self.path, flush_interval=60)
+        brain.set('karma', 'alice', 1)
+        with self.assertRaises(TypeError):
+            brain.set('karma', 'bob', object())
+        brain.set('karma', 'carol', 2)
+        self.assertIsNone(brain.get('karma', 'bob'))
+        brain.close()
+
+        brain = Brain(self.path)
+        self.assertEqual(brain.keys('karma'), ['alice', 'carol'])
+        brain.close()
+
+    def test_should_reject_key_which_is_not_text(self):
+        """ Brain().set() should raise if key is not text. """
+        brain = Brain(self.path, flush_interval=60)
+        brain.set('karma', 'alice', 1)
+        with self.assertRaises(TypeError):
+            brain.set('karma', ('bad', 'key'), 2)
+        with self.assertRaises(TypeError):
+            brain.delete(None, 'alice')
+        brain.close()
+
+        brain = Brain(self.path)
+        self.assertEqual(brain.keys('karma'), ['alice'])
+        brain.close()
+
+    def test_should_keep_values_when_flush_failed(self):
+        """ Brain().flush() should keep values if transaction failed. """
+        brain = Brain(self.path, flush_interval=60)
+        brain.set('karma', 'alice', 1)
+        brain.set('karma', 'bob', 1)
+        connection = brain.connection
+        brain.connection = sqlite3.connect(':memory:',
+                                           check_same_thread=False)
+        with self.assertRaises(sqlite3.OperationalError):
+            brain.flush()
+        brain.connection.close()
+        brain.connection = connection
+        brain.set('karma', 'bob', 2)
+        self.assertEqual(brain.get('karma', 'alice'), 1)
+        self.assertEqual(brain.get('karma', 'bob'), 2)
+        self.assertEqual(brain.stats['flushes'], 0)
+        brain.close()
+
+        brain = Brain(self.path)
+        self.assertEqual(brain.get('karma', 'alice'), 1)
+        self.assertEqual(brain.get('karma', 'bob'), 2)
+        brain.close()
+
+    def test_should_flush_full_batch(self):
+        """ Brain() should flush when batch is full. """
+        brain = Brain(self.path, flush_interval=60, batch_size=2)
+        brain.set('karma', 'alice', 1)
+        brain.set('karma', 'bob', 1)
+        brain.stopping.set()
+        brain.flusher.join(5)
+        self.assertEqual(brain.stats['flushed'], 2)
+        brain.close()
+
+
+class TestRobotBrain(TestCase):
+    def test_should_inject_brain(self):
+        """ Robot() should inject namespace of brain to handler. """
+        logger = logging.getLogger('robo')
+        logger.level = logging.ERROR
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'brain.db')
+        handler_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    'fixtures', 'brain_handlers')
+        try:
+            for expected in ['alice: 1', 'alice: 2']:
+                robot = Robot('brain', logger)
+                robot.setup_brain(path, flush_interval=60)
+                robot.setup_handlers(handler_path,
+                                     'tests.fixtures.brain_handlers')
+                robot.load_adapter('null', 'tests.fixtures.adapters')
+                robot.handler_signal.send('brain alice++')
+                self.assertEqual(robot.collect_stats()['brain.writes'], 1)
+                robot.shutdown()
+                self.assertEqual(robot.adapters['null'].responses,
+                                 [expected])
+                self.assertIsNone(robot.brain)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_should_close_brain_when_handler_shutdown_failed(self):
+        """ Robot().shutdown() should close brain if handler raised. """
+        logger = logging.getLogger('robo')
+        logger.level = logging.CRITICAL
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'brain.db')
+        handler_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    'fixtures', 'brain_handlers')
+        try:
+            robot = Robot('brain', logger, bus='direct')
+            robot.setup_brain(path, flush_interval=60)
+            robot.setup_handlers(handler_path, 'tests.fixtures.brain_handlers')
+            robot.load_adapter('null', 'tests.fixtures.adapters')
+            robot.handler_signal.send('brain alice++')
+
+            def shutdown():
+                raise RuntimeError('shutdown')
+
+            robot.handlers[0].instance.shutdown = shutdown
+            robot.shutdown()
+            self.assertIsNone(robot.brain)
+
+            brain = Brain(path)
+            self.assertEqual(brain.get('karma', 'alice'), 1)
+            brain.close()
+        finally:
+            logger.level = logging.ERROR
+            shutil.rmtree(directory)
+
+    def test_should_create_one_brain_in_parallel_loading(self):
+        """ Robot().setup_handlers(workers=...) should share one brain. """
+        logger = logging.getLogger('robo')
+        logger.level = logging.ERROR
+        robot = Robot('brain', logger, bus='direct')
+        setup_brain = robot.setup_brain
+        brains = []
+
+        def slow_setup_brain(*args, **kwargs):
+            time.sleep(0.1)
+            brains.append(setup_brain(*args, **kwargs))
+            return brains[-1]
+
+        robot.setup_brain = slow_setup_brain
+        handler_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    'fixtures', 'brain_handlers')
+        robot.setup_handlers(handler_path, 'tests.fixtures.brain_handlers',
+                             workers=2)
+        robot.shutdown()
+        self.assertEqual(len(brains), 1)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_bus
+    ~~~~~~~~~~~~~~~~~~~
+
+    Event bus tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import logging
+from unittest import TestCase
+from blinker import Signal
+from robo.robot import Robot
+from robo.bus import DirectBus, create_bus
+
+
+def create_robot(bus):
+    logger = logging.getLogger('robo')
+    logger.level = logging.ERROR
+    robot = Robot('bus', logger, bus=bus)
+    robot.register_default_handlers()
+    robot.load_adapter('null', 'tests.fixtures.adapters')
+
+    return robot
+
+
+class TestDirectBus(TestCase):
+    def test_should_call_receivers(self):
+        """ DirectBus().send() should return results of receivers. """
+        bus = DirectBus()
+        receiver = bus.connect(lambda sender, **kwargs: sender + kwargs['a'])
+        self.assertEqual(bus.send('foo', a='bar'), [(receiver, 'foobar')])
+        bus.disconnect(receiver)
+        self.assertEqual(bus.send('foo', a='bar'), [])
+
+    def test_should_create_bus_by_name(self):
+        """ create_bus() should create bus by name. """
+        self.assertTrue(isinstance(create_bus(), Signal))
+        self.assertTrue(isinstance(create_bus('direct'), DirectBus))
+        with self.assertRaises(ValueError):
+            create_bus('foo')
+
+
+class TestRobotBus(TestCase):
+    def test_should_dispatch_through_direct_bus(self):
+        """ Robot(bus='direct') should pass bus to adapters. """
+        robot = create_robot('direct')
+        adapter = robot.adapters['null']
+        self.assertTrue(adapter.signal is robot.handler_signal)
+        adapter.signal.send('bus ping')
+        self.assertEqual(adapter.responses, ['pong'])
+
+    def test_direct_bus_should_not_be_shared(self):
+        """ Robot(bus='direct') should not receive other robot's messages. """
+        robot = create_robot('direct')
+        other = create_robot(None)
+        other.handler_signal.send('bus ping')
+        self.assertEqual(robot.adapters['null'].responses, [])
+        self.assertEqual(other.adapters['null'].responses, ['pong'])
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_cache
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Cache tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import json
+import shutil
+import logging
+import tempfile
+from unittest import TestCase
+from robo.robot import Robot
+from robo.cache import DiscoveryCache, LRUCache, TTLCache
+from robo.decorators import cmd
+from tests.helpers import Clock
+
+
+class Lookup(object):
+    result_cache = None
+
+    def __init__(self):
+        self.calls = 0
+
+    @cmd(regex=r'^lookup (\w+)', cache_ttl=60, cache_size=2)
+    def lookup(self, message, **kwargs):
+        self.calls += 1
+        return '{0} {1}'.format(message.match.group(1), self.calls)
+
+    @cmd(regex=r'^where$', cache_size=2, cache_room=True)
+    def where(self, message, **kwargs):
+        return message.room
+
+    @cmd(regex=r'^forget (\w+)')
+    def forget(self, message, **kwargs):
+        self.result_cache.invalidate('lookup', message.match.group(1))
+
+
+class TestLRUCache(TestCase):
+    def test_should_get_cached_value(self):
+        """ LRUCache().get() should return cached value. """
+        cache = LRUCache(2)
+        cache.set('foo', 1)
+        self.assertEqual(cache.get('foo'), 1)
+        self.assertIsNone(cache.get('bar'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_should_evict_least_recently_used(self):
+        """ LRUCache().set() should evict least recently used item. """
+        cache = LRUCache(2)
+        cache.set('foo', 1)
+        cache.set('bar', 2)
+        cache.get('foo')
+        cache.set('baz', 3)
+        self.assertTrue('foo' in cache)
+        self.assertFalse('bar' in cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_should_clear(self):
+        """ LRUCache().clear() should remove all items. """
+        cache = LRUCache(2)
+        cache.set('foo', 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+class TestTTLCache(TestCase):
+    def test_should_expire_items(self):
+        """ TTLCache().get() should not return expired value. """
+        clock = Clock()
+        cache = TTLCache(2, 10, clock=clock)
+        cache.set('foo', 1)
+        clock.now = 9
+        self.assertEqual(cache.get('foo'), 1)
+        clock.now = 10
+        self.assertIsNone(cache.get('foo'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_should_delete_item(self):
+        """ TTLCache().delete() should remove cached value. """
+        cache = TTLCache(2)
+        cache.set('foo', 1)
+        cache.delete('foo')
+        self.assertIsNone(cache.get('foo'))
+
+
+class TestResultCache(TestCase):
+    def setUp(self):
+        logger = logging.getLogger('robo')
+        logger.level = logging.ERROR
+        self.robot = Robot('cache', logger)
+        self.lookup = self.robot.construct_handler(Lookup)
+        self.robot.handlers.extend(
+            self.robot.parse_handler_methods(self.lookup))
+        self.robot.load_adapter('null', 'tests.fixtures.adapters')
+        self.responses = self.robot.adapters['null'].responses
+
+    def say(self, body, room=None):
+        self.robot.handler_signal.send('cache ' + body, room=room,
+                                       source='null')
+
+    def test_should_skip_handler_if_cached(self):
+        """ @cmd(cache_ttl=...) should reply cached result. """
+        self.say('lookup foo')
+        self.say('lookup foo')
+        self.say('lookup bar')
+        self.assertEqual(self.responses, ['foo 1', 'foo 1', 'bar 2'])
+        self.assertEqual(self.lookup.calls, 2)
+        stats = self.robot.collect_stats()
+        self.assertEqual((stats['cache.hits'], stats['cache.misses']), (1, 2))
+
+    def test_should_key_by_room(self):
+        """ @cmd(cache_room=True) should cache result per room. """
+        self.say('where', '@general')
+        self.say('where', '@random')
+        self.assertEqual(self.responses, ['@general', '@random'])
+
+    def test_should_invalidate_from_handler(self):
+        """ HandlerCache().invalidate() should remove cached result. """
+        self.say('lookup foo')
+        self.say('forget foo')
+        self.say('lookup foo')
+        self.assertEqual(self.responses, ['foo 1', 'foo 2'])
+
+
+class TestDiscoveryCache(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp(prefix='robo-test-')
+        self.cache_path = os.path.join(self.path, 'cache.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_should_persist_entries(self):
+        """ DiscoveryCache().save() should persist entries to file. """
+        cache = DiscoveryCache(self.cache_path)
+        cache.set_modules('/plugins', 1.5, [('foo', False)])
+        cache.set_manifest('/plugins/foo.py', 1.5, 10, [])
+        cache.save()
+        cache = DiscoveryCache(self.cache_path)
+        self.assertEqual(cache.get_modules('/plugins', 1.5), [('foo', False)])
+        self.assertIsNone(cache.get_modules('/plugins', 2.0))
+        self.assertEqual(cache.get_manifest('/plugins/foo.py', 1.5, 10),
+                         (True, []))
+        self.assertEqual(cache.get_manifest('/plugins/foo.py', 1.5, 11),
+                         (False, None))
+
+    def test_should_ignore_other_version(self):
+        """ DiscoveryCache() should ignore cache file of other version. """
+        with open(self.cache_path, 'w') as f:
+            json.dump({'version': 0, 'dirs': {'/plugins': {}}}, f)
+        self.assertEqual(DiscoveryCache(self.cache_path).dirs, {})
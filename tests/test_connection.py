@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_connection
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Connection supervisor tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import time
+import logging
+import threading
+from unittest import TestCase
+from robo.adapters.connection import ConnectionSupervisor, backoff
+
+
+class FakeClient(object):
+    def __init__(self, connects, sessions=1, failures=None):
+        """XMPP client stand-in.
+
+        :param connects: Results of `connect()`
+        :param sessions: Number of sessions until supervisor is stopped
+        :param failures: Room to number of joins which are not confirmed
+        """
+        self.connects = list(connects)
+        self.failures = dict(failures or {})
+        self.sessions = sessions
+        self.supervisor = None
+        self.joins = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        self.roster = 0
+        self.disconnected = 0
+
+    def connect(self, reattempt=True):
+        return self.connects.pop(0)
+
+    def process(self, block=False):
+        #: Session starts, a message arrives and connection is lost.
+        self.supervisor.session_start()
+        self.supervisor.on_message('robo ping')
+        self.supervisor.on_message('robo ping')
+        self.sessions -= 1
+        if self.sessions == 0:
+            self.supervisor.stop()
+
+    def disconnect(self):
+        self.disconnected += 1
+
+    def send_presence(self):
+        pass
+
+    def get_roster(self):
+        self.roster += 1
+
+    def join(self, room):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+            self.joins.append(room)
+        if room == 'broken':
+            raise ValueError('broken')
+        with self.lock:
+            if self.failures.get(room, 0) > 0:
+                self.failures[room] -= 1
+                return False
+
+        return True
+
+
+def create_supervisor(client, rooms, **kwargs):
+    logger = logging.getLogger('robo')
+    logger.level = logging.CRITICAL
+    delays = []
+    supervisor = ConnectionSupervisor(client, rooms, sleep=delays.append,
+                                      logger=logger, **kwargs)
+    client.supervisor = supervisor
+
+    return supervisor, delays
+
+
+class TestBackoff(TestCase):
+    def test_should_double_delay_with_jitter(self):
+        """ backoff() should double delay up to cap with jitter. """
+        self.assertEqual(backoff(0, random=lambda: 1.0), 1.0)
+        self.assertEqual(backoff(0, random=lambda: 0.0), 0.5)
+        self.assertEqual(backoff(3, random=lambda: 1.0), 8.0)
+        self.assertEqual(backoff(10, cap=60, random=lambda: 1.0), 60.0)
+        self.assertEqual(backoff(2, jitter=0.0, random=lambda: 0.3), 4.0)
+
+
+class TestConnectionSupervisor(TestCase):
+    def test_should_join_rooms_concurrently(self):
+        """ ConnectionSupervisor() should join rooms at once. """
+        rooms = ['room{0}'.format(i) for i in range(8)] + [' ']
+        client = FakeClient([True])
+        supervisor, delays = create_supervisor(client, rooms)
+        supervisor.run()
+        self.assertEqual(sorted(client.joins), sorted(rooms[:8]))
+        self.assertTrue(client.max_active > 1)
+        self.assertEqual(client.roster, 0)
+        self.assertEqual(supervisor.joined, set(rooms[:8]))
+        self.assertEqual(supervisor.stats['join_failures'], 0)
+        self.assertIsNone(supervisor.retry_thread)
+        self.assertEqual(sorted(supervisor.metrics), [
+            'time_to_first_message', 'time_to_join', 'time_to_session'
+        ])
+        self.assertEqual(client.disconnected, 1)
+        self.assertEqual(delays, [])
+
+    def test_should_reconnect_with_backoff(self):
+        """ ConnectionSupervisor() should reconnect with backoff. """
+        client = FakeClient([False, False, True, False, True], sessions=2)
+        supervisor, delays = create_supervisor(client, ['general'],
+                                               fetch_roster=True, jitter=0.0)
+        supervisor.run()
+        #: Attempts are reset when session is started.
+        self.assertEqual(delays, [2.0, 4.0, 1.0, 2.0])
+        self.assertEqual(client.joins, ['general', 'general'])
+        self.assertEqual(client.roster, 2)
+        self.assertEqual(supervisor.stats['connects'], 2)
+        self.assertEqual(supervisor.stats['failures'], 3)
+
+    def test_should_retry_failed_joins_with_backoff(self):
+        """ ConnectionSupervisor() should join failed rooms again. """
+        client = FakeClient([True], failures={'flaky': 2, 'silent': 1})
+        supervisor, delays = create_supervisor(
+            client, ['general', 'flaky', 'silent'], jitter=0.0)
+        supervisor.connect()
+        self.assertEqual(sorted(supervisor.session_start()),
+                         ['flaky', 'silent'])
+        supervisor.retry_thread.join(5)
+        self.assertEqual(supervisor.joined, set(['general', 'flaky',
+                                                 'silent']))
+        self.assertEqual(sorted(client.joins), [
+            'flaky', 'flaky', 'flaky', 'general', 'silent', 'silent'
+        ])
+        self.assertEqual(delays, [1.0, 2.0])
+        self.assertEqual(supervisor.stats['join_failures'], 3)
+        self.assertEqual(supervisor.stats['join_retries'], 2)
+
+    def test_should_stop_retrying_when_connection_lost(self):
+        """ ConnectionSupervisor() should not retry joins of lost session. """
+        client = FakeClient([True, False])
+        supervisor, delays = create_supervisor(client, ['broken'],
+                                               jitter=0.0)
+
+        def sleep(delay):
+            delays.append(delay)
+            if len(delays) == 2:
+                supervisor.connect()
+
+        supervisor.sleep = sleep
+        supervisor.connect()
+        supervisor.session_start()
+        supervisor.retry_thread.join(5)
+        self.assertEqual(delays, [1.0, 2.0])
+        self.assertEqual(client.joins, ['broken', 'broken'])
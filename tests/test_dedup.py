@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_dedup
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Duplicate message suppression tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import logging
+from unittest import TestCase
+from robo.robot import Robot
+from robo.dedup import Deduplicator, message_key
+from tests.helpers import Clock
+
+
+class TestDeduplicator(TestCase):
+    def test_message_key(self):
+        """ message_key() should use id or hash with timestamp. """
+        self.assertEqual(message_key('hi', {'source': 'slack',
+                                            'message_id': 'a'}),
+                         ('slack', 'a'))
+        self.assertIsNone(message_key('hi', {'room': 'general'}))
+        kwargs = {'room': 'general', 'timestamp': '2018-01-01T00:00:00'}
+        key = message_key('hi', kwargs)
+        self.assertEqual(key, message_key('hi', dict(kwargs)))
+        self.assertNotEqual(key, message_key('hello', kwargs))
+
+    def test_should_drop_seen_messages_in_window(self):
+        """ Deduplicator().is_duplicate() should forget old messages. """
+        clock = Clock()
+        dedup = Deduplicator(window=10, maxsize=2, clock=clock)
+        self.assertFalse(dedup.is_duplicate('hi', {'message_id': 'a'}))
+        self.assertTrue(dedup.is_duplicate('hi', {'message_id': 'a'}))
+        self.assertFalse(dedup.is_duplicate('hi', {}))
+        self.assertFalse(dedup.is_duplicate('hi', {}))
+        clock.now = 5
+        self.assertFalse(dedup.is_duplicate('hi', {'message_id': 'b'}))
+        #: Oldest one is evicted when full.
+        self.assertFalse(dedup.is_duplicate('hi', {'message_id': 'c'}))
+        self.assertEqual(len(dedup), 2)
+        clock.now = 14
+        self.assertTrue(dedup.is_duplicate('hi', {'message_id': 'c'}))
+        clock.now = 15
+        self.assertFalse(dedup.is_duplicate('hi', {'message_id': 'c'}))
+        self.assertEqual(len(dedup), 1)
+
+
+class TestRobotDedup(TestCase):
+    def test_should_drop_duplicate_messages(self):
+        """ Robot().setup_dedup() should dispatch message only once. """
+        logger = logging.getLogger('robo')
+        logger.level = logging.ERROR
+        robot = Robot('dedup', logger, bus='direct')
+        robot.register_default_handlers()
+        robot.load_adapter('null', 'tests.fixtures.adapters')
+        robot.setup_dedup()
+        for message_id in ['1', '2', '1']:
+            robot.handler_signal.send('dedup ping', message_id=message_id)
+        self.assertEqual(robot.adapters['null'].responses, ['pong', 'pong'])
+        self.assertEqual(robot.collect_stats()['duplicated'], 1)
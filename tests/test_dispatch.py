@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_dispatch
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Dispatch index tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import re
+from unittest import TestCase
+from robo.dispatch import (HandlerIndex, HandlerSpec, has_toplevel_branch,
+                           literal_prefix)
+
+
+class Handler(object):
+    def say(self, message, **kwargs):
+        return 'say'
+
+
+def create_handler(regex, flags=re.IGNORECASE, missing=False, room=None):
+    instance = Handler()
+    if room is not None:
+        room = re.compile(room)
+    return HandlerSpec(instance, 'say', instance.say, {},
+                       re.compile(regex, flags), room=room, missing=missing)
+
+
+class TestLiteralPrefix(TestCase):
+    def test_should_extract_anchored_prefix(self):
+        """ literal_prefix() should strip anchor and stop at meta character. """
+        self.assertEqual(literal_prefix(r'^ping$'), 'ping')
+        self.assertEqual(literal_prefix(r'\Aping'), 'ping')
+        self.assertEqual(literal_prefix(r'echo\s+(.*)'), 'echo')
+
+    def test_should_drop_optional_character(self):
+        """ literal_prefix() should drop character followed by `?`, `*`, `{`. """
+        self.assertEqual(literal_prefix(r'hello?'), 'hell')
+        self.assertEqual(literal_prefix(r'hel*o'), 'he')
+        self.assertEqual(literal_prefix(r'hel{2}o'), 'he')
+        self.assertEqual(literal_prefix(r'hel+o'), 'hel')
+
+    def test_should_unescape_meta_character(self):
+        """ literal_prefix() should treat escaped meta character as literal. """
+        self.assertEqual(literal_prefix(r'1\.0\s'), '1.0')
+
+    def test_should_be_empty_when_pattern_has_branch(self):
+        """ literal_prefix() should be empty when pattern has top level `|`. """
+        self.assertEqual(literal_prefix(r'hi|hello'), '')
+        self.assertTrue(has_toplevel_branch(r'hi|hello'))
+        self.assertFalse(has_toplevel_branch(r'h(i|ello)'))
+        self.assertFalse(has_toplevel_branch(r'h[|]i'))
+        self.assertFalse(has_toplevel_branch(r'h\|i'))
+
+
+class TestHandlerIndex(TestCase):
+    def assert_same_as_linear_scan(self, handlers, bodies):
+        index = HandlerIndex(handlers)
+        for body in bodies:
+            expected = [h for h in handlers if h.missing is False and
+                        h.regex.match(body)]
+            actual = [h for h in index.candidates(body)
+                      if h.regex.match(body)]
+            self.assertEqual(actual, expected, body)
+
+    def test_candidates_should_be_filtered_by_prefix(self):
+        """ HandlerIndex().candidates() should skip handlers never match. """
+        handlers = [create_handler(r'^ping$'), create_handler(r'^echo\s+'),
+                    create_handler(r'^help$')]
+        index = HandlerIndex(handlers)
+        self.assertEqual(index.candidates('ping'), [handlers[0]])
+        self.assertEqual(index.candidates('foo'), [])
+
+    def test_candidates_should_keep_registered_order(self):
+        """ HandlerIndex().candidates() should keep registered order. """
+        handlers = [create_handler(r'^goodbye'), create_handler(r'.+'),
+                    create_handler(r'^good'), create_handler(r'(good|bad)')]
+        index = HandlerIndex(handlers)
+        self.assertEqual(index.candidates('goodbye'), handlers)
+
+    def test_missing_handlers_should_not_be_candidates(self):
+        """ HandlerIndex() should keep missing handlers separately. """
+        handlers = [create_handler(r'^foo'),
+                    create_handler(r'.+', missing=True)]
+        index = HandlerIndex(handlers)
+        self.assertEqual(index.missings, [handlers[1]])
+        self.assertEqual(index.candidate_count, 1)
+
+    def test_candidates_should_match_same_as_linear_scan(self):
+        """ HandlerIndex() should match same handlers as linear scan. """
+        handlers = [
+            create_handler(r'^ping$'),
+            create_handler(r'Ping', 0),
+            create_handler(r'^echo\s+(.*)'),
+            create_handler(r'(?P<a>x)y', 0),
+            create_handler(r'(?P<a>x)z', 0),
+            create_handler(r'(a)\1'),
+            create_handler(r'[a-z]+ing'),
+            create_handler(r'p i n g', re.VERBOSE),
+            create_handler(r'hi|hello'),
+            create_handler(r'sk'),
+        ]
+        bodies = ['ping', 'PING', 'Ping', 'echo foo', 'xy', 'xz', 'aa',
+                  'sing', 'hello', 'hi', u'ſK', u'İ', '']
+        self.assert_same_as_linear_scan(handlers, bodies)
+
+    def test_conditional_should_not_be_combined(self):
+        """ HandlerIndex() should not combine conditional patterns. """
+        handlers = [create_handler(r'(b)c'),
+                    create_handler(r'(a)?(?(1)x|y)')]
+        self.assert_same_as_linear_scan(handlers, ['ax', 'y', 'bc', 'ay'])
+
+    def test_replace_should_be_same_as_new_index(self):
+        """ HandlerIndex().replace() should match same as rebuilt index. """
+        handlers = [create_handler(r'^ping$'), create_handler(r'hi|hello'),
+                    create_handler(r'^echo\s+'), create_handler(r'[a-z]+ing'),
+                    create_handler(r'.+', missing=True)]
+        index = HandlerIndex(handlers)
+        added = [create_handler(r'^pong'), create_handler(r'(a|b)c'),
+                 create_handler(r'.*x', missing=True)]
+        replaced = handlers[:1] + added + handlers[3:]
+        updated = index.replace(replaced, handlers[1:3], added)
+        expected = HandlerIndex(replaced)
+        for body in ['ping', 'pong', 'hello', 'echo foo', 'sing', 'ac']:
+            self.assertEqual(updated.candidates(body),
+                             expected.candidates(body))
+        self.assertEqual(updated.missings, expected.missings)
+        self.assertEqual(updated.candidate_count, expected.candidate_count)
+        self.assertEqual(updated.size, len(replaced))
+        self.assertEqual(index.candidates('hello'), [handlers[1],
+                                                     handlers[3]])
+
+    def test_restricted_should_contain_room_handlers(self):
+        """ HandlerIndex() should list handlers which have room. """
+        handlers = [create_handler(r'^ping$'),
+                    create_handler(r'^bye', room=r'^@random'),
+                    create_handler(r'.+', missing=True, room=r'^@dev')]
+        index = HandlerIndex(handlers)
+        self.assertEqual(index.restricted, handlers[1:])
+        added = [create_handler(r'^hi', room=r'^@general')]
+        updated = index.replace(handlers[:2] + added, handlers[2:], added)
+        self.assertEqual(updated.restricted, [handlers[1], added[0]])
+
+
+class TestHandlerSpec(TestCase):
+    def test_should_precompute_dispatch_attributes(self):
+        """ HandlerSpec() should precompute send_to and flags. """
+        spec = create_handler(r'^say')
+        self.assertEqual(spec.send_to, 'tests.test_dispatch.say')
+        self.assertFalse(spec.injects_docs)
+        self.assertFalse(spec.coroutine)
+        self.assertEqual(spec.func(None), 'say')
+
+    def test_should_be_compatible_with_dict(self):
+        """ HandlerSpec() should be accessible like old handler dict. """
+        spec = create_handler(r'^say')
+        self.assertEqual(spec['method'], 'say')
+        self.assertTrue('regex' in spec)
+        self.assertIsNone(spec.get('room'))
+        with self.assertRaises(KeyError):
+            spec['foo']
+
+    def test_should_be_slotted(self):
+        """ HandlerSpec() should not have instance dict. """
+        self.assertFalse(hasattr(create_handler(r'^say'), '__dict__'))
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_executor
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Thread pool handler executor tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import time
+import logging
+import threading
+from unittest import TestCase
+from robo.robot import Robot
+from robo.executor import HandlerExecutor, create_process_pool
+
+
+class Collector(object):
+    def __init__(self):
+        self.responses = []
+        self.event = threading.Event()
+
+    def __call__(self, message, **kwargs):
+        self.responses.append(message)
+        self.event.set()
+
+
+def sleep(seconds, value):
+    time.sleep(seconds)
+    return value
+
+
+class TestHandlerExecutor(TestCase):
+    def setUp(self):
+        logger = logging.getLogger('robo')
+        logger.level = logging.CRITICAL
+        self.collector = Collector()
+        self.executor = HandlerExecutor(self.collector, max_workers=4,
+                                        logger=logger)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_should_notify_in_completion_order(self):
+        """ HandlerExecutor() should notify results in completion order. """
+        self.executor.submit('slow', sleep, (0.2, 'slow'))
+        self.executor.submit('fast', sleep, (0.01, 'fast'))
+        self.executor.shutdown()
+        self.assertEqual(self.collector.responses, ['fast', 'slow'])
+
+    def test_should_limit_concurrency(self):
+        """ HandlerExecutor() should run jobs up to max_concurrency. """
+        for i in range(3):
+            self.executor.submit('limited', sleep, (0.1, i),
+                                 max_concurrency=1)
+        self.assertEqual(self.executor.stats['queued'], 2)
+        self.assertEqual(self.executor.slots['limited'].running, 1)
+        self.executor.shutdown()
+        self.assertEqual(self.collector.responses, [0, 1, 2])
+        self.assertEqual(self.executor.slots['limited'].running, 0)
+
+    def test_should_abandon_timed_out_job(self):
+        """ HandlerExecutor() should abandon job which exceeded timeout. """
+        self.executor.submit('hung', sleep, (0.3, 'hung'), timeout=0.05,
+                             max_concurrency=1)
+        self.executor.submit('hung', sleep, (0, 'next'), timeout=0.05,
+                             max_concurrency=1)
+        self.assertTrue(self.collector.event.wait(1))
+        self.executor.shutdown()
+        self.assertEqual(self.collector.responses, ['next'])
+        self.assertEqual(self.executor.stats['abandoned'], 1)
+
+    def test_should_count_failed_job(self):
+        """ HandlerExecutor() should count failed job and notify None. """
+        self.executor.submit('fail', sleep, ('not a number', None))
+        self.executor.shutdown()
+        self.assertEqual(self.executor.stats['failed'], 1)
+        self.assertEqual(self.collector.responses, [None])
+
+
+class TestRobotExecutor(TestCase):
+    def test_robot_should_run_handler_on_executor(self):
+        """ Robot().setup_executor() should run handlers on thread pool. """
+        logger = logging.getLogger('robo')
+        logger.level = logging.ERROR
+        robot = Robot('executor', logger)
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'fixtures', 'handlers')
+        robot.setup_handlers(path, 'tests.fixtures.handlers')
+        robot.load_adapter('null', 'tests.fixtures.adapters')
+        robot.setup_executor(max_workers=2)
+        robot.handler_signal.send('executor goodbye', room='@random')
+        robot.shutdown()
+        self.assertEqual(sorted(robot.adapters['null'].responses),
+                         ['goodbye @random', 'goodbye all'])
+
+
+class TestProcessExecutor(TestCase):
+    def setUp(self):
+        logger = logging.getLogger('robo')
+        logger.level = logging.ERROR
+        robot = Robot('process', logger, foo='bar')
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'fixtures', 'process_handlers')
+        robot.setup_handlers(path, 'tests.fixtures.process_handlers')
+        robot.load_adapter('null', 'tests.fixtures.adapters')
+        self.robot = robot
+
+    def tearDown(self):
+        self.robot.shutdown()
+
+    def test_process_pool_should_not_fork(self):
+        """ create_process_pool() should not fork robot's process. """
+        pool = create_process_pool(1)
+        context = getattr(pool, '_mp_context', None)
+        pool.shutdown()
+        if context is not None:
+            self.assertNotEqual(context.get_start_method(), 'fork')
+
+    def test_should_not_start_process_pool_until_needed(self):
+        """ Robot() should start process pool lazily. """
+        self.assertIsNone(self.robot.process_executor)
+
+    def test_should_run_handler_in_worker_process(self):
+        """ Handler decorated with executor='process' should run in worker. """
+        self.robot.handler_signal.send('process pid')
+        self.robot.shutdown()
+        self.assertIsNone(self.robot.process_executor)
+        responses = self.robot.adapters['null'].responses
+        self.assertEqual(len(responses), 1)
+        self.assertNotEqual(responses[0], str(os.getpid()))
+
+    def test_should_send_match_and_injected_attrs(self):
+        """ Worker process should receive match, kwargs and robot name. """
+        self.robot.handler_signal.send('process square 12', room='@random')
+        self.robot.shutdown()
+        self.assertEqual(self.robot.adapters['null'].responses,
+                         ['process 144 @random'])
@@ -68,9 +68,10 @@ class TestHelpHandler(TestCase):
         robot = create_robot()
         ret = Help().say(Message(body='', docs=robot.docs, match=None))
         expected = [
-            'robo echo\s+(.*) - Repeate your command',
-            'robo ^help$      - Show this help message',
-            'robo ^ping$      - Return PONG to PING'
+            r'robo echo\s+(.*)   - Repeate your command',
+            'robo ^help$        - Show this help message',
+            r'robo ^help\s+(.+)$ - Search help by words',
+            'robo ^ping$        - Return PONG to PING'
         ]
         self.assertEqual(ret, '\n'.join(expected))
 
@@ -80,8 +81,49 @@ class TestHelpHandler(TestCase):
         robot.handler_signal.send('robo help')
         ret = robot.adapters['null'].responses[0]
         expected = [
-            'robo echo\s+(.*) - Repeate your command',
-            'robo ^help$      - Show this help message',
-            'robo ^ping$      - Return PONG to PING'
+            r'robo echo\s+(.*)   - Repeate your command',
+            'robo ^help$        - Show this help message',
+            r'robo ^help\s+(.+)$ - Search help by words',
+            'robo ^ping$        - Return PONG to PING'
         ]
         self.assertEqual(ret, '\n'.join(expected))
+
+    def test_should_not_send_help_index_to_adapter(self):
+        """ Help() should use robot's help index without sending it to adapter. """
+        robot = create_robot()
+        sent = []
+        robot.adapters['null'].say = lambda message, **kwargs: \
+            sent.append(kwargs)
+        robot.handler_signal.send('robo help ping')
+        self.assertEqual(len(sent), 1)
+        self.assertFalse('help_index' in sent[0])
+        help_handler = [h for h in robot.handlers if h.method == 'say' and
+                        h.send_to.startswith('robo.handlers.help')][0]
+        self.assertIsNone(help_handler.instance.index)
+
+    def test_should_search_help(self):
+        """ Help().search() should show help which contains words. """
+        robot = create_robot()
+        robot.handler_signal.send('robo help pong')
+        robot.handler_signal.send('robo help foo')
+        responses = robot.adapters['null'].responses
+        self.assertEqual(responses, [
+            'robo ^ping$        - Return PONG to PING',
+            'No help for `foo`.',
+        ])
+
+    def test_should_paginate_help(self):
+        """ Help() should paginate help. """
+        robot = create_robot()
+        help_handler = [h for h in robot.handlers if h.method == 'say' and
+                        h.send_to.startswith('robo.handlers.help')][0]
+        help_handler.instance.page_size = 3
+        robot.handler_signal.send('robo help')
+        robot.handler_signal.send('robo help page 2')
+        responses = robot.adapters['null'].responses
+        self.assertEqual(responses[0].splitlines()[-1],
+                         'Page 1/2. Next: `robo help page 2`')
+        self.assertEqual(responses[1].splitlines(), [
+            'robo ^ping$        - Return PONG to PING',
+            'Page 2/2.',
+        ])
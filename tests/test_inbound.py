@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_inbound
+    ~~~~~~~~~~~~~~~~~~~~~~~
+
+    Inbound queue tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import logging
+import threading
+from unittest import TestCase
+from robo.robot import Robot
+from robo.inbound import InboundQueue
+
+
+class Dispatcher(object):
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.messages = []
+
+    def __call__(self, sender, **kwargs):
+        self.started.set()
+        self.release.wait(5)
+        self.messages.append(sender)
+
+
+class TestInboundQueue(TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('robo')
+        self.logger.level = logging.CRITICAL
+        self.dispatcher = Dispatcher()
+
+    def create_queue(self, policy):
+        queue = InboundQueue(self.dispatcher, maxsize=2, policy=policy,
+                             logger=self.logger)
+        #: Worker holds first message until released.
+        queue.put('first', priority=0)
+        self.dispatcher.started.wait(5)
+
+        return queue
+
+    def test_should_raise_if_policy_is_unknown(self):
+        """ InboundQueue() should raise ValueError if policy is unknown. """
+        with self.assertRaises(ValueError):
+            InboundQueue(self.dispatcher, policy='foo')
+
+    def test_drop_oldest(self):
+        """ InboundQueue(policy='drop_oldest') should drop oldest message. """
+        queue = self.create_queue('drop_oldest')
+        for message in ['a', 'b', 'c']:
+            self.assertTrue(queue.put(message))
+        self.assertEqual(queue.depth, 2)
+        self.dispatcher.release.set()
+        queue.stop(5)
+        self.assertEqual(self.dispatcher.messages, ['first', 'b', 'c'])
+        self.assertEqual(queue.stats['shed'], 1)
+        self.assertEqual(queue.stats['max_depth'], 2)
+
+    def test_drop_lowest_priority(self):
+        """ InboundQueue(policy='drop_lowest_priority') should keep important
+        messages. """
+        queue = self.create_queue('drop_lowest_priority')
+        self.assertTrue(queue.put('a', priority=1))
+        self.assertTrue(queue.put('b', priority=0))
+        self.assertTrue(queue.put('c', priority=2))
+        self.assertFalse(queue.put('d', priority=0))
+        self.dispatcher.release.set()
+        queue.stop(5)
+        self.assertEqual(self.dispatcher.messages, ['first', 'a', 'c'])
+        self.assertEqual(queue.stats['shed'], 2)
+
+    def test_block(self):
+        """ InboundQueue(policy='block') should block until queue has room. """
+        queue = self.create_queue('block')
+        queue.put('a')
+        queue.put('b')
+        blocked = threading.Thread(target=queue.put, args=('c',))
+        blocked.start()
+        blocked.join(0.1)
+        self.assertTrue(blocked.is_alive())
+        self.dispatcher.release.set()
+        blocked.join(5)
+        queue.stop(5)
+        self.assertEqual(self.dispatcher.messages, ['first', 'a', 'b', 'c'])
+        self.assertEqual(queue.stats['blocked'], 1)
+        self.assertEqual(queue.stats['shed'], 0)
+        self.assertEqual(queue.stats['dispatched'], 4)
+
+
+class TestRobotInbound(TestCase):
+    def test_should_dispatch_queued_messages(self):
+        """ Robot().setup_inbound_queue() should dispatch via queue. """
+        logger = logging.getLogger('robo')
+        logger.level = logging.ERROR
+        robot = Robot('inbound', logger)
+        robot.register_default_handlers()
+        robot.load_adapter('null', 'tests.fixtures.adapters')
+        robot.setup_inbound_queue(maxsize=10, policy='drop_oldest')
+        robot.handler_signal.send('inbound ping', source='null')
+        robot.shutdown()
+        self.assertEqual(robot.adapters['null'].responses, ['pong'])
+        self.assertEqual(robot.collect_stats()['received'], 1)
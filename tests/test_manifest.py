@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_manifest
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Static handler manifest tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import re
+import ast
+import sys
+import logging
+from unittest import TestCase
+from robo.robot import Robot
+from robo.manifest import ManifestError, parse_module, read_manifest
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'fixtures', 'lazy_handlers')
+
+
+def parse(source, class_name='Foo'):
+    return parse_module(ast.parse(source), class_name)
+
+
+class TestManifest(TestCase):
+    def test_should_read_cmd_kwargs(self):
+        """ read_manifest() should read @cmd() kwargs without import. """
+        ret = read_manifest(os.path.join(FIXTURE_PATH, 'lazy.py'), 'Lazy')
+        self.assertEqual([m['method'] for m in ret], ['lazy', 'sleepy'])
+        self.assertEqual(ret[0]['kwargs'], {'regex': '^lazy$',
+                                            'description': 'lazy',
+                                            'flags': re.I | re.M})
+        self.assertFalse(ret[0]['coroutine'])
+
+    def test_should_not_read_inherited_class(self):
+        """ read_manifest() should return None if class inherits other class. """
+        path = os.path.join(FIXTURE_PATH, 'dynamic.py')
+        self.assertIsNone(read_manifest(path, 'Dynamic'))
+
+    def test_should_not_read_non_literal_args(self):
+        """ parse_module() should raise error if kwargs are not literal. """
+        source = '\n'.join([
+            'from robo.decorators import cmd',
+            'PATTERN = "^foo"',
+            'class Foo(object):',
+            '    @cmd(regex=PATTERN)',
+            '    def foo(self, message, **kwargs):',
+            '        pass',
+        ])
+        with self.assertRaises(ManifestError):
+            parse(source)
+
+    def test_should_not_read_other_decorators(self):
+        """ parse_module() should raise error if method has other decorator. """
+        source = '\n'.join([
+            'from robo.decorators import cmd',
+            'class Foo(object):',
+            '    @staticmethod',
+            '    @cmd(regex="^foo")',
+            '    def foo(message, **kwargs):',
+            '        pass',
+        ])
+        with self.assertRaises(ManifestError):
+            parse(source)
+
+
+class TestLazyHandlers(TestCase):
+    def setUp(self):
+        for name in ('lazy', 'dynamic'):
+            sys.modules.pop('tests.fixtures.lazy_handlers.' + name, None)
+        logger = logging.getLogger('robo')
+        logger.level = logging.ERROR
+        self.robot = Robot('lazy', logger)
+        self.robot.setup_handlers(FIXTURE_PATH, 'tests.fixtures.lazy_handlers',
+                                  lazy=True)
+        self.robot.load_adapter('null', 'tests.fixtures.adapters')
+
+    def test_should_not_import_until_matched(self):
+        """ Robot().setup_handlers(lazy=True) should not import handlers. """
+        self.assertFalse('tests.fixtures.lazy_handlers.lazy' in sys.modules)
+        self.assertEqual([d['pattern'] for d in self.robot.docs],
+                         ['^base$', '^dynamic$', '^lazy$', '^sleepy$'])
+        self.assertIsNone(self.robot.handlers[2].instance)
+
+    def test_should_import_when_first_matched(self):
+        """ Lazy handler should be imported when first matched. """
+        self.robot.handler_signal.send('lazy sleepy', room='@general')
+        self.assertFalse('tests.fixtures.lazy_handlers.lazy' in sys.modules)
+        self.robot.handler_signal.send('lazy LAZY')
+        self.assertTrue('tests.fixtures.lazy_handlers.lazy' in sys.modules)
+        self.assertEqual(self.robot.adapters['null'].responses, ['lazy lazy'])
+        self.assertIs(self.robot.handlers[2].instance,
+                      self.robot.handlers[3].instance)
+
+    def test_should_import_non_static_handler(self):
+        """ Handler which can not be analyzed should be imported. """
+        self.assertTrue('tests.fixtures.lazy_handlers.dynamic' in sys.modules)
+        self.robot.handler_signal.send('lazy base')
+        self.assertEqual(self.robot.adapters['null'].responses, ['base'])
+
+    def test_should_disable_handlers_which_failed_to_import(self):
+        """ Lazy plugin which failed to import should not be imported again. """
+        logger = logging.getLogger('robo')
+        logger.level = logging.CRITICAL
+        calls = []
+
+        def load_handler(loader, name, reload=False):
+            calls.append(name)
+            raise ImportError(name)
+
+        self.robot.load_handler = load_handler
+        try:
+            self.robot.handler_signal.send('lazy lazy')
+            self.robot.handler_signal.send('lazy lazy')
+        finally:
+            logger.level = logging.ERROR
+        self.assertEqual(calls, ['lazy'])
+        self.assertTrue(self.robot.handlers[2].plugin.failed)
+        self.assertEqual(self.robot.adapters['null'].responses, [])
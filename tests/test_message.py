@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_message
+    ~~~~~~~~~~~~~~~~~~~~~~~
+
+    Message tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import re
+import pickle
+import threading
+from unittest import TestCase
+from robo.message import Envelope, MatchResult, Message
+
+
+class TestMessage(TestCase):
+    def test_should_be_picklable(self):
+        """ Message() should be picklable with match object. """
+        match = re.match(r'echo\s+(?P<word>.*)', 'echo hello')
+        message = Message('robo echo hello', match=match, source='shell')
+        ret = pickle.loads(pickle.dumps(message))
+        self.assertEqual(ret.body, 'robo echo hello')
+        self.assertEqual(ret.source, 'shell')
+        self.assertTrue(isinstance(ret.match, MatchResult))
+        self.assertEqual(ret.match.group(1), 'hello')
+
+    def test_should_drop_unpicklable_kwargs(self):
+        """ Message() should drop kwargs which can not be pickled. """
+        envelope = Envelope('robo ping', {'source': 'slack',
+                                          'original': threading.Lock()})
+        message = Message.view(envelope, None, to='robo.handlers.ping.say')
+        ret = pickle.loads(pickle.dumps(message))
+        self.assertEqual(ret.envelope.kwargs, {'source': 'slack'})
+        self.assertEqual(ret.to, 'robo.handlers.ping.say')
+
+    def test_views_should_share_envelope(self):
+        """ Message.view() should share incoming message. """
+        envelope = Envelope('robo ping', {'source': 'shell',
+                                          'send_from': 'foo'})
+        message1 = Message.view(envelope, None, to='foo')
+        message2 = Message.view(envelope, None, to='bar')
+        self.assertIs(message1.envelope, message2.envelope)
+        self.assertEqual(message1.source, 'shell')
+        self.assertEqual(message2.send_from, 'foo')
+        self.assertIsNone(message2.room)
+        self.assertEqual((message1.to, message2.to), ('foo', 'bar'))
+
+    def test_should_be_slotted(self):
+        """ Message() should not have instance dict. """
+        message = Message('robo ping', None)
+        self.assertFalse(hasattr(message, '__dict__'))
+        with self.assertRaises(AttributeError):
+            message.foo = 'bar'
+
+    def test_envelope_should_be_read_only(self):
+        """ Envelope() should be read-only. """
+        envelope = Envelope('robo ping', {})
+        with self.assertRaises(AttributeError):
+            envelope.body = 'robo pong'
+
+
+class TestMatchResult(TestCase):
+    def test_should_behave_like_match_object(self):
+        """ MatchResult() should provide same result as match object. """
+        match = re.match(r'(?P<cmd>\w+)\s+(\w+)?(x)?', 'echo hello')
+        ret = MatchResult(match)
+        self.assertEqual(ret.group(), match.group())
+        self.assertEqual(ret.group('cmd', 2), match.group('cmd', 2))
+        self.assertEqual(ret.groups(), match.groups())
+        self.assertEqual(ret.groups(''), match.groups(''))
+        self.assertEqual(ret.groupdict(), match.groupdict())
+        self.assertEqual(ret.span(2), match.span(2))
+        self.assertEqual(ret['cmd'], match['cmd'])
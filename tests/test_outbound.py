@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_outbound
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Outbound send queue tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import logging
+from unittest import TestCase
+from robo.robot import Robot
+from robo.outbound import OutboundQueue
+from robo.ratelimit import TokenBucket
+from tests.fixtures.adapters.null import Null
+from tests.helpers import Clock
+
+
+class TestTokenBucket(TestCase):
+    def test_should_consume_up_to_capacity(self):
+        """ TokenBucket().consume() should allow burst up to capacity. """
+        clock = Clock()
+        bucket = TokenBucket(1, 2, clock=clock)
+        self.assertTrue(bucket.consume())
+        self.assertTrue(bucket.consume())
+        self.assertFalse(bucket.consume())
+        self.assertEqual(bucket.delay(), 1.0)
+
+    def test_should_refill_tokens(self):
+        """ TokenBucket() should refill tokens by rate. """
+        clock = Clock()
+        bucket = TokenBucket(2, 2, clock=clock)
+        bucket.consume(2)
+        clock.now = 0.5
+        self.assertTrue(bucket.consume())
+        self.assertFalse(bucket.consume())
+
+
+class TestOutboundQueue(TestCase):
+    def setUp(self):
+        logger = logging.getLogger('robo')
+        logger.level = logging.CRITICAL
+        self.adapter = Null(None)
+        self.logger = logger
+
+    def test_should_merge_replies_to_same_room(self):
+        """ OutboundQueue() should merge consecutive replies to same room. """
+        queue = OutboundQueue(self.adapter, rate=100, coalesce_window=0.2,
+                              logger=self.logger)
+        queue.put('foo', room='@random')
+        queue.put('bar', room='@random')
+        queue.put('baz', room='@general')
+        queue.put('qux')
+        queue.put('quux')
+        queue.stop(1)
+        self.assertEqual(self.adapter.responses,
+                         ['foo\nbar', 'baz', 'qux', 'quux'])
+        self.assertEqual(queue.stats['coalesced'], 1)
+        self.assertEqual(queue.stats['sent'], 4)
+
+    def test_should_drop_oldest_reply_when_full(self):
+        """ OutboundQueue() should drop oldest reply when queue is full. """
+        queue = OutboundQueue(self.adapter, rate=0.001, burst=1,
+                              maxsize=2, logger=self.logger)
+        queue.put('foo')
+        queue.put('bar')
+        queue.put('baz')
+        queue.put('qux')
+        self.assertEqual(queue.depth, 2)
+        self.assertTrue(queue.stats['dropped'] >= 1)
+        self.assertEqual(queue.queue[-1].message, 'qux')
+        queue.stop(1)
+        self.assertFalse(queue.worker.is_alive())
+
+    def test_robot_should_notify_through_queue(self):
+        """ Robot().setup_outbound_queue() should queue replies. """
+        robot = Robot('outbound', self.logger)
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'fixtures', 'handlers')
+        robot.setup_handlers(path, 'tests.fixtures.handlers')
+        robot.load_adapter('null', 'tests.fixtures.adapters')
+        queue = robot.setup_outbound_queue('null', rate=100,
+                                           coalesce_window=0.5)
+        robot.handler_signal.send('outbound goodbye', room='@random')
+        robot.shutdown()
+        self.assertEqual(robot.adapters['null'].responses,
+                         ['goodbye @random\ngoodbye all'])
+        self.assertEqual(queue.stats['queued'], 2)
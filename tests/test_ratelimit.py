@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_ratelimit
+    ~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Throttle tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import logging
+from unittest import TestCase
+from robo.robot import Robot
+from robo.ratelimit import Throttle, throttle_keys
+from tests.helpers import Clock
+
+
+def create_robot():
+    logger = logging.getLogger('robo')
+    logger.level = logging.ERROR
+    robot = Robot('throttle', logger)
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'fixtures', 'throttle_handlers')
+    robot.setup_handlers(path, 'tests.fixtures.throttle_handlers')
+    robot.load_adapter('null', 'tests.fixtures.adapters')
+
+    return robot
+
+
+class TestThrottle(TestCase):
+    def test_should_list_keys(self):
+        """ throttle_keys() should list keys of user and room. """
+        self.assertEqual(throttle_keys({}), [])
+        kwargs = {'source': 'slack', 'user': 'alice', 'room': 'general'}
+        self.assertEqual(throttle_keys(kwargs), [
+            ('user', 'slack', 'alice'), ('room', 'slack', 'general')
+        ])
+
+    def test_should_throttle_user_and_room(self):
+        """ Throttle().allow() should reject user or room over rate. """
+        clock = Clock()
+        throttle = Throttle(1, 2, clock=clock)
+        alice = {'user': 'alice', 'room': 'general'}
+        bob = {'user': 'bob', 'room': 'general'}
+        self.assertTrue(throttle.allow(alice))
+        self.assertTrue(throttle.allow(alice))
+        self.assertFalse(throttle.allow(alice))
+        #: Room has no token too.
+        self.assertFalse(throttle.allow(bob))
+        self.assertTrue(throttle.allow({'user': 'bob'}))
+        clock.now = 1.0
+        self.assertTrue(throttle.allow(bob))
+        self.assertTrue(throttle.allow({}))
+
+    def test_should_allow_one_message_below_one_per_second(self):
+        """ Throttle() should hold at least one token without burst. """
+        clock = Clock()
+        throttle = Throttle(0.5, clock=clock)
+        self.assertTrue(throttle.allow({'user': 'alice'}))
+        self.assertFalse(throttle.allow({'user': 'alice'}))
+        clock.now = 2.0
+        self.assertTrue(throttle.allow({'user': 'alice'}))
+
+    def test_should_evict_idle_buckets(self):
+        """ Throttle() should bound buckets and evict idle ones. """
+        clock = Clock()
+        throttle = Throttle(1, 2, maxsize=3, clock=clock)
+        for user in ['a', 'b', 'c', 'd']:
+            throttle.allow({'user': user})
+        self.assertEqual(len(throttle), 3)
+        self.assertFalse(('user', None, 'a') in throttle.buckets)
+        clock.now = 2.0
+        throttle.allow({'user': 'e'})
+        self.assertEqual(list(throttle.buckets), [('user', None, 'e')])
+
+
+class TestRobotThrottle(TestCase):
+    def test_should_throttle_before_matching(self):
+        """ Robot().setup_throttle() should reject messages over rate. """
+        robot = create_robot()
+        robot.setup_throttle(0.01, 2)
+        for _ in range(3):
+            robot.handler_signal.send('throttle ham', user='alice')
+        robot.handler_signal.send('throttle ham', user='bob')
+        self.assertEqual(robot.adapters['null'].responses, ['ham'] * 3)
+        stats = robot.collect_stats()
+        self.assertEqual(stats['throttled'], 1)
+        self.assertEqual(stats['matched'], 3)
+
+    def test_should_not_throttle_message_to_others(self):
+        """ Robot().setup_throttle() should not count messages to others. """
+        robot = create_robot()
+        robot.setup_throttle(0.1)
+        robot.handler_signal.send('good morning everyone, throttle is great',
+                                  user='alice')
+        robot.handler_signal.send('throttle ham', user='alice')
+        self.assertEqual(robot.adapters['null'].responses, ['ham'])
+        self.assertEqual(robot.stats['throttled'], 0)
+
+    def test_should_throttle_handler(self):
+        """ @cmd(rate=...) should throttle only the handler. """
+        robot = create_robot()
+        for message in ['spam', 'spam', 'ham', 'spam', 'eggs']:
+            robot.handler_signal.send('throttle ' + message, user='alice')
+        robot.handler_signal.send('throttle spam', user='bob')
+        self.assertEqual(robot.adapters['null'].responses,
+                         ['spam', 'ham', 'unknown', 'spam'])
+        self.assertEqual(robot.stats['throttled'], 2)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_reloader
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Hot reload tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import sys
+import shutil
+import logging
+import tempfile
+from unittest import TestCase
+from robo.robot import Robot
+from robo.reloader import Reloader
+
+SOURCE = """from robo.decorators import cmd
+
+
+class Ping(object):
+    stopped = False
+
+    @cmd(regex=r'^ping$', description='{0}')
+    def ping(self, message, **kwargs):
+        return '{0}'
+
+    def shutdown(self):
+        self.stopped = True
+"""
+
+
+class ProcessExecutor(object):
+    def __init__(self):
+        self.stopped = []
+
+    def shutdown(self, wait=True):
+        self.stopped.append(wait)
+
+
+class TestReloader(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp(prefix='robo-test-')
+        self.package = 'robo_reload_{0}'.format(os.getpid())
+        self.plugins = os.path.join(self.path, self.package)
+        os.mkdir(self.plugins)
+        with open(os.path.join(self.plugins, '__init__.py'), 'w') as f:
+            f.write('')
+        self.write_plugin('pong')
+        sys.path.insert(0, self.path)
+
+        logger = logging.getLogger('robo')
+        logger.level = logging.ERROR
+        self.robot = Robot('test', logger)
+        self.robot.register_default_handlers()
+        self.robot.setup_handlers([self.plugins], self.package)
+        self.robot.load_adapter('null', 'tests.fixtures.adapters')
+        self.module = self.package + '.ping'
+
+    def tearDown(self):
+        self.robot.shutdown()
+        sys.path.remove(self.path)
+        for name in list(sys.modules):
+            if name.startswith(self.package):
+                del sys.modules[name]
+        shutil.rmtree(self.path)
+
+    def write_plugin(self, reply, mtime=None):
+        path = os.path.join(self.plugins, 'ping.py')
+        with open(path, 'w') as f:
+            f.write(SOURCE.format(reply))
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def touch_plugin(self, reply):
+        path = os.path.join(self.plugins, 'ping.py')
+        self.write_plugin(reply, os.stat(path).st_mtime + 10)
+
+    def say(self, body):
+        null = self.robot.adapters['null']
+        self.robot.handler_signal.send('test ' + body, source='null')
+        return null.responses[-1]
+
+    def test_reload_should_swap_handlers(self):
+        """ Robot().reload_plugin() should swap handlers and docs. """
+        old = self.robot.handlers
+        self.assertEqual(self.say('ping'), 'pong')
+        self.touch_plugin('pong2')
+        self.assertTrue(self.robot.reload_plugin(self.module))
+        self.assertEqual(self.say('ping'), 'pong2')
+        self.assertEqual(len(self.robot.handlers), len(old))
+        self.assertEqual(len(self.robot.docs), len(old))
+        self.assertTrue('pong2' in [d['description']
+                                    for d in self.robot.docs])
+
+    def test_reload_should_shutdown_old_instance(self):
+        """ Robot().reload_plugin() should shutdown old instance and
+        process pool. """
+        instance = [h.instance for h in self.robot.handlers
+                    if h.send_to == self.module + '.ping'][0]
+        executor = self.robot.process_executor = ProcessExecutor()
+        self.touch_plugin('pong2')
+        self.assertTrue(self.robot.reload_plugin(self.module))
+        self.assertTrue(instance.stopped)
+        self.assertEqual(executor.stopped, [False])
+
+    def test_in_flight_message_should_use_old_handler(self):
+        """ Robot().reload_plugin() should not change old handlers. """
+        old = [h for h in self.robot.handlers if h.method == 'ping']
+        self.touch_plugin('pong2')
+        self.robot.reload_plugin(self.module)
+        self.assertEqual(old[-1].func(None), 'pong')
+
+    def test_reload_should_keep_old_handlers_on_error(self):
+        """ Robot().reload_plugin() should keep handlers if import failed. """
+        path = os.path.join(self.plugins, 'ping.py')
+        with open(path, 'w') as f:
+            f.write('class Ping(object:\n')
+        self.assertFalse(self.robot.reload_plugin(self.module))
+        self.assertEqual(self.say('ping'), 'pong')
+
+    def test_check_should_reload_changed_plugins(self):
+        """ Reloader().check() should reload only changed plugins. """
+        reloader = Reloader(self.robot, use_inotify=False)
+        self.assertEqual(reloader.check(), [])
+        self.touch_plugin('pong2')
+        self.assertEqual(reloader.check(), [self.module])
+        self.assertEqual(self.say('ping'), 'pong2')
+        self.assertEqual(reloader.check(), [])
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_replay
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Record and replay tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import io
+import os
+import json
+import shutil
+import logging
+import tempfile
+from unittest import TestCase
+from robo.robot import Robot
+from robo.replay import Replayer, read_log
+from robo.utils import percentile
+
+
+def create_robot():
+    logger = logging.getLogger('robo')
+    logger.level = logging.ERROR
+    robot = Robot('replay', logger, bus='direct')
+    robot.register_default_handlers()
+    robot.load_adapter('null', 'tests.fixtures.adapters')
+
+    return robot
+
+
+class TestReplay(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'traffic.log')
+        robot = create_robot()
+        robot.setup_recorder(self.path)
+        send = robot.handler_signal.send
+        send('replay ping', source='null', room='general', user='alice')
+        send('replay echo foo', source='null', room='random', user='bob')
+        send('hello', source='null', room='general', user='alice')
+        robot.shutdown()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_should_record_messages_and_replies(self):
+        """ Robot().setup_recorder() should record messages and replies. """
+        entries = read_log(self.path)
+        self.assertEqual([(e['k'], e['n'], e['body']) for e in entries], [
+            ('in', 1, 'replay ping'),
+            ('out', 1, 'pong'),
+            ('in', 2, 'replay echo foo'),
+            ('out', 2, 'foo'),
+            ('in', 3, 'hello'),
+        ])
+        self.assertEqual(entries[0]['room'], 'general')
+        self.assertEqual(entries[0]['user'], 'alice')
+        self.assertEqual(entries[0]['src'], 'null')
+
+    def test_should_continue_ids_of_former_session(self):
+        """ Recorder() should not reuse ids of appended log. """
+        robot = create_robot()
+        robot.setup_recorder(self.path)
+        robot.handler_signal.send('replay ping', source='null')
+        robot.shutdown()
+        entries = read_log(self.path)
+        self.assertEqual([(e['k'], e['n']) for e in entries[-2:]],
+                         [('in', 4), ('out', 4)])
+
+    def test_should_not_pass_record_id_to_handlers(self):
+        """ Replayer().run() should not pass record id to handlers. """
+        robot = create_robot()
+        received = []
+        call_handler = robot.call_handler
+
+        def spy(sender, handler, matched, **kwargs):
+            received.append(kwargs)
+            return call_handler(sender, handler, matched, **kwargs)
+
+        robot.call_handler = spy
+        report = Replayer(robot, self.path).run()
+        robot.shutdown()
+        self.assertEqual(report['diffs'], [])
+        self.assertEqual(len(received), 2)
+        self.assertTrue(all('record_id' not in k for k in received))
+
+    def test_should_replay_without_diffs(self):
+        """ Replayer().run() should report throughput and latencies. """
+        robot = create_robot()
+        report = Replayer(robot, self.path).run()
+        robot.shutdown()
+        self.assertEqual(report['messages'], 3)
+        self.assertEqual(report['diffs'], [])
+        self.assertTrue(report['messages_per_second'] > 0)
+        handlers = report['handlers']
+        self.assertEqual(handlers['robo.handlers.ping.say']['count'], 1)
+        self.assertEqual(handlers['robo.handlers.echo.say']['count'], 1)
+        self.assertIsNone(robot.recorder)
+        self.assertEqual(robot.adapters['null'].responses, ['pong', 'foo'])
+
+    def test_should_report_diffs(self):
+        """ Replayer().run() should report replies which differ. """
+        with io.open(self.path, 'a', encoding='utf-8') as f:
+            f.write(u'{"k":"out","n":3,"body":"hi"}\n')
+            f.write(u'{"k":"in","n":4,"bo')
+        robot = create_robot()
+        report = Replayer(robot, self.path, speed=1000).run()
+        robot.shutdown()
+        self.assertEqual(report['diffs'], [{
+            'n': 3, 'body': 'hello', 'expected': ['hi'], 'actual': []
+        }])
+
+    def test_percentile(self):
+        """ percentile() should return nearest rank. """
+        self.assertEqual(percentile([], 0.5), 0.0)
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 0.5), 3)
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 0.99), 5)
+        self.assertEqual(json.loads(json.dumps(percentile([0.5], 1))), 0.5)
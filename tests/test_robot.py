@@ -10,10 +10,14 @@
     :license: BSD, see LICENSE for more details.
 """
 import os
+import shutil
+import time
 import logging
+import tempfile
 from blinker import Signal
 from unittest import TestCase
 from robo.robot import PluginLoader, Robot
+from robo.decorators import cmd
 
 
 class TestPluginLoader(TestCase):
@@ -29,6 +33,13 @@ class TestPluginLoader(TestCase):
         paths = self.loader.list_plugins(searchpath=[self.fixture_path])
         self.assertEqual(paths, ['bar', 'foo'])
 
+    def test_list_plugins_twice(self):
+        """ PluginLoader().list_plugins() should list plugins every time. """
+        loader = PluginLoader('tests.fixtures')
+        for _ in range(2):
+            paths = loader.list_plugins(searchpath=[self.fixture_path])
+            self.assertEqual(paths, ['bar', 'foo'])
+
     def test_load_foo(self):
         """ PluginLoader().load_plugin('foo') should load `foo` module. """
         plugin = self.loader.load_plugin('foo')
@@ -45,6 +56,65 @@ class TestPluginLoader(TestCase):
             self.loader.load_plugin('nomodule')
 
 
+class TestPluginLoaderCache(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp(prefix='robo-test-')
+        self.plugins = os.path.join(self.path, 'plugins')
+        os.mkdir(self.plugins)
+        self.cache_path = os.path.join(self.path, 'cache.json')
+        self.write_plugin('^ping$')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def write_plugin(self, regex):
+        source = ('from robo.decorators import cmd\n\n\n'
+                  'class Ping(object):\n'
+                  '    @cmd(regex=r\'{0}\')\n'
+                  '    def ping(self, message, **kwargs):\n'
+                  '        return \'pong\'\n')
+        with open(os.path.join(self.plugins, 'ping.py'), 'w') as f:
+            f.write(source.format(regex))
+
+    def scan(self, rescan=False):
+        loader = PluginLoader('plugins', cache_path=self.cache_path,
+                              rescan=rescan)
+        names = loader.list_plugins([self.plugins])
+        manifests = [loader.read_manifest(name) for name in names]
+        loader.save_cache()
+
+        return loader, names, manifests
+
+    def test_should_reuse_cached_discovery(self):
+        """ PluginLoader() should reuse cache while plugins are unchanged. """
+        _, names, manifests = self.scan()
+        self.assertEqual(names, ['ping'])
+        loader, _, cached = self.scan()
+        self.assertEqual(cached, manifests)
+        self.assertFalse(loader.cache.dirty)
+
+    def test_should_rescan_changed_plugin(self):
+        """ PluginLoader() should read manifest again if plugin changed. """
+        self.scan()
+        self.write_plugin('^ping pong$')
+        path = os.path.join(self.plugins, 'ping.py')
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+        _, _, manifests = self.scan()
+        self.assertEqual(manifests[0][0]['kwargs']['regex'], '^ping pong$')
+
+    def test_should_force_rescan(self):
+        """ PluginLoader(rescan=True) should ignore cached entries. """
+        loader, _, _ = self.scan()
+        loader.cache.dirs[self.plugins]['modules'] = [['stale', False]]
+        loader.cache.dirty = True
+        loader.save_cache()
+        _, names, _ = self.scan()
+        self.assertEqual(names, ['stale'])
+        _, names, _ = self.scan(rescan=True)
+        self.assertEqual(names, ['ping'])
+
+
 class TestRobot(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -173,6 +243,30 @@ class TestRobot(TestCase):
         self.assertEqual(self.robot.adapters['null'].responses, ['missing2'])
         self.robot.adapters['null'].responses = []
 
+    def test_eligible_handlers_should_be_cached_per_room(self):
+        """ Robot().eligible_handlers() should cache handlers per room. """
+        self.robot.room_cache.clear()
+        eligibles = self.robot.eligible_handlers('@random')
+        methods = [h['method'] for h in self.robot.handlers
+                   if id(h) in eligibles]
+        self.assertEqual(methods, ['goodbye'])
+        self.assertTrue('@random' in self.robot.room_cache)
+        self.assertIs(self.robot.eligible_handlers('@random'), eligibles)
+
+    def test_eligible_handlers_should_contain_only_room_handlers(self):
+        """ Robot().eligible_handlers() should not cache handlers which have no room. """
+        self.robot.room_cache.clear()
+        self.assertEqual(self.robot.eligible_handlers('@test'), frozenset())
+        self.assertEqual(self.robot.eligible_handlers(None), frozenset())
+        restricted = self.robot.index.restricted
+        self.assertTrue(all(h.room is not None for h in restricted))
+
+    def test_room_cache_should_be_cleared_when_index_rebuilt(self):
+        """ Robot().rebuild_index() should clear room cache. """
+        self.robot.eligible_handlers('@random')
+        self.robot.rebuild_index()
+        self.assertEqual(len(self.robot.room_cache), 0)
+
     def test_hander_should_shutdown(self):
         """ Handelr should shutdown if handler contains shutdown method. """
         self.robot.shutdown()
@@ -208,3 +302,88 @@ class TestRobot(TestCase):
         self.robot.notify_to_adapter('hello')
         self.assertEqual(self.robot.adapters['null'].responses, ['hello'])
         self.robot.adapters['null'].responses = []
+
+
+class Announce(object):
+    @cmd(regex=r'^announce$', broadcast=True)
+    def announce(self, message, **kwargs):
+        return 'announce'
+
+
+class TestRobotRouting(TestCase):
+    def setUp(self):
+        logger = logging.getLogger('robo')
+        logger.level = logging.ERROR
+        self.robot = Robot('route', logger)
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'fixtures')
+        handler_path = os.path.join(path, 'handlers')
+        self.robot.setup_handlers(handler_path, 'tests.fixtures.handlers')
+        self.robot.handlers.extend(self.robot.parse_handler_methods(Announce()))
+        self.robot.load_adapter('null', 'tests.fixtures.adapters')
+        self.robot.load_adapter('other', 'tests.fixtures.adapters')
+
+    def test_should_register_routes(self):
+        """ Robot().load_adapter() should register route by adapter source. """
+        self.assertEqual(self.robot.routes, {'null': 'null', 'other': 'other'})
+
+    def test_should_notify_only_to_source_adapter(self):
+        """ Robot() should notify reply only to adapter which received message. """
+        self.robot.handler_signal.send('route hi', source='other')
+        self.assertEqual(self.robot.adapters['other'].responses, ['hi'])
+        self.assertEqual(self.robot.adapters['null'].responses, [])
+
+    def test_should_notify_to_all_adapters_if_source_is_unknown(self):
+        """ Robot() should notify reply to all adapters if source is unknown. """
+        self.robot.handler_signal.send('route hi')
+        self.assertEqual(self.robot.adapters['other'].responses, ['hi'])
+        self.assertEqual(self.robot.adapters['null'].responses, ['hi'])
+
+    def test_should_broadcast_if_handler_requires(self):
+        """ Robot() should notify to all adapters if broadcast is True. """
+        self.robot.handler_signal.send('route announce', source='other')
+        self.assertEqual(self.robot.adapters['other'].responses, ['announce'])
+        self.assertEqual(self.robot.adapters['null'].responses, ['announce'])
+
+    def test_notify_to_adapter_should_broadcast(self):
+        """ Robot().notify_to_adapter() should broadcast if broadcast is True. """
+        self.robot.notify_to_adapter('hello', broadcast=True, source='null')
+        self.assertEqual(self.robot.adapters['other'].responses, ['hello'])
+        self.assertEqual(self.robot.adapters['null'].responses, ['hello'])
+
+
+class TestRobotParallelLoading(TestCase):
+    def setUp(self):
+        self.logs = []
+        self.logger = logging.getLogger('robo.parallel')
+        self.logger.level = logging.INFO
+        self.logger.propagate = False
+        self.handler = logging.Handler()
+        self.handler.emit = lambda r: self.logs.append(r.getMessage())
+        self.logger.addHandler(self.handler)
+        self.robot = Robot('parallel', self.logger)
+        self.path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 'fixtures', 'slow_handlers')
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+
+    def test_should_register_in_deterministic_order(self):
+        """ Robot().setup_handlers(workers=3) should keep registered order. """
+        start = time.time()
+        self.robot.setup_handlers(self.path, 'tests.fixtures.slow_handlers',
+                                  workers=3)
+        self.assertLess(time.time() - start, 0.55)
+        self.assertEqual([h.method for h in self.robot.handlers],
+                         ['alpha', 'beta', 'gamma'])
+        self.assertEqual([d['description'] for d in self.robot.docs],
+                         ['alpha', 'beta', 'gamma'])
+
+    def test_should_log_load_times(self):
+        """ Robot().setup_handlers() should log load time of each plugin. """
+        self.robot.setup_handlers(self.path, 'tests.fixtures.slow_handlers',
+                                  workers=3)
+        lines = self.logs[-1].splitlines()
+        self.assertTrue(lines[0].startswith('Loaded 3 handler plugins'))
+        self.assertEqual([line.split(':')[0].strip() for line in lines[1:]],
+                         ['alpha', 'beta', 'gamma'])
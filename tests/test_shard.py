@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_shard
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Room sharding tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import logging
+from unittest import TestCase
+from robo.robot import Robot
+from robo.shard import Shard, shard_of
+from robo.supervisor import Supervisor, merge_stats
+
+
+class FakeRobot(object):
+    def collect_stats(self):
+        return {'received': 2, 'replied': 1}
+
+
+def exit_worker(shard, reporter):
+    reporter.report(FakeRobot())
+
+
+class TestShard(TestCase):
+    def test_shard_of_should_be_stable(self):
+        """ shard_of() should return same shard regardless of case. """
+        self.assertEqual(shard_of('general@conference', 4), 0)
+        self.assertEqual(shard_of(' General@Conference', 4), 0)
+        self.assertEqual(shard_of('room0@conference', 4), 3)
+
+    def test_rooms_should_be_owned_by_one_shard(self):
+        """ Shard().filter() should split rooms without overlap. """
+        rooms = ['room{0}@conference'.format(i) for i in range(100)]
+        shards = [Shard(i, 3) for i in range(3)]
+        owned = [r for shard in shards for r in shard.filter(rooms)]
+        self.assertEqual(sorted(owned), sorted(rooms))
+        self.assertTrue(all(shard.filter(rooms) for shard in shards))
+
+    def test_message_without_room_should_be_owned_by_first_shard(self):
+        """ Shard().owns(None) should be True only for first shard. """
+        self.assertTrue(Shard(0, 2).owns(None))
+        self.assertFalse(Shard(1, 2).owns(None))
+
+    def test_should_raise_if_index_is_out_of_range(self):
+        """ Shard() should raise ValueError if index is out of range. """
+        with self.assertRaises(ValueError):
+            Shard(2, 2)
+
+
+class TestRobotShard(TestCase):
+    def setUp(self):
+        logger = logging.getLogger('robo')
+        logger.level = logging.ERROR
+        self.robot = Robot('shard', logger)
+        self.robot.register_default_handlers()
+        self.robot.load_adapter('null', 'tests.fixtures.adapters')
+        self.robot.setup_shard(0, 4)
+
+    def test_should_dispatch_only_owned_rooms(self):
+        """ Robot().setup_shard() should skip rooms of other shards. """
+        responses = self.robot.adapters['null'].responses
+        self.robot.handler_signal.send('shard ping', room='room0@conference',
+                                       source='null')
+        self.robot.handler_signal.send('shard ping', room='room1@conference',
+                                       source='null')
+        self.assertEqual(responses, ['pong'])
+        stats = self.robot.collect_stats()
+        self.assertEqual(stats['skipped'], 1)
+        self.assertEqual(stats['replied'], 1)
+
+
+class TestSupervisor(TestCase):
+    def test_should_restart_dead_workers(self):
+        """ Supervisor().check() should restart dead workers. """
+        supervisor = Supervisor(exit_worker, 2,
+                                logger=logging.getLogger('robo.test'))
+        supervisor.start()
+        try:
+            for process in list(supervisor.processes.values()):
+                process.join(5)
+            self.assertEqual(sorted(supervisor.check()), [0, 1])
+            self.assertEqual(supervisor.restarts, 2)
+        finally:
+            supervisor.stop()
+
+    def test_should_merge_stats(self):
+        """ Supervisor().stats() should merge stats of workers. """
+        self.assertEqual(merge_stats([{'a': 1}, {'a': 2, 'b': 1}]),
+                         {'a': 3, 'b': 1})
+        self.assertEqual(merge_stats([
+            {'inbound.max_depth': 3, 'inbound.max_wait_seconds': 0.5},
+            {'inbound.max_depth': 5, 'inbound.max_wait_seconds': 0.1},
+        ]), {'inbound.max_depth': 5, 'inbound.max_wait_seconds': 0.5})
+        supervisor = Supervisor(exit_worker, 2,
+                                logger=logging.getLogger('robo.test'))
+        supervisor.start()
+        try:
+            for process in list(supervisor.processes.values()):
+                process.join(5)
+            stats = supervisor.stats()
+            self.assertEqual(stats['received'], 4)
+            self.assertEqual(stats['replied'], 2)
+        finally:
+            supervisor.stop()
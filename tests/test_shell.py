@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+    robo.tests.test_shell
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Shell adapter tests.
+
+
+    :copyright: (c) 2018 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import json
+import logging
+from io import StringIO
+from unittest import TestCase
+from robo.robot import Robot
+from robo.adapters.shell import parse_line
+
+
+class TestParseLine(TestCase):
+    def test_should_parse_text_line(self):
+        """ parse_line() should parse text line without fields. """
+        self.assertEqual(parse_line('robo ping\n'), ('robo ping', {}))
+        self.assertIsNone(parse_line('  \n'))
+
+    def test_should_parse_json_line(self):
+        """ parse_line() should parse room and user of JSON line. """
+        line = '{"body": "robo ping", "room": "@general", "user": "alice"}'
+        message, kwargs = parse_line(line)
+        self.assertEqual(message, 'robo ping')
+        self.assertEqual(kwargs['room'], '@general')
+        self.assertEqual(kwargs['user'], 'alice')
+
+    def test_should_treat_broken_json_as_text(self):
+        """ parse_line() should treat broken JSON as text. """
+        self.assertEqual(parse_line('{robo'), ('{robo', {}))
+
+
+class TestShellPipe(TestCase):
+    def setUp(self):
+        os.environ['ROBO_SHELL_MODE'] = 'pipe'
+        logger = logging.getLogger('robo')
+        logger.level = logging.ERROR
+        self.robot = Robot('robo', logger, bus='direct')
+        self.robot.register_default_handlers()
+        self.robot.load_adapter('shell')
+        self.shell = self.robot.adapters['shell']
+        self.shell.output = StringIO()
+
+    def tearDown(self):
+        del os.environ['ROBO_SHELL_MODE']
+
+    def test_should_reply_to_each_line(self):
+        """ Shell().pipe() should dispatch lines and write replies. """
+        lines = [
+            u'robo ping\n',
+            u'\n',
+            u'robo echo hi\n',
+            u'{"body": "robo ping", "room": "@general"}\n',
+        ]
+        self.assertEqual(self.shell.pipe(StringIO(u''.join(lines))), 3)
+        output = self.shell.output.getvalue().splitlines()
+        self.assertEqual(output[:2], ['pong', 'hi'])
+        self.assertEqual(json.loads(output[2]),
+                         {'body': 'pong', 'room': '@general'})